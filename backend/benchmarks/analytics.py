@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Analytics benchmark: per-figure queries vs one $facet pass vs counters.
+
+Times what /api/analytics/public needs (totals, status and category
+breakdowns, the 7-day trend and top locations) three ways:
+
+- legacy: what the endpoints used to do. Four status counts, seven daily
+  counts, and separate category and location aggregations, 13 storage
+  calls issued concurrently.
+- facet: one ComplaintRepository.analytics call before the stats counters
+  are reconciled, so a scan of every complaint.
+- counters: the same call after reconcile_stats, reading the materialized
+  counters (storage/stats.py).
+
+With ``--backend memory`` (the default), seeds ``--complaints`` synthetic
+complaints into an in-process MemoryStorage:
+
+    python benchmarks/analytics.py --complaints 200000 --iterations 20
+
+With ``--backend mongo``, runs against the complaints already in
+MONGO_URL/DB_NAME and also reports the database commands each approach sends.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pymongo import monitoring
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common import summarize  # noqa: E402
+from storage import ComplaintQuery, create_storage  # noqa: E402
+from storage.analytics import BY_CATEGORY, TOP_LOCATIONS, TREND, trend_days  # noqa: E402
+
+CATEGORIES = ["Roads", "Electricity", "Water", "Sanitation", "Drainage"]
+STATUSES = ["NO_OFFICER", "PENDING", "IN_PROGRESS", "RESOLVED"]
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts the commands the driver sends (one per round-trip)"""
+
+    def __init__(self):
+        self.commands = 0
+
+    def started(self, event):
+        self.commands += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def make_complaint(i, now):
+    return {
+        "id": str(uuid.uuid4()),
+        "public_id": f"CMP{i:09d}",
+        "title": "Benchmark complaint",
+        "description": "Synthetic complaint for the analytics benchmark",
+        "category": random.choice(CATEGORIES),
+        "priority": "medium",
+        "status": random.choice(STATUSES),
+        "address": f"{random.randint(1, 200)} Market Road, Bhimavaram",
+        "pincode": f"5341{random.randint(0, 99):02d}",
+        "user_id": str(uuid.uuid4()),
+        "user_name": "Benchmark User",
+        "user_email": "bench@example.com",
+        "created_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 30)),
+        "updated_at": now,
+    }
+
+
+async def legacy(complaints):
+    """The 13 concurrent calls public_analytics used to make"""
+    day_queries = []
+    for day in trend_days(7):
+        start = datetime(day.year, day.month, day.day)
+        day_queries.append(ComplaintQuery(created_from=start, created_before=start + timedelta(days=1)))
+    return await asyncio.gather(
+        complaints.count(ComplaintQuery()),
+        complaints.count(ComplaintQuery(status="PENDING")),
+        complaints.count(ComplaintQuery(status="IN_PROGRESS")),
+        complaints.count(ComplaintQuery(status="RESOLVED")),
+        complaints.analytics([BY_CATEGORY]),
+        complaints.analytics([TOP_LOCATIONS]),
+        *[complaints.count(query) for query in day_queries],
+    )
+
+
+async def one_call(complaints):
+    return await complaints.analytics([BY_CATEGORY, TREND, TOP_LOCATIONS])
+
+
+async def run(args):
+    counter = CommandCounter()
+    if args.backend == "memory":
+        storage = create_storage("memory")
+        now = datetime.utcnow()
+        started = time.perf_counter()
+        for i in range(args.complaints):
+            await storage.complaints.insert(make_complaint(i, now))
+        print(f"📦 Seeded {args.complaints} complaints in {time.perf_counter() - started:.1f}s")
+    else:
+        # Listeners must be registered before the client is created
+        monitoring.register(counter)
+        storage = create_storage("mongo", mongo_url=os.getenv("MONGO_URL"), db_name=os.getenv("DB_NAME"))
+
+    print(f"🚀 {args.iterations} iterations each")
+    for label, approach in (("legacy (13 calls)", legacy), ("facet (1 call)", one_call), ("counters", one_call)):
+        if label == "counters":
+            report = await storage.complaints.reconcile_stats()
+            print(f"🔧 Reconciled {report['counters']} counters ({report['repaired']} repaired)")
+        samples = []
+        commands = counter.commands
+        for _ in range(args.iterations):
+            began = time.perf_counter()
+            await approach(storage.complaints)
+            samples.append(time.perf_counter() - began)
+        summarize(label, samples)
+        if args.backend == "mongo":
+            print(f"      {(counter.commands - commands) / args.iterations:.0f} database commands per dashboard load")
+    storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--complaints", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
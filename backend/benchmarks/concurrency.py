@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Mixed-workload concurrency benchmark.
+
+Keeps ``--concurrency`` clients busy for ``--duration`` seconds. Each client
+runs a citizen-style mix of complaint submissions, "my complaints" polls,
+public tracking lookups and public analytics. The script reports throughput
+and per-route latency. Run it once against a server on the pymongo build and
+once against the Motor build, with the same flags and the same database, to
+compare them:
+
+    python benchmarks/concurrency.py --base-url http://localhost:8000/api \\
+        --concurrency 64 --duration 30
+
+Start the server with STORAGE_BACKEND=memory to measure the API layer on
+its own, without database latency.
+"""
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import summarize
+
+
+def register(api_url):
+    email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+    response = requests.post(
+        f"{api_url}/auth/register",
+        json={"email": email, "password": "benchmark-password", "full_name": "Benchmark User"},
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="share of requests that submit a complaint")
+    parser.add_argument("--pincodes", default="534101,534102,534103")
+    args = parser.parse_args()
+
+    api_url = args.base_url
+    pincodes = [p.strip() for p in args.pincodes.split(",") if p.strip()]
+    token = register(api_url)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Seed a few complaints so read routes have something to return
+    public_ids = []
+    for _ in range(20):
+        response = requests.post(
+            f"{api_url}/complaints",
+            json={
+                "title": "Benchmark pothole",
+                "description": "Seeded by benchmarks/concurrency.py",
+                "category": "Roads",
+                "pincode": random.choice(pincodes),
+                "address": "Benchmark Street",
+            },
+            headers=headers,
+        )
+        response.raise_for_status()
+        public_ids.append(response.json()["public_id"])
+
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def client(_):
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            roll = random.random()
+            if roll < args.write_ratio:
+                route, method, url = "POST /api/complaints", "POST", f"{api_url}/complaints"
+                body = {
+                    "title": "Benchmark pothole",
+                    "description": "Submitted under load",
+                    "category": "Roads",
+                    "pincode": random.choice(pincodes),
+                    "address": "Benchmark Street",
+                }
+            elif roll < args.write_ratio + 0.4:
+                route, method, url, body = "GET /api/complaints/my", "GET", f"{api_url}/complaints/my", None
+            elif roll < args.write_ratio + 0.6:
+                public_id = random.choice(public_ids)
+                route, method, url, body = "GET /api/complaints/public/{id}", "GET", f"{api_url}/complaints/public/{public_id}", None
+            else:
+                route, method, url, body = "GET /api/analytics/public", "GET", f"{api_url}/analytics/public", None
+            started = time.perf_counter()
+            response = session.request(method, url, json=body, headers=headers)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    samples[route].append(elapsed)
+                else:
+                    errors[(route, response.status_code)] += 1
+
+    print(f"🔥 {args.concurrency} clients for {args.duration:.0f}s against {args.base_url}...")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(client, range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(v) for v in samples.values())
+    print(f"\n📊 Results")
+    print(f"   throughput: {total / elapsed:.1f} req/s ({total} ok in {elapsed:.1f}s)")
+    for route in sorted(samples):
+        summarize(route, samples[route])
+    if errors:
+        print(f"   errors: {dict(errors)}")
+
+
+if __name__ == "__main__":
+    main()
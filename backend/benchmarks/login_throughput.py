@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Login burst benchmark.
+
+Fires a burst of concurrent logins at a running API while a probe thread
+keeps calling a cheap endpoint. It reports login throughput together with
+the probe latency before and during the burst. With bcrypt on the request
+threadpool the probe latency climbs with the burst. With the password
+process pool it should stay close to the idle baseline.
+
+    python benchmarks/login_throughput.py --base-url http://localhost:8000/api \\
+        --logins 200 --concurrency 50
+"""
+
+import argparse
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import summarize
+
+
+def probe(base_url, path, stop, samples):
+    session = requests.Session()
+    while not stop.is_set():
+        started = time.perf_counter()
+        session.get(f"{base_url}{path}")
+        samples.append(time.perf_counter() - started)
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000/api")
+    parser.add_argument("--email", help="existing citizen account; a throwaway one is registered if omitted")
+    parser.add_argument("--password", default="benchmark-password")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-path", default="/")
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    email = args.email
+    if not email:
+        email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+        response = requests.post(
+            f"{args.base_url}/auth/register",
+            json={"email": email, "password": args.password, "full_name": "Benchmark User"},
+        )
+        response.raise_for_status()
+
+    print(f"🔍 Measuring idle probe latency for {args.baseline_seconds:.0f}s...")
+    baseline = []
+    stop = threading.Event()
+    thread = threading.Thread(target=probe, args=(args.base_url, args.probe_path, stop, baseline))
+    thread.start()
+    time.sleep(args.baseline_seconds)
+    stop.set()
+    thread.join()
+
+    print(f"🔥 Running {args.logins} logins with concurrency {args.concurrency}...")
+    during = []
+    stop = threading.Event()
+    thread = threading.Thread(target=probe, args=(args.base_url, args.probe_path, stop, during))
+    thread.start()
+
+    def login(_):
+        started = time.perf_counter()
+        response = requests.post(
+            f"{args.base_url}/auth/login",
+            json={"email": email, "password": args.password},
+        )
+        return response.status_code, time.perf_counter() - started
+
+    burst_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(login, range(args.logins)))
+    burst_seconds = time.perf_counter() - burst_started
+    stop.set()
+    thread.join()
+
+    ok = [elapsed for code, elapsed in results if code == 200]
+    errors = {}
+    for code, _ in results:
+        if code != 200:
+            errors[code] = errors.get(code, 0) + 1
+
+    print(f"\n📊 Results")
+    print(f"   logins: {len(ok)}/{len(results)} ok in {burst_seconds:.2f}s ({len(ok) / burst_seconds:.1f}/s)")
+    if errors:
+        print(f"   errors by status: {errors}")
+    summarize("login latency", ok)
+    summarize(f"probe {args.probe_path} idle", baseline)
+    summarize(f"probe {args.probe_path} during burst", during)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Complaint text search latency benchmark.
+
+With ``--backend memory`` (the default), seeds ``--complaints`` synthetic
+complaints into an in-process MemoryStorage and times
+ComplaintRepository.search for a mix of rare, common, filtered and negated
+queries:
+
+    python benchmarks/search.py --complaints 1000000 --iterations 50
+
+With ``--backend mongo``, runs the same queries against the complaints
+already in MONGO_URL/DB_NAME, which need the text index from
+storage/indexes.py (manage_indexes.py --apply).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common import summarize  # noqa: E402
+from storage import ComplaintQuery, create_storage  # noqa: E402
+
+CATEGORIES = ["Roads", "Electricity", "Water", "Sanitation", "Drainage"]
+WORDS = {
+    "Roads": "pothole road crack asphalt speed breaker footpath traffic signal".split(),
+    "Electricity": "streetlight pole wire transformer outage flicker light".split(),
+    "Water": "pipe leak supply tanker contaminated pressure tap".split(),
+    "Sanitation": "garbage bin overflowing dump stray waste collection".split(),
+    "Drainage": "drain blocked sewage overflow manhole flooding stagnant".split(),
+}
+AREAS = ["Market Road", "Temple Street", "Canal Road", "Station Road", "Gandhi Nagar", "North Zone", "South Zone"]
+
+QUERIES = [
+    ("rare", "transformer", ComplaintQuery()),
+    ("common", "road", ComplaintQuery()),
+    ("two terms", "garbage overflowing", ComplaintQuery()),
+    ("filtered", "leak", ComplaintQuery(status="PENDING", category="Water")),
+    ("negated", "drain -sewage", ComplaintQuery()),
+]
+
+
+def make_complaint(i, now):
+    category = random.choice(CATEGORIES)
+    words = WORDS[category]
+    area = random.choice(AREAS)
+    return {
+        "id": str(uuid.uuid4()),
+        "public_id": f"CMP{i:09d}",
+        "title": " ".join(random.sample(words, 2)).capitalize(),
+        "description": " ".join(random.choices(words, k=12)) + f" near {area}",
+        "category": category,
+        "priority": "medium",
+        "status": random.choice(["PENDING", "IN_PROGRESS", "RESOLVED"]),
+        "address": f"{random.randint(1, 200)} {area}, Bhimavaram",
+        "pincode": f"5341{random.randint(0, 99):02d}",
+        "user_id": str(uuid.uuid4()),
+        "user_name": "Benchmark User",
+        "user_email": "bench@example.com",
+        "created_at": now - timedelta(minutes=i),
+        "updated_at": now - timedelta(minutes=i),
+    }
+
+
+async def run(args):
+    if args.backend == "memory":
+        storage = create_storage("memory")
+        now = datetime.utcnow()
+        started = time.perf_counter()
+        for i in range(args.complaints):
+            await storage.complaints.insert(make_complaint(i, now))
+        print(f"📦 Seeded {args.complaints} complaints in {time.perf_counter() - started:.1f}s")
+    else:
+        storage = create_storage("mongo", mongo_url=os.getenv("MONGO_URL"), db_name=os.getenv("DB_NAME"))
+
+    print(f"🚀 {args.iterations} iterations per query, limit={args.limit}")
+    for label, text, query in QUERIES:
+        samples = []
+        for _ in range(args.iterations):
+            began = time.perf_counter()
+            await storage.complaints.search(text, query, limit=args.limit, projection={"id": 1, "title": 1})
+            samples.append(time.perf_counter() - began)
+        summarize(f"{label} ({text!r})", samples)
+    storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--complaints", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
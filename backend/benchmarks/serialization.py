@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+List-response serialization benchmark.
+
+Times the CPU cost of turning ``--rows`` stored complaint documents into a
+response body, two ways:
+
+- pydantic: what the list routes used to do. Build Complaint objects,
+  validate them against response_model=List[Complaint], run
+  jsonable_encoder and encode with the stdlib json module.
+- fast: what they do now. shaper(Complaint) on the raw documents, then
+  OrjsonResponse.
+
+Runs in-process with no server or database:
+
+    python benchmarks/serialization.py --rows 1000 --iterations 200
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from common import summarize  # noqa: E402
+from serialization import OrjsonResponse, shaper  # noqa: E402
+from server import Complaint  # noqa: E402
+
+
+def make_docs(count):
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "public_id": f"CMP{i:08d}",
+            "title": f"Streetlight not working #{i}",
+            "description": "The streetlight at the corner has been off for a week. " * 3,
+            "category": "Electricity",
+            "priority": "Medium",
+            "status": "Pending",
+            "pincode": "534101",
+            "address": f"{i} Main Road, North Zone",
+            "latitude": 16.54 + i * 1e-5,
+            "longitude": 81.52 + i * 1e-5,
+            "user_id": str(uuid.uuid4()),
+            "user_name": "Benchmark User",
+            "user_email": "bench@example.com",
+            "assigned_to": None,
+            "admin_comments": None,
+            "work_note_count": i % 4,
+            "image_url": None,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    docs = make_docs(args.rows)
+    field = create_response_field(name="Response_List_Complaint", type_=List[Complaint])
+    shape = shaper(Complaint)
+    plain = JSONResponse(None)
+    fast = OrjsonResponse(None)
+
+    async def pydantic_path():
+        content = await serialize_response(field=field, response_content=[Complaint(**doc) for doc in docs], is_coroutine=True)
+        return plain.render(content)
+
+    def fast_path():
+        return fast.render([shape(doc) for doc in docs])
+
+    print(f"🚀 Serializing {args.rows} complaints, {args.iterations} iterations")
+    loop = asyncio.new_event_loop()
+    timings = {"pydantic": [], "fast": []}
+    sizes = {}
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        sizes["pydantic"] = len(loop.run_until_complete(pydantic_path()))
+        timings["pydantic"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        sizes["fast"] = len(fast_path())
+        timings["fast"].append(time.perf_counter() - start)
+    loop.close()
+
+    for label, samples in timings.items():
+        summarize(f"{label} ({sizes[label]} bytes)", samples)
+    speedup = sum(timings["pydantic"]) / sum(timings["fast"])
+    print(f"✅ fast path is {speedup:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
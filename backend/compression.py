@@ -0,0 +1,282 @@
+"""
+Negotiated response compression.
+
+CompressionMiddleware compresses response bodies with brotli or gzip,
+whichever the client ranks higher in Accept-Encoding (brotli on a tie).
+These responses are passed through untouched:
+
+- bodies under ``minimum_size``, where the saving doesn't pay for the work
+- responses that already have a Content-Encoding, such as the gzip export
+- media types that are already compressed, such as uploaded photos
+- 204 and 304 responses
+
+Streaming responses (the NDJSON/CSV export) are compressed as they stream.
+
+A response that shared caches may store (a Cache-Control without private or
+no-store, as on the public dashboard and map) keeps its compressed body in
+a small LRU keyed by a digest of the original. The next identical response
+is sent without compressing it again.
+
+brotli is optional. Without it, only gzip is offered.
+"""
+
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is an optional speed-up
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+}
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding for an Accept-Encoding header, or None for identity"""
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+
+def shared_cacheable(cache_control: str) -> bool:
+    directives = cache_control.lower()
+    return bool(directives) and "private" not in directives and "no-store" not in directives
+
+
+class CompressionStats:
+    """Per-route byte counters; bytesSaved is what compression kept off the wire"""
+
+    def __init__(self):
+        self._routes = defaultdict(lambda: {"responses": 0, "bytesIn": 0, "bytesOut": 0, "cacheHits": 0, "seconds": 0.0})
+        self._encodings = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, route: str, encoding: str, bytes_in: int, bytes_out: int, seconds: float = 0.0, cache_hit: bool = False) -> None:
+        with self._lock:
+            entry = self._routes[route]
+            entry["responses"] += 1
+            entry["bytesIn"] += bytes_in
+            entry["bytesOut"] += bytes_out
+            entry["seconds"] += seconds
+            entry["cacheHits"] += int(cache_hit)
+            self._encodings[encoding] += 1
+
+    def add_bytes(self, route: str, bytes_in: int, bytes_out: int, seconds: float) -> None:
+        """Account for a further chunk of a streamed response"""
+        with self._lock:
+            entry = self._routes[route]
+            entry["bytesIn"] += bytes_in
+            entry["bytesOut"] += bytes_out
+            entry["seconds"] += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            routes = {
+                route: {
+                    "responses": entry["responses"],
+                    "bytesIn": entry["bytesIn"],
+                    "bytesOut": entry["bytesOut"],
+                    "bytesSaved": entry["bytesIn"] - entry["bytesOut"],
+                    "ratio": round(entry["bytesOut"] / entry["bytesIn"], 4) if entry["bytesIn"] else 0.0,
+                    "cacheHits": entry["cacheHits"],
+                    "compressMs": round(entry["seconds"] * 1000, 1),
+                }
+                for route, entry in self._routes.items()
+            }
+            return {
+                "encodings": dict(self._encodings),
+                "bytesSaved": sum(route["bytesSaved"] for route in routes.values()),
+                "routes": routes,
+            }
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache_entries: int = 32,
+        cache_max_bytes: int = 1024 * 1024,
+        stats: Optional[CompressionStats] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_entries = cache_entries
+        self.cache_max_bytes = cache_max_bytes
+        self.stats = stats or CompressionStats()
+        self._cache = OrderedDict()  # (digest, encoding) -> compressed body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(self, scope, encoding, send).send)
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return brotli.Compressor(quality=self.brotli_quality)
+        return zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        compressor = self.compressor(encoding)
+        return compressor.compress(body) + compressor.flush()
+
+    def compress_cached(self, body: bytes, encoding: str):
+        """Compressed body and whether it came from the LRU"""
+        if len(body) > self.cache_max_bytes:
+            return self.compress(body, encoding), False
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached, True
+        compressed = self.compress(body, encoding)
+        self._cache[key] = compressed
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+        return compressed, False
+
+
+class _Responder:
+    """Holds back http.response.start until the first body chunk decides whether to compress"""
+
+    def __init__(self, middleware: CompressionMiddleware, scope, encoding: str, send):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self._send = send
+        self.start = None
+        self.mode = None  # "identity", "whole" or "stream" once decided
+        self.compressor = None
+
+    @property
+    def route(self) -> str:
+        # FastAPI records the matched route in the scope once routing is done
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        return (
+            self.start["status"] not in (204, 304)
+            and "content-encoding" not in headers
+            and compressible(headers.get("content-type", ""))
+        )
+
+    def _set_encoding_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # A strong ETag promises identical bytes; the compressed variant no longer matches the original
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def send(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if self.mode is None:
+            if message["type"] != "http.response.body":
+                self.mode = "identity"
+            else:
+                await self._first_body(message)
+                return
+        if self.mode == "identity":
+            if self.start is not None:
+                await self._send(self.start)
+                self.start = None
+            await self._send(message)
+            return
+        await self._stream_body(message)
+
+    async def _first_body(self, message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=self.start["headers"])
+        if not self._eligible(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+            self.mode = "identity"
+            await self._send(self.start)
+            self.start = None
+            await self._send(message)
+            return
+
+        self._set_encoding_headers(headers)
+        if not more_body:
+            self.mode = "whole"
+            began = time.perf_counter()
+            if shared_cacheable(headers.get("cache-control", "")):
+                compressed, cache_hit = self.middleware.compress_cached(body, self.encoding)
+            else:
+                compressed, cache_hit = self.middleware.compress(body, self.encoding), False
+            self.middleware.stats.record(self.route, self.encoding, len(body), len(compressed), time.perf_counter() - began, cache_hit)
+            headers["Content-Length"] = str(len(compressed))
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": compressed})
+            return
+
+        self.mode = "stream"
+        self.compressor = self.middleware.compressor(self.encoding)
+        del headers["Content-Length"]
+        self.middleware.stats.record(self.route, self.encoding, 0, 0)
+        await self._send(self.start)
+        await self._stream_body(message)
+
+    async def _stream_body(self, message) -> None:
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        began = time.perf_counter()
+        if self.encoding == "br":
+            data = self.compressor.process(body) if body else b""
+            if not more_body:
+                data += self.compressor.finish()
+        else:
+            data = self.compressor.compress(body)
+            if not more_body:
+                data += self.compressor.flush()
+        self.middleware.stats.add_bytes(self.route, len(body), len(data), time.perf_counter() - began)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
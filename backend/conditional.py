@@ -0,0 +1,72 @@
+"""
+Conditional GET support for polled endpoints.
+
+Handlers first compute a cheap version of what they would return: a
+complaint's updated_at, or the count and newest updated_at of a listing
+(ComplaintRepository.version). If the client's If-None-Match or
+If-Modified-Since already matches it, they answer 304 Not Modified without
+running the real query or serializing a body. Otherwise the full response
+carries the ETag and Last-Modified for the next poll.
+
+Listings only use the ETag. A complaint leaving a listing (its status moves
+away from the filter, or it is reassigned) changes the count but not the
+newest updated_at of the rows that remain. A Last-Modified date alone would
+then answer 304 and the client would keep showing the removed row. Listing
+handlers therefore pass no last_modified to validator_headers or is_fresh.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping, Optional
+
+from fastapi import Response
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag over everything the representation depends on"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def _utc(value: datetime) -> datetime:
+    # Stored timestamps are naive UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime], private: bool = False) -> dict:
+    headers = {
+        "ETag": etag,
+        # Clients may keep the body but must revalidate before reusing it
+        "Cache-Control": "private, no-cache" if private else "no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(last_modified), usegmt=True)
+    return headers
+
+
+def is_fresh(request_headers: Mapping[str, str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Whether the client's cached copy is current. If-None-Match wins when
+    present; If-Modified-Since is compared at the one-second resolution of
+    HTTP dates, and ignored when last_modified is None (listings).
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses the weak comparison, so W/"x" matches "x"
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since is None:
+            return False
+        return _utc(last_modified).replace(microsecond=0) <= _utc(since)
+    return False
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,77 @@
+"""
+Near-duplicate detection for new complaints.
+
+A new complaint is a probable duplicate of an open complaint when:
+- it was filed within DUPLICATE_WINDOW_DAYS,
+- it is within DUPLICATE_RADIUS_M of the new one (or has the same pincode
+  when the new complaint has no location), and
+- its title and description are textually close: exact shingle Jaccard
+  similarity of at least DUPLICATE_MIN_SIMILARITY.
+
+Candidates come from one indexed query: the MinHash LSH bands (see
+storage/minhash.py) combined with the spatial filter, so the cost does not
+grow with the number of complaints. The duplicate is still stored, but is
+linked to the original through ``duplicate_of``. find_duplicates.py
+applies the same rules to the existing backlog.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+
+from storage import ComplaintQuery
+from storage.minhash import band_keys, shingles, similarity
+
+DUPLICATE_RADIUS_M = float(os.getenv("DUPLICATE_RADIUS_M", "150"))
+DUPLICATE_WINDOW_DAYS = int(os.getenv("DUPLICATE_WINDOW_DAYS", "30"))
+DUPLICATE_MIN_SIMILARITY = float(os.getenv("DUPLICATE_MIN_SIMILARITY", "0.5"))
+# Candidates sharing a band are checked exactly; this caps the work per submission
+DUPLICATE_CANDIDATES = 50
+CLOSED_STATUSES = ("RESOLVED",)
+
+CANDIDATE_PROJECTION = {"id": 1, "title": 1, "description": 1, "status": 1, "duplicate_of": 1}
+
+
+def candidate_query(complaint: dict, bands: list, now: Optional[datetime] = None) -> Optional[ComplaintQuery]:
+    """Where to look for duplicates of a complaint; None when it has no text or place to compare"""
+    if not bands:
+        return None
+    since = (now or datetime.utcnow()) - timedelta(days=DUPLICATE_WINDOW_DAYS)
+    latitude, longitude = complaint.get("latitude"), complaint.get("longitude")
+    if latitude is not None and longitude is not None:
+        return ComplaintQuery(dup_bands=bands, near=(longitude, latitude), radius_m=DUPLICATE_RADIUS_M, created_from=since)
+    if complaint.get("pincode"):
+        return ComplaintQuery(dup_bands=bands, pincode=complaint["pincode"], created_from=since)
+    return None
+
+
+def best_match(text: set, candidates: Iterable[dict]) -> Optional[Tuple[dict, float]]:
+    """The open candidate most similar to ``text``, if any clears DUPLICATE_MIN_SIMILARITY"""
+    best, best_score = None, DUPLICATE_MIN_SIMILARITY
+    for candidate in candidates:
+        if candidate.get("status") in CLOSED_STATUSES:
+            continue
+        score = similarity(text, shingles(candidate.get("title"), candidate.get("description")))
+        if score >= best_score:
+            best, best_score = candidate, score
+    return (best, best_score) if best is not None else None
+
+
+async def find_duplicate(storage, complaint: dict) -> Optional[Tuple[str, float]]:
+    """
+    Id of the complaint a new one duplicates, and their similarity. Links
+    point at the first report while it is still open nearby, so duplicates
+    of a duplicate join its original.
+    """
+    text = shingles(complaint.get("title"), complaint.get("description"))
+    query = candidate_query(complaint, band_keys(text))
+    if query is None:
+        return None
+    candidates = await storage.complaints.find(query, limit=DUPLICATE_CANDIDATES, projection=CANDIDATE_PROJECTION)
+    match = best_match(text, candidates)
+    if match is None:
+        return None
+    matched, score = match
+    open_ids = {candidate["id"] for candidate in candidates if candidate.get("status") not in CLOSED_STATUSES}
+    original = matched.get("duplicate_of")
+    return (original if original in open_ids else matched["id"]), round(score, 3)
@@ -0,0 +1,96 @@
+"""
+Streaming encoders for the admin complaint export.
+
+Each encoder takes an async iterator of complaint documents and yields
+byte chunks. Rows are buffered into chunks of roughly CHUNK_BYTES, so an
+export of any size runs in constant memory. It also avoids a socket write
+per row.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator
+
+CHUNK_BYTES = 64 * 1024
+
+# Column order for CSV, and the projection used for both formats
+EXPORT_FIELDS = [
+    "id",
+    "public_id",
+    "title",
+    "description",
+    "category",
+    "priority",
+    "status",
+    "pincode",
+    "address",
+    "latitude",
+    "longitude",
+    "user_id",
+    "user_name",
+    "user_email",
+    "assigned_to",
+    "admin_comments",
+    "work_note_count",
+    "image_url",
+    "created_at",
+    "updated_at",
+]
+
+EXPORT_PROJECTION = {"_id": 0, **{field: 1 for field in EXPORT_FIELDS}}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def ndjson_chunks(docs: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    buffer = []
+    size = 0
+    async for doc in docs:
+        line = json.dumps({field: _plain(doc.get(field)) for field in EXPORT_FIELDS}, ensure_ascii=False) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+async def csv_chunks(docs: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_FIELDS)
+    async for doc in docs:
+        writer.writerow(["" if doc.get(field) is None else _plain(doc.get(field)) for field in EXPORT_FIELDS])
+        if out.tell() >= CHUNK_BYTES:
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a chunk stream into one gzip member"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+ENCODERS = {
+    "ndjson": ndjson_chunks,
+    "csv": csv_chunks,
+}
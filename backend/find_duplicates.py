@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Batch near-duplicate detection over the existing complaint backlog.
+
+Applies the submission-time rules from duplicates.py to every open complaint
+not yet linked to another. It first backfills the LSH band keys
+(``dup_bands``) on complaints written before they existed, or recomputes
+them where ``dup_version`` shows older hash functions. Pairs are only
+compared when they share a band, so the work grows with the size of the
+buckets, not with the square of the backlog. Matches are grouped with
+union-find, so a cluster's complaints need not all match each other directly.
+
+By default the clusters are only reported. With --apply, every complaint in
+a cluster is linked to the earliest one through duplicate_of, and that
+complaint's duplicate_count is increased to match.
+"""
+
+import os
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+from duplicates import CLOSED_STATUSES, DUPLICATE_MIN_SIMILARITY, DUPLICATE_RADIUS_M, DUPLICATE_WINDOW_DAYS
+from storage.geo import distance_m
+from storage.minhash import VERSION, duplicate_fields, shingles, similarity
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+client = MongoClient(os.environ['MONGO_URL'])
+db = client[os.environ['DB_NAME']]
+
+BATCH_SIZE = 1000
+# Buckets larger than this hold boilerplate text shared by unrelated complaints; skip them
+MAX_BUCKET = 200
+
+
+def backfill_bands():
+    # Missing, or computed by older hash functions that no longer match new complaints' keys
+    pending = {"dup_version": {"$ne": VERSION}}
+    total = db.complaints.count_documents(pending)
+    print(f"📊 Found {total} complaints without current LSH bands")
+    ops = []
+    for complaint in db.complaints.find(pending, {"title": 1, "description": 1}):
+        ops.append(UpdateOne(
+            {"_id": complaint["_id"]},
+            {"$set": duplicate_fields(complaint.get("title"), complaint.get("description"))},
+        ))
+        if len(ops) >= BATCH_SIZE:
+            db.complaints.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        db.complaints.bulk_write(ops, ordered=False)
+
+
+def near(a: dict, b: dict) -> bool:
+    if abs(a["created_at"] - b["created_at"]).days >= DUPLICATE_WINDOW_DAYS:
+        return False
+    if a.get("geo") and b.get("geo"):
+        return distance_m(a["geo"], b["geo"]["coordinates"]) <= DUPLICATE_RADIUS_M
+    return bool(a.get("pincode")) and a.get("pincode") == b.get("pincode")
+
+
+def find_duplicates(apply: bool = False):
+    """Cluster open, unlinked complaints and optionally link each cluster to its first report"""
+    print("🔄 Looking for duplicate complaints...")
+    backfill_bands()
+
+    complaints = list(db.complaints.find(
+        {"status": {"$nin": list(CLOSED_STATUSES)}, "duplicate_of": None},
+        {"_id": 0, "id": 1, "title": 1, "description": 1, "created_at": 1, "geo": 1, "pincode": 1, "dup_bands": 1},
+    ))
+    print(f"📊 Checking {len(complaints)} open complaints")
+
+    buckets = defaultdict(list)
+    for index, complaint in enumerate(complaints):
+        for band in complaint.get("dup_bands") or ():
+            buckets[band].append(index)
+
+    parent = list(range(len(complaints)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    texts = {}
+    compared = set()
+    for members in buckets.values():
+        if len(members) < 2 or len(members) > MAX_BUCKET:
+            continue
+        for position, i in enumerate(members):
+            for j in members[position + 1:]:
+                if (i, j) in compared or root(i) == root(j):
+                    continue
+                compared.add((i, j))
+                a, b = complaints[i], complaints[j]
+                if not near(a, b):
+                    continue
+                for k in (i, j):
+                    if k not in texts:
+                        texts[k] = shingles(complaints[k].get("title"), complaints[k].get("description"))
+                if similarity(texts[i], texts[j]) >= DUPLICATE_MIN_SIMILARITY:
+                    parent[root(j)] = root(i)
+
+    clusters = defaultdict(list)
+    for index in range(len(complaints)):
+        clusters[root(index)].append(complaints[index])
+    clusters = [sorted(members, key=lambda c: c["created_at"]) for members in clusters.values() if len(members) > 1]
+    linked = sum(len(members) - 1 for members in clusters)
+    print(f"🔍 {len(clusters)} clusters, {linked} probable duplicates ({len(compared)} pairs compared)")
+    for members in sorted(clusters, key=len, reverse=True)[:10]:
+        print(f"   {len(members)} x {members[0].get('title')!r} ({members[0]['id']})")
+
+    if not apply:
+        print("ℹ️ Dry run; pass --apply to link duplicates to the first report in each cluster")
+        return
+
+    ops = []
+    for members in clusters:
+        original, duplicates = members[0], members[1:]
+        ops.append(UpdateOne({"id": original["id"]}, {"$inc": {"duplicate_count": len(duplicates)}}))
+        for duplicate in duplicates:
+            ops.append(UpdateOne({"id": duplicate["id"], "duplicate_of": None}, {"$set": {"duplicate_of": original["id"]}}))
+    for start in range(0, len(ops), BATCH_SIZE):
+        db.complaints.bulk_write(ops[start:start + BATCH_SIZE], ordered=False)
+    print(f"🎉 Linked {linked} complaints to {len(clusters)} originals")
+
+
+if __name__ == "__main__":
+    find_duplicates(apply="--apply" in sys.argv[1:])
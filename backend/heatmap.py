@@ -0,0 +1,227 @@
+"""
+In-process density grids behind the public heatmap.
+
+Complaint coordinates are binned into square grids over the area the
+complaints actually cover (the extent), with one grid per (category,
+status) pair. Grids are kept at several resolutions (RESOLUTIONS cells per
+side), so any combination of filters and zoom is answered by summing a few
+arrays instead of scanning complaints.
+
+A full rebuild streams every located complaint and bins them with NumPy
+(bincount over flattened cell indexes) in a worker thread. The server runs
+one at startup and then periodically. Between rebuilds, create_complaint and
+status changes adjust single cells. A point outside the extent, or a bulk
+change the caller can't describe, marks the grids stale and brings the next
+rebuild forward. Each worker process keeps its own grids, so writes made
+through other workers, or during a rebuild, show up after the next one.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from storage import ComplaintQuery
+
+logger = logging.getLogger(__name__)
+
+# Cells per side, finest first; each level halves the one before
+RESOLUTIONS = (256, 128, 64, 32)
+PADDING = 0.01  # fraction of the extent added on every side
+MIN_SPAN = 0.01  # degrees, so a single point still gets a usable extent
+
+Key = Tuple[str, str]  # (category, status)
+Extent = Tuple[float, float, float, float]  # (west, south, east, north)
+
+
+def _empty_levels(keys: int = 0) -> List[np.ndarray]:
+    return [np.zeros((keys, size, size), dtype=np.int32) for size in RESOLUTIONS]
+
+
+def _extent(longitudes: np.ndarray, latitudes: np.ndarray) -> Extent:
+    west, east = float(longitudes.min()), float(longitudes.max())
+    south, north = float(latitudes.min()), float(latitudes.max())
+    pad_x = max(east - west, MIN_SPAN) * PADDING + MIN_SPAN / 2
+    pad_y = max(north - south, MIN_SPAN) * PADDING + MIN_SPAN / 2
+    return west - pad_x, south - pad_y, east + pad_x, north + pad_y
+
+
+def _cells(extent: Extent, longitudes: np.ndarray, latitudes: np.ndarray) -> np.ndarray:
+    """Row-major cell index at the finest resolution (row 0 is the southern edge); -1 outside the extent"""
+    west, south, east, north = extent
+    size = RESOLUTIONS[0]
+    columns = np.floor((longitudes - west) / (east - west) * size).astype(np.int64)
+    rows = np.floor((latitudes - south) / (north - south) * size).astype(np.int64)
+    inside = (columns >= 0) & (columns < size) & (rows >= 0) & (rows < size)
+    return np.where(inside, rows * size + columns, -1)
+
+
+def _pyramid(finest: np.ndarray) -> List[np.ndarray]:
+    """Every resolution from the finest (keys, size, size) grids by summing 2x2 blocks"""
+    levels = [finest]
+    for size in RESOLUTIONS[1:]:
+        previous = levels[-1]
+        levels.append(previous.reshape(previous.shape[0], size, 2, size, 2).sum(axis=(2, 4)))
+    return levels
+
+
+class HeatmapGrids:
+    """Multi-resolution (category, status) count grids with incremental updates."""
+
+    def __init__(self):
+        self.extent: Optional[Extent] = None
+        self.keys: Dict[Key, int] = {}
+        self.levels: List[np.ndarray] = _empty_levels()
+        self.built_at: Optional[float] = None
+        self.build_seconds = 0.0
+        self.rebuilds = 0
+        self.updates = 0
+        self.outside = 0  # incremental points that fell outside the extent since the last rebuild
+        self.stale = asyncio.Event()
+
+    # Rebuild
+
+    @staticmethod
+    def bin(points: Iterable[dict]) -> Tuple[Optional[Extent], Dict[Key, int], List[np.ndarray]]:
+        """Extent, key index and grids for complaint dicts with latitude, longitude, category and status"""
+        rows = [
+            (doc["longitude"], doc["latitude"], doc.get("category") or "", doc.get("status") or "")
+            for doc in points
+            if isinstance(doc.get("latitude"), (int, float)) and isinstance(doc.get("longitude"), (int, float))
+        ]
+        size = RESOLUTIONS[0]
+        if not rows:
+            return None, {}, _empty_levels()
+        longitudes = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+        latitudes = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+        valid = np.isfinite(longitudes) & np.isfinite(latitudes)
+        pairs = np.array([f"{row[2]}\x00{row[3]}" for row in rows], dtype=object)
+        longitudes, latitudes, pairs = longitudes[valid], latitudes[valid], pairs[valid]
+        if not len(pairs):
+            return None, {}, _empty_levels()
+
+        extent = _extent(longitudes, latitudes)
+        names, key_index = np.unique(pairs, return_inverse=True)
+        flat = key_index * size * size + _cells(extent, longitudes, latitudes)
+        counts = np.bincount(flat, minlength=len(names) * size * size).astype(np.int32)
+        finest = counts.reshape(len(names), size, size)
+        keys = {tuple(name.split("\x00", 1)): i for i, name in enumerate(names)}
+        return extent, keys, _pyramid(finest)
+
+    async def rebuild(self, storage) -> None:
+        """Recount every located complaint and swap the new grids in"""
+        started = time.perf_counter()
+        self.stale.clear()
+        projection = {"latitude": 1, "longitude": 1, "category": 1, "status": 1}
+        points = [doc async for doc in storage.complaints.stream(ComplaintQuery(has_location=True), projection, batch_size=5000)]
+        extent, keys, levels = await asyncio.to_thread(self.bin, points)
+        self.extent, self.keys, self.levels = extent, keys, levels
+        self.outside = 0
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+        self.rebuilds += 1
+        logger.info("Heatmap rebuilt", extra={"points": len(points), "keys": len(keys), "seconds": round(self.build_seconds, 3)})
+
+    async def run(self, storage, interval: float) -> None:
+        """Rebuild now, then every ``interval`` seconds or as soon as the grids go stale"""
+        while True:
+            try:
+                await self.rebuild(storage)
+            except Exception:
+                logger.exception("Heatmap rebuild failed")
+            try:
+                await asyncio.wait_for(self.stale.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    # Incremental updates
+
+    def _cell(self, complaint: dict) -> Optional[int]:
+        latitude, longitude = complaint.get("latitude"), complaint.get("longitude")
+        if not isinstance(latitude, (int, float)) or not isinstance(longitude, (int, float)):
+            return None
+        if self.extent is None:
+            self.mark_stale()
+            return None
+        cell = int(_cells(self.extent, np.array([longitude], dtype=np.float64), np.array([latitude], dtype=np.float64))[0])
+        if cell < 0:
+            self.outside += 1
+            self.mark_stale()
+            return None
+        return cell
+
+    def _key(self, category, status) -> int:
+        key = (category or "", status or "")
+        if key not in self.keys:
+            self.keys[key] = len(self.keys)
+            self.levels = [np.concatenate([grid, empty]) for grid, empty in zip(self.levels, _empty_levels(1))]
+        return self.keys[key]
+
+    def _add(self, key: int, cell: int, amount: int) -> None:
+        row, column = divmod(cell, RESOLUTIONS[0])
+        for level, grid in enumerate(self.levels):
+            grid[key, row >> level, column >> level] += amount
+        self.updates += 1
+
+    def add(self, complaint: dict) -> None:
+        """Count a newly created complaint"""
+        cell = self._cell(complaint)
+        if cell is not None:
+            self._add(self._key(complaint.get("category"), complaint.get("status")), cell, 1)
+
+    def move(self, complaint: dict, old_status) -> None:
+        """Move a complaint (as it is now) out of its previous status"""
+        if old_status == complaint.get("status"):
+            return
+        cell = self._cell(complaint)
+        if cell is None:
+            return
+        old = self.keys.get((complaint.get("category") or "", old_status or ""))
+        if old is None or self.levels[0][old].flat[cell] <= 0:
+            self.mark_stale()  # not counted where we expected it; let a rebuild sort it out
+            return
+        self._add(old, cell, -1)
+        self._add(self._key(complaint.get("category"), complaint.get("status")), cell, 1)
+
+    def mark_stale(self) -> None:
+        self.stale.set()
+
+    # Reads
+
+    def grid(self, resolution: int, categories: Optional[List[str]] = None, statuses: Optional[List[str]] = None) -> np.ndarray:
+        """(resolution, resolution) counts summed over the matching keys"""
+        level = RESOLUTIONS.index(resolution)
+        selected = [
+            index for (category, status), index in self.keys.items()
+            if (not categories or category in categories) and (not statuses or status in statuses)
+        ]
+        if not selected:
+            return np.zeros((resolution, resolution), dtype=np.int32)
+        return self.levels[level][selected].sum(axis=0)
+
+    def stats(self) -> dict:
+        return {
+            "builtAt": self.built_at,
+            "buildSeconds": round(self.build_seconds, 3),
+            "rebuilds": self.rebuilds,
+            "updates": self.updates,
+            "outside": self.outside,
+            "stale": self.stale.is_set(),
+            "keys": len(self.keys),
+            "bytes": sum(grid.nbytes for grid in self.levels),
+        }
+
+
+def sparse(grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-major indexes and counts of a grid's non-empty cells"""
+    flat = grid.ravel()
+    indexes = np.flatnonzero(flat)
+    return indexes.astype(np.uint32), flat[indexes].astype(np.uint32)
+
+
+def encode_binary(grid: np.ndarray) -> bytes:
+    """Non-empty cells as little-endian uint32 (index, count) pairs"""
+    indexes, counts = sparse(grid)
+    return np.column_stack([indexes, counts]).astype("<u4").tobytes()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Report or fix drift between the declared MongoDB indexes and the database.
+
+    python manage_indexes.py                    # report drift only
+    python manage_indexes.py --apply            # build missing indexes
+    python manage_indexes.py --apply --rebuild  # also rebuild mismatched ones
+
+Exits non-zero while anything declared is missing, mismatched or failed to build.
+"""
+
+import argparse
+import asyncio
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from storage import MongoStorage
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+
+async def run(apply: bool, rebuild: bool):
+    storage = MongoStorage(os.environ['MONGO_URL'], os.environ['DB_NAME'])
+    try:
+        if apply:
+            return await storage.ensure_indexes(rebuild=rebuild)
+        return await storage.check_indexes()
+    finally:
+        storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apply", action="store_true", help="build missing indexes")
+    parser.add_argument("--rebuild", action="store_true", help="with --apply, drop and rebuild mismatched indexes")
+    args = parser.parse_args()
+
+    print("🔍 Comparing declared indexes with the database...")
+    report = asyncio.run(run(args.apply, args.rebuild))
+
+    for spec in report.created:
+        print(f"✅ Built {spec.collection}.{spec.name}")
+    for spec in report.missing:
+        print(f"⚠️ Missing {spec.collection}.{spec.name}")
+    for spec in report.mismatched:
+        print(f"⚠️ Mismatched {spec.collection}.{spec.name} (expected {spec.options})")
+    for spec, error in report.failed:
+        print(f"❌ Failed {spec.collection}.{spec.name}: {error}")
+    for collection, name in report.extra:
+        print(f"ℹ️ Undeclared {collection}.{name}")
+    if report.in_sync:
+        print("🎉 Indexes match the declared set")
+    raise SystemExit(0 if report.in_sync else 1)
+
+
+if __name__ == "__main__":
+    main()
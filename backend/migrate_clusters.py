@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Migration script to (re)build the map's cluster grid (see storage/clusters.py)
+from the complaints' GeoJSON points.
+
+The API keeps the grid up to date as complaints are created and change
+status. Run this once after migrate_geo.py to count complaints created
+before the grid existed, or again if the grid has drifted. The new grid is
+built in a side collection and swapped in with a rename, so the map never
+reads a half-built grid. Writes made while the script runs are lost from the
+grid, so run it at a quiet time.
+"""
+
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, InsertOne, MongoClient
+
+from storage import clusters
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+client = MongoClient(os.environ['MONGO_URL'])
+db = client[os.environ['DB_NAME']]
+
+BATCH_SIZE = 1000
+STAGING = "complaint_clusters_rebuild"
+
+
+def migrate_clusters():
+    """Recount every complaint with a point into a fresh grid"""
+    print("🔄 Rebuilding the map cluster grid...")
+
+    with_point = {"geo": {"$ne": None}}
+    total = db.complaints.count_documents(with_point)
+    print(f"📊 Found {total} complaints with a location")
+
+    increments = {}
+    for complaint in db.complaints.find(with_point, {"_id": 0, "geo": 1, "status": 1}):
+        clusters.merge(increments, clusters.point_increments(complaint["geo"], complaint.get("status")))
+
+    db.drop_collection(STAGING)
+    staging = db[STAGING]
+    ops = []
+    for cell, increment in increments.items():
+        doc = clusters.new_cell(cell)
+        clusters.apply(doc, increment)
+        ops.append(InsertOne(doc))
+        if len(ops) >= BATCH_SIZE:
+            staging.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        staging.bulk_write(ops, ordered=False)
+    # Also creates the collection when there is nothing to count, so the rename always works
+    staging.create_index([("z", ASCENDING), ("x", ASCENDING), ("y", ASCENDING)])
+    staging.rename("complaint_clusters", dropTarget=True)
+    print(f"🎉 Grid rebuilt! {len(increments)} cells over {clusters.MAX_LEVEL + 1} levels")
+
+
+if __name__ == "__main__":
+    migrate_clusters()
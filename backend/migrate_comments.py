@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Migration script to move embedded complaint comments and work notes into
+the `comments` and `work_notes` collections.
+
+Entries get deterministic ids derived from the complaint id and their array
+position, and are upserted, so the script can be re-run safely after an
+interruption. The embedded arrays are only removed once their entries are
+written.
+"""
+
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, ReplaceOne
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+client = MongoClient(os.environ['MONGO_URL'])
+db = client[os.environ['DB_NAME']]
+
+
+def entry_ops(complaint_id, entries, prefix):
+    ops = []
+    for index, entry in enumerate(entries or []):
+        entry_id = f"{complaint_id}:{prefix}:{index}"
+        ops.append(ReplaceOne(
+            {"id": entry_id},
+            {**entry, "id": entry_id, "complaint_id": complaint_id},
+            upsert=True,
+        ))
+    return ops
+
+
+def migrate_comments():
+    """Copy embedded arrays into their own collections and unset them"""
+    print("🔄 Starting comment and work note migration...")
+
+    legacy = {"$or": [{"comments": {"$exists": True}}, {"workNotes": {"$exists": True}}]}
+    total = db.complaints.count_documents(legacy)
+    print(f"📊 Found {total} complaints with embedded comments or work notes")
+
+    migrated = comment_count = note_count = 0
+    for complaint in db.complaints.find(legacy, {"id": 1, "comments": 1, "workNotes": 1}):
+        complaint_id = complaint.get("id")
+        if not complaint_id:
+            print(f"⚠️ Skipping complaint {complaint['_id']} without an id")
+            continue
+
+        comment_ops = entry_ops(complaint_id, complaint.get("comments"), "c")
+        note_ops = entry_ops(complaint_id, complaint.get("workNotes"), "n")
+        if comment_ops:
+            db.comments.bulk_write(comment_ops, ordered=False)
+        if note_ops:
+            db.work_notes.bulk_write(note_ops, ordered=False)
+
+        db.complaints.update_one(
+            {"_id": complaint["_id"]},
+            {
+                "$unset": {"comments": "", "workNotes": ""},
+                # $inc, not $set: notes added through the API since the deploy are already counted
+                "$inc": {"work_note_count": len(note_ops)},
+            }
+        )
+        migrated += 1
+        comment_count += len(comment_ops)
+        note_count += len(note_ops)
+
+    print(f"🎉 Migration complete! Moved {comment_count} comments and {note_count} work notes from {migrated} complaints")
+
+
+if __name__ == "__main__":
+    migrate_comments()
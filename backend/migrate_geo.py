@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Migration script to backfill the GeoJSON ``geo`` point (see storage/geo.py)
+on complaints written before it existed.
+
+Points are recomputed from each complaint's latitude and longitude, so the
+script can be re-run safely; pass --all to recompute every complaint.
+Complaints without valid coordinates get geo: null, which the 2dsphere
+index skips.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+from storage.geo import geo_fields
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+client = MongoClient(os.environ['MONGO_URL'])
+db = client[os.environ['DB_NAME']]
+
+BATCH_SIZE = 1000
+
+
+def migrate_geo(recompute_all: bool = False):
+    """Set geo from latitude and longitude"""
+    print("🔄 Starting GeoJSON point migration...")
+
+    pending = {} if recompute_all else {"geo": {"$exists": False}}
+    total = db.complaints.count_documents(pending)
+    print(f"📊 Found {total} complaints to update")
+
+    updated = 0
+    ops = []
+    for complaint in db.complaints.find(pending, {"latitude": 1, "longitude": 1}):
+        ops.append(UpdateOne(
+            {"_id": complaint["_id"]},
+            {"$set": geo_fields(complaint.get("latitude"), complaint.get("longitude"))},
+        ))
+        if len(ops) >= BATCH_SIZE:
+            updated += db.complaints.bulk_write(ops, ordered=False).modified_count
+            ops = []
+            print(f"   ...{updated} updated")
+    if ops:
+        updated += db.complaints.bulk_write(ops, ordered=False).modified_count
+
+    print(f"🎉 Migration complete! Updated {updated} complaints")
+    print("ℹ️ Run manage_indexes.py --apply (or restart the API) to build the geo 2dsphere index")
+
+
+if __name__ == "__main__":
+    migrate_geo(recompute_all="--all" in sys.argv[1:])
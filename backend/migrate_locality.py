@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Migration script to backfill the normalized zone_terms and locality keys
+(see storage/locality.py) on complaints written before they existed.
+
+Keys are recomputed from each complaint's address and pincode, so the script
+can be re-run safely; pass --all to recompute every complaint, for example
+after a change to the normalization rules.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+
+from storage.locality import locality_fields
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+client = MongoClient(os.environ['MONGO_URL'])
+db = client[os.environ['DB_NAME']]
+
+BATCH_SIZE = 1000
+
+
+def migrate_locality(recompute_all: bool = False):
+    """Set zone_terms and locality from address and pincode"""
+    print("🔄 Starting locality key migration...")
+
+    pending = {} if recompute_all else {"zone_terms": {"$exists": False}}
+    total = db.complaints.count_documents(pending)
+    print(f"📊 Found {total} complaints to update")
+
+    updated = 0
+    ops = []
+    for complaint in db.complaints.find(pending, {"address": 1, "pincode": 1}):
+        ops.append(UpdateOne(
+            {"_id": complaint["_id"]},
+            {"$set": locality_fields(complaint.get("address"), complaint.get("pincode"))},
+        ))
+        if len(ops) >= BATCH_SIZE:
+            updated += db.complaints.bulk_write(ops, ordered=False).modified_count
+            ops = []
+            print(f"   ...{updated} updated")
+    if ops:
+        updated += db.complaints.bulk_write(ops, ordered=False).modified_count
+
+    print(f"🎉 Migration complete! Updated {updated} complaints")
+    print("ℹ️ Run manage_indexes.py --apply (or restart the API) to build the zone_terms and locality indexes")
+
+
+if __name__ == "__main__":
+    migrate_locality(recompute_all="--all" in sys.argv[1:])
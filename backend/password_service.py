@@ -0,0 +1,142 @@
+"""
+bcrypt hashing and verification on a dedicated process pool.
+
+bcrypt costs hundreds of milliseconds of CPU per call. Running it inside
+request handlers ties up the anyio worker threads that every other sync
+endpoint needs, so a burst of logins starves the rest of the API. The
+PasswordService runs the work in a small process pool instead. At most
+``max_workers`` calls run at once. Callers wait on the event loop, not in a
+thread, and a bounded wait queue sheds load once it is full.
+
+If a worker process dies (OOM kill, segfault), the pool is broken and every
+call on it fails. The calls in flight raise PasswordServiceUnavailable, and
+the pool is dropped so the next call starts a fresh one.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when the wait queue is full and the call is rejected."""
+
+
+class PasswordServiceUnavailable(Exception):
+    """Raised when a worker process died mid-call; the pool is rebuilt for the next one."""
+
+
+class PasswordService:
+    def __init__(self, max_workers: int = 2, max_queue: int = 256):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._semaphore = None
+        self._semaphore_loop = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.pool_restarts = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "maxWorkers": self.max_workers,
+            "maxQueue": self.max_queue,
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "peakWaiting": self.peak_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "poolRestarts": self.pool_restarts,
+            "avgWaitMs": round(1000 * self.total_wait_seconds / self.completed, 2) if self.completed else 0.0,
+            "avgRunMs": round(1000 * self.total_run_seconds / self.completed, 2) if self.completed else 0.0,
+        }
+
+    async def _run(self, fn, *args):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise PasswordServiceBusy("Password service queue is full")
+
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.in_flight += 1
+        executor = None
+        try:
+            executor = self._get_executor()
+            result = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool as error:
+            self.failed += 1
+            self._discard_executor(executor)
+            raise PasswordServiceUnavailable("Password worker process died") from error
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+        # Averages only cover calls that ran to completion
+        self.completed += 1
+        self.total_wait_seconds += started_at - queued_at
+        self.total_run_seconds += time.perf_counter() - started_at
+        return result
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives belong to one loop; rebuild if the app is served from a new one
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _discard_executor(self, executor) -> None:
+        # Concurrent calls all see the same broken pool; only the first replaces it
+        if executor is not None and self._executor is executor:
+            self._executor = None
+            self.pool_restarts += 1
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the server process holds Mongo clients and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
@@ -0,0 +1,263 @@
+"""
+Resolution-time, backlog and throughput analytics, computed in batches.
+
+How fast complaints are resolved per officer, pincode and category cannot
+be answered per request without scanning every complaint. A background job
+keeps a compact pandas frame with one row per complaint: created_at, the
+transition times from storage/timeline.py, status, officer, category and
+pincode. It derives per-group statistics with vectorized groupby
+operations and writes them to the complaint_performance collection, which
+the admin endpoints read.
+
+Only the first run (and a periodic full one) reads every complaint. Later
+runs pull the complaints written since the last run's watermark
+(``updated_at``). They replace those rows in the frame and recompute only
+the groups those rows left or joined.
+
+Stored results do not depend on when they were computed. Backlog ages and
+throughput windows are derived when read (``present``) from the oldest and
+median open creation times and the daily resolved counts. So groups with no
+new writes stay correct between runs. Each worker process runs its own
+job. The results are idempotent, so the extra work is harmless.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+
+from storage import ComplaintQuery
+
+logger = logging.getLogger(__name__)
+
+# Result dimension -> complaint column it groups by; "overall" covers every complaint
+DIMENSIONS = {"overall": None, "officer": "assigned_to", "pincode": "pincode", "category": "category"}
+OVERALL_KEY = "all"
+COLUMNS = ("id", "created_at", "updated_at", "status", "assigned_to", "category", "pincode", "assigned_at", "started_at", "resolved_at")
+TIMES = ("created_at", "updated_at", "assigned_at", "started_at", "resolved_at")
+PROJECTION = {column: 1 for column in COLUMNS}
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p95", 0.95))
+# Daily resolved counts kept per group; throughput windows are summed from them when read
+THROUGHPUT_DAYS = 30
+# Re-read writes this far behind the watermark, in case they committed out of order
+PULL_OVERLAP = timedelta(minutes=1)
+EPOCH = pd.Timestamp("1970-01-01")
+
+
+def to_frame(rows: List[dict]) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(rows, columns=list(COLUMNS))
+    for column in TIMES:
+        frame[column] = pd.to_datetime(frame[column])
+    # Resolved before transitions were stamped (storage/timeline.py): the last write is the best estimate
+    legacy = (frame["status"] == "RESOLVED") & frame["resolved_at"].isna()
+    frame["resolved_at"] = frame["resolved_at"].mask(legacy, frame["updated_at"])
+    return frame.set_index("id")
+
+
+def _hours(delta: pd.Series) -> pd.Series:
+    return delta.dt.total_seconds() / 3600
+
+
+def _number(value) -> Optional[float]:
+    return None if pd.isna(value) else round(float(value), 2)
+
+
+def _time(seconds) -> Optional[datetime]:
+    """Seconds since EPOCH back to a datetime"""
+    return None if seconds is None or pd.isna(seconds) else datetime(1970, 1, 1) + timedelta(seconds=float(seconds))
+
+
+def summarize(frame: pd.DataFrame, keys: pd.Series, now: datetime) -> Dict[str, dict]:
+    """Statistics per group, where ``keys`` labels each row of ``frame``"""
+    frame = frame.reset_index(drop=True)
+    keys = keys.reset_index(drop=True)
+    resolved = frame["status"] == "RESOLVED"
+    backlog = ~resolved
+    # Resolved complaints with no time at all are counted but left out of the timings
+    timed = resolved & frame["resolved_at"].notna()
+
+    resolution = _hours(frame["resolved_at"] - frame["created_at"])[timed].groupby(keys[timed])
+    percentiles = {name: resolution.quantile(q) for name, q in PERCENTILES}
+    means = resolution.mean()
+    assigned = frame["assigned_at"].notna()
+    assign_hours = _hours(frame["assigned_at"] - frame["created_at"])[assigned].groupby(keys[assigned]).median()
+    started = frame["started_at"].notna()
+    start_hours = _hours(frame["started_at"] - frame["created_at"])[started].groupby(keys[started]).median()
+
+    # Open complaints' creation times; their ages are taken when the result is read
+    created = (frame["created_at"] - EPOCH).dt.total_seconds()[backlog].groupby(keys[backlog])
+    oldest, median = created.min(), created.median()
+
+    recent = timed & (frame["resolved_at"] >= pd.Timestamp(now - timedelta(days=THROUGHPUT_DAYS)))
+    days = frame["resolved_at"][recent].dt.strftime("%Y-%m-%d")
+    by_day: Dict[str, Dict[str, int]] = {}
+    for (key, day), count in days.groupby([keys[recent], days]).size().items():
+        by_day.setdefault(key, {})[day] = int(count)
+
+    totals = keys.value_counts()
+    resolved_counts = keys[resolved].value_counts()
+    open_counts = keys[backlog].value_counts()
+    results = {}
+    for key, total in totals.items():
+        results[key] = {
+            "total": int(total),
+            "resolved": int(resolved_counts.get(key, 0)),
+            "open": int(open_counts.get(key, 0)),
+            "resolution_hours": {
+                **{name: _number(values.get(key)) for name, values in percentiles.items()},
+                "mean": _number(means.get(key)),
+            },
+            "assign_hours_p50": _number(assign_hours.get(key)),
+            "start_hours_p50": _number(start_hours.get(key)),
+            "oldest_open_at": _time(oldest.get(key)),
+            "median_open_at": _time(median.get(key)),
+            "resolved_by_day": by_day.get(key, {}),
+        }
+    return results
+
+
+def empty_result() -> dict:
+    return {
+        "total": 0, "resolved": 0, "open": 0,
+        "resolution_hours": {**{name: None for name, _ in PERCENTILES}, "mean": None},
+        "assign_hours_p50": None, "start_hours_p50": None,
+        "oldest_open_at": None, "median_open_at": None, "resolved_by_day": {},
+    }
+
+
+def compute(frame: pd.DataFrame, now: datetime, affected: Optional[Dict[str, Set[str]]] = None) -> List[dict]:
+    """Result documents for every group, or only the ``affected`` keys of each dimension"""
+    results = []
+    for dimension, column in DIMENSIONS.items():
+        if column is None:
+            rows, keys, wanted = frame, pd.Series(OVERALL_KEY, index=frame.index, dtype=object), {OVERALL_KEY}
+        else:
+            rows = frame[frame[column].notna()]
+            if affected is not None:
+                rows = rows[rows[column].astype(str).isin(affected[dimension])]
+            keys = rows[column].astype(str)
+            wanted = affected[dimension] if affected is not None else set(keys)
+        groups = summarize(rows, keys, now)
+        for key in sorted(wanted):
+            results.append({
+                "_id": f"{dimension}:{key}",
+                "dimension": dimension,
+                "key": key,
+                **groups.get(key, empty_result()),
+                "computed_at": now,
+            })
+    return results
+
+
+def present(result: dict, now: Optional[datetime] = None) -> dict:
+    """A stored result in API shape, with backlog ages and throughput as of ``now``"""
+    now = now or datetime.utcnow()
+    by_day = result.get("resolved_by_day") or {}
+
+    def resolved_within(days: int) -> int:
+        cutoff = (now - timedelta(days=days)).strftime("%Y-%m-%d")
+        return sum(count for day, count in by_day.items() if day > cutoff)
+
+    def age(at: Optional[datetime]) -> Optional[float]:
+        return round((now - at).total_seconds() / 3600, 2) if at else None
+
+    return {
+        "dimension": result["dimension"],
+        "key": result["key"],
+        "total": result["total"],
+        "resolved": result["resolved"],
+        "resolutionHours": result["resolution_hours"],
+        "assignHoursP50": result["assign_hours_p50"],
+        "startHoursP50": result["start_hours_p50"],
+        "backlog": {
+            "open": result["open"],
+            "oldestAgeHours": age(result["oldest_open_at"]),
+            "medianAgeHours": age(result["median_open_at"]),
+        },
+        "throughput": {"resolved7d": resolved_within(7), "resolved30d": resolved_within(THROUGHPUT_DAYS)},
+        "computedAt": result["computed_at"],
+    }
+
+
+class PerformanceJob:
+    """The in-process complaint frame and the incremental recompute over it"""
+
+    def __init__(self):
+        self.frame: Optional[pd.DataFrame] = None  # one row per complaint, indexed by id
+        self.watermark: Optional[datetime] = None  # newest updated_at pulled so far
+        self.full_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+        self.runs = 0
+        self.full_runs = 0
+        self.last: Optional[dict] = None
+
+    async def pull(self, storage, since: Optional[datetime]) -> pd.DataFrame:
+        query = ComplaintQuery(updated_from=since - PULL_OVERLAP) if since else ComplaintQuery()
+        rows = [doc async for doc in storage.complaints.stream(query, projection=PROJECTION)]
+        return to_frame(rows)
+
+    async def recompute(self, storage, full: bool = False) -> dict:
+        """Pull changed complaints (all of them if ``full``) and refresh the results they affect"""
+        async with self.lock:
+            started = time.perf_counter()
+            now = datetime.utcnow()
+            full = full or self.frame is None
+            changed = await self.pull(storage, None if full else self.watermark)
+            results, removed = [], 0
+            if full:
+                frame = changed
+                results = await asyncio.to_thread(compute, frame, now)
+            elif len(changed):
+                # A changed row may have left one group and joined another; both need recomputing
+                previous = self.frame.reindex(changed.index)
+                affected = {
+                    dimension: set(previous[column].dropna().astype(str)) | set(changed[column].dropna().astype(str))
+                    for dimension, column in DIMENSIONS.items() if column
+                }
+                frame = pd.concat([self.frame.drop(changed.index, errors="ignore"), changed])
+                results = await asyncio.to_thread(compute, frame, now, affected)
+            else:
+                frame = self.frame
+            await storage.performance.save(results)
+            if full:
+                removed = await storage.performance.retain([result["_id"] for result in results])
+                self.full_at = time.monotonic()
+                self.full_runs += 1
+
+            self.frame = frame
+            newest = changed["updated_at"].max() if len(changed) else None
+            if newest is not None and pd.notna(newest):
+                newest = newest.to_pydatetime()
+                self.watermark = max(self.watermark, newest) if self.watermark and not full else newest
+            self.runs += 1
+            self.last = {
+                "full": full,
+                "changed": len(changed),
+                "results": len(results),
+                "removed": removed,
+                "seconds": round(time.perf_counter() - started, 3),
+                "computedAt": now,
+            }
+            return self.last
+
+    async def run(self, storage, interval: float, full_interval: float) -> None:
+        """Full recompute now, then incremental ones every ``interval`` seconds and a full one every ``full_interval``"""
+        while True:
+            try:
+                full = self.full_at is None or time.monotonic() - self.full_at >= full_interval
+                await self.recompute(storage, full=full)
+            except Exception:
+                logger.exception("Performance analytics run failed")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        return {
+            "complaints": 0 if self.frame is None else len(self.frame),
+            "watermark": self.watermark,
+            "runs": self.runs,
+            "fullRuns": self.full_runs,
+            "last": self.last,
+        }
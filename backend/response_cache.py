@@ -0,0 +1,133 @@
+"""
+In-process stale-while-revalidate cache for anonymous read endpoints.
+
+Entries are keyed by endpoint and normalized query parameters. An entry is
+served as-is for ``ttl_seconds``. It is then served stale for up to
+``stale_seconds`` more while one background task reloads it. Only
+requests after that window, or for keys never seen, wait on storage.
+Concurrent misses for the same key share a single load. The cache is
+bounded and evicts the least recently used key once it is full.
+
+invalidate() marks every entry stale rather than dropping it. The next
+request for a key still gets an answer straight away and starts a
+refresh. A load that began before the invalidation is stored already
+stale, so it cannot hide the write it raced with. The cache is only
+touched from the event loop, so it needs no lock.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Async LRU cache with TTL, stale-while-revalidate and hit/load counters."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 10.0, stale_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries = OrderedDict()  # key -> [fresh_until, stale_until, value]
+        self._loading: Dict[Hashable, asyncio.Task] = {}
+        self._refreshes: Set[asyncio.Task] = set()
+        self._generation = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.loads = 0
+        self.failures = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """The cached value for key, calling ``load`` to fill or refresh it"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry[1]:
+            self._entries.move_to_end(key)
+            if now < entry[0]:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                if key not in self._loading:
+                    self._refreshes.add(self._start(key, load, background=True))
+            return entry[2]
+        pending = self._loading.get(key)
+        if pending is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            pending = self._start(key, load, background=False)
+        # Shielded: a client disconnecting must not cancel a load others are waiting on
+        return await asyncio.shield(pending)
+
+    def invalidate(self) -> None:
+        """Mark every entry stale after a write; the next read of each refreshes it"""
+        self._generation += 1
+        self.invalidations += 1
+        for entry in self._entries.values():
+            entry[0] = 0.0
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def close(self) -> None:
+        for task in list(self._refreshes):
+            task.cancel()
+
+    def stats(self) -> dict:
+        served = self.hits + self.stale_hits + self.coalesced
+        requests = served + self.misses
+        return {
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "staleSeconds": self.stale_seconds,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hitRate": round(served / requests, 4) if requests else 0.0,
+            # Storage reads made vs requests answered: the load the cache removes
+            "loads": self.loads,
+            "loadsAvoided": requests - self.loads,
+            "failures": self.failures,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _start(self, key: Hashable, load: Callable[[], Awaitable[Any]], background: bool) -> asyncio.Task:
+        task = asyncio.ensure_future(self._fill(key, load, self._generation))
+        self._loading[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done, background))
+        return task
+
+    async def _fill(self, key: Hashable, load: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        self.loads += 1
+        value = await load()
+        now = time.monotonic()
+        fresh_until = now + self.ttl_seconds if generation == self._generation else 0.0
+        self._entries[key] = [fresh_until, now + self.ttl_seconds + self.stale_seconds, value]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def _finished(self, key: Hashable, task: asyncio.Task, background: bool) -> None:
+        if self._loading.get(key) is task:
+            del self._loading[key]
+        self._refreshes.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.failures += 1
+            if background:
+                # Keep serving the stale entry; the next stale read tries again
+                logger.warning("Refreshing cached response %r failed", key, exc_info=error)
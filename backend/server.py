@@ -1,32 +1,52 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, File, UploadFile, WebSocket, WebSocketDisconnect, Form
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, File, UploadFile, WebSocket, WebSocketDisconnect, Form, Request, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-#from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
 import os
+import asyncio
+import math
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional
 import uuid
 import random
 import string
 from datetime import datetime, timedelta
-import bcrypt
 import jwt
 import shutil
 
+from fastapi.concurrency import run_in_threadpool
+import logging_config
+from compression import CompressionMiddleware, CompressionStats
+from conditional import is_fresh, make_etag, not_modified, validator_headers
+from duplicates import find_duplicate
+from exports import ENCODERS, EXPORT_PROJECTION, MEDIA_TYPES, gzip_chunks
+from heatmap import RESOLUTIONS, HeatmapGrids, encode_binary, sparse
+from password_service import PasswordService, PasswordServiceBusy, PasswordServiceUnavailable
+from performance import DIMENSIONS as PERFORMANCE_DIMENSIONS, PerformanceJob, present
+from response_cache import ResponseCache
+from serialization import OrjsonResponse, shaper
+from storage import ComplaintQuery, DuplicateKey, create_storage
+from storage.indexes import log_report
+from storage.stats import GRANULARITIES, HOUR_RETENTION_DAYS
+from token_versions import TokenVersionTable
 
 # --- Configuration and variable setup ---
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-mongo_url = os.environ['MONGO_URL']
-client = MongoClient(mongo_url, server_api=ServerApi('1'))
-db = client[os.environ['DB_NAME']]
+# Queue-backed structured logging; see logging_config.py for LOG_* settings
+logging_config.setup_logging()
+logger = logging.getLogger(__name__)
+
+# "mongo" in production; "memory" runs the API with no database (tests, CI, benchmarks)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+storage = create_storage(STORAGE_BACKEND, mongo_url=os.getenv('MONGO_URL'), db_name=os.getenv('DB_NAME'))
+# Build missing indexes in the background at startup (see storage/indexes.py)
+ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
 
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
@@ -34,8 +54,41 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+
+# Tokens issued before a principal's current version are rejected; revocations made by
+# another worker are picked up from the database within the recheck interval
+token_versions = TokenVersionTable(
+    recheck_seconds=float(os.getenv("TOKEN_VERSION_RECHECK_SECONDS", "30")),
+)
+
+# Anonymous dashboard, map and analytics responses; served stale while refreshing and marked stale by complaint writes
+public_cache = ResponseCache(
+    max_entries=int(os.getenv("PUBLIC_RESPONSE_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("PUBLIC_RESPONSE_CACHE_TTL_SECONDS", "10")),
+    stale_seconds=float(os.getenv("PUBLIC_RESPONSE_CACHE_STALE_SECONDS", "60")),
+)
 
-app = FastAPI()
+# Density grids for /public/complaints/heatmap, rebuilt in the background (see heatmap.py)
+heatmap = HeatmapGrids()
+HEATMAP_REBUILD_SECONDS = float(os.getenv("HEATMAP_REBUILD_SECONDS", "900"))
+
+# Resolution-time and officer performance, recomputed incrementally in the background (see performance.py)
+performance_job = PerformanceJob()
+PERFORMANCE_INTERVAL_SECONDS = float(os.getenv("PERFORMANCE_INTERVAL_SECONDS", "300"))
+PERFORMANCE_FULL_SECONDS = float(os.getenv("PERFORMANCE_FULL_SECONDS", "86400"))
+
+# Analytics read materialized counters; check them against the complaints at startup and then periodically (see storage/stats.py)
+STATS_RECONCILE_SECONDS = float(os.getenv("STATS_RECONCILE_SECONDS", "3600"))
+stats_reconciliation = {"runs": 0, "last": None}
+
+# bcrypt runs on its own process pool so login bursts don't starve the request threadpool
+password_service = PasswordService(
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+    max_queue=int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256")),
+)
+
+app = FastAPI(default_response_class=OrjsonResponse)
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
@@ -105,70 +158,174 @@ class Complaint(BaseModel):
     image_url: Optional[str] = None
     assigned_to: Optional[str] = None
     admin_comments: Optional[str] = None
-    comments: Optional[list] = Field(default_factory=list)
-    # Officer work notes
-    workNotes: Optional[list] = Field(default_factory=list)
+    # Comments and officer work notes live in their own collections
+    work_note_count: int = 0
+    # Probable duplicate of an earlier open complaint (see duplicates.py), and how many link here
+    duplicate_of: Optional[str] = None
+    duplicate_score: Optional[float] = None
+    duplicate_count: int = 0
+    # Transition times for resolution analytics, stamped by the storage layer (see storage/timeline.py)
+    assigned_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
+
+class ComplaintSummary(BaseModel):
+    """The columns complaint lists render; full detail is GET /complaints/{id}"""
+    id: str
+    public_id: str = ""
+    title: str
+    category: str
+    priority: str
+    status: str = "PENDING"
+    pincode: Optional[str] = None
+    address: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    user_name: str
+    assigned_to: Optional[str] = None
+    admin_comments: Optional[str] = None
+    image_url: Optional[str] = None
+    work_note_count: int = 0
+    duplicate_of: Optional[str] = None
+    duplicate_count: int = 0
+    created_at: datetime
+    updated_at: datetime
+
+class ComplaintSearchResult(ComplaintSummary):
+    score: float
 
 class Location(BaseModel):
     id: str
     name: str
     officerId: Optional[str] = None
 # Helper functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+async def hash_password(password: str) -> str:
+    try:
+        return await password_service.hash(password)
+    except (PasswordServiceBusy, PasswordServiceUnavailable):
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
 
-def verify_password(password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+async def verify_password(password: str, hashed_password: str) -> bool:
+    try:
+        return await password_service.verify(password, hashed_password)
+    except (PasswordServiceBusy, PasswordServiceUnavailable):
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def create_refresh_token(data: dict):
+    to_encode = {"sub": data["sub"], "uid": data.get("uid"), "ver": data.get("ver", 0)}
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "type": "refresh", "jti": str(uuid.uuid4())})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def issue_tokens(user: User, version: int = 0):
+    """Access + refresh token pair; the access token carries the claims get_current_user needs"""
+    claims = {
+        "sub": user.email,
+        "uid": user.id,
+        "name": user.full_name,
+        "role": user.role,
+        "pincodes": user.locationsAssigned,
+        "ver": token_versions.observe(user.id, version),
+    }
+    return Token(
+        access_token=create_access_token(claims),
+        refresh_token=create_refresh_token(claims),
+        token_type="bearer",
+        user=user,
+    )
+
+def revoke_tokens(principal_id: str, version: int):
+    """Reject tokens issued below ``version``"""
+    token_versions.observe(principal_id, version)
+
+def admin_principal() -> User:
+    return User(
+        id="admin",
+        email="admin@cmrp.com",
+        full_name="Administrator",
+        phone="",
+        role="ADMIN",
+        officerRequestStatus="NONE",
+        locationsAssigned=[],
+        created_at=datetime.utcnow(),
+        is_active=True
+    )
+
+def officer_principal(officer: dict) -> User:
+    return User(
+        id=officer["id"],
+        email=f"{officer['username']}@cmrp.com",
+        full_name=officer["full_name"],
+        phone="",
+        role="OFFICER",
+        officerRequestStatus="NONE",
+        locationsAssigned=officer.get("pincodes", []),
+        created_at=officer.get("created_at", datetime.utcnow()),
+        is_active=True
+    )
+
+async def check_token_version(payload: dict) -> None:
+    """Reject access tokens older than the principal's version, re-reading it from the database when due"""
+    principal_id = payload["uid"]
+    if principal_id != "admin" and token_versions.needs_check(principal_id):
+        # Officers created by an admin log in as <username>@cmrp.com; approved citizens keep their own email
+        if payload["sub"].endswith("@cmrp.com"):
+            stored = await storage.officers.get(principal_id)
+            if stored and not stored.get("is_active", True):
+                stored = None
+        else:
+            stored = await storage.users.get(principal_id)
+        if stored is None:
+            raise HTTPException(status_code=401, detail="Token has been revoked")
+        token_versions.checked(principal_id, stored.get("token_version", 0))
+    if not token_versions.is_current(principal_id, payload.get("ver", 0)):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        if payload.get("type", "access") != "access":
+            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
         email: str = payload.get("sub")
         if email is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
         
-        # Check if this is admin
-        if email == "admin@cmrp.com":
+        # Tokens that carry claims are authorized without a database read, bar a periodic version check
+        if "uid" in payload and "role" in payload:
+            await check_token_version(payload)
             return User(
-                id="admin",
-                email="admin@cmrp.com",
-                full_name="Administrator",
+                id=payload["uid"],
+                email=email,
+                full_name=payload.get("name", ""),
                 phone="",
-                role="ADMIN",
-                officerRequestStatus="NONE",
-                locationsAssigned=[],
-                created_at=datetime.utcnow(),
+                role=payload["role"],
+                locationsAssigned=payload.get("pincodes", []),
                 is_active=True
             )
         
+        # Legacy tokens without claims, issued before they were added; the last of them
+        # expired ACCESS_TOKEN_EXPIRE_MINUTES after that deploy, so this path can go
+        if email == "admin@cmrp.com":
+            return admin_principal()
+        
         # Check if this is a database officer
         if email.endswith("@cmrp.com"):
             username = email.replace("@cmrp.com", "")
-            officer = db.officers.find_one({"username": username, "is_active": True})
+            officer = await storage.officers.get_by_username(username, active_only=True)
             if officer:
-                return User(
-                    id=officer["id"],
-                    email=email,
-                    full_name=officer["full_name"],
-                    phone="",
-                    role="OFFICER",
-                    officerRequestStatus="NONE",
-                    locationsAssigned=officer.get("pincodes", []),
-                    created_at=officer.get("created_at", datetime.utcnow()),
-                    is_active=True
-                )
+                return officer_principal(officer)
             else:
                 raise HTTPException(status_code=401, detail="Officer not found or inactive")
         
         # For regular users, look in database
-        user_data = db.users.find_one({"email": email})
+        user_data = await storage.users.get_by_email(email, include_password=False)
         if user_data is None:
             raise HTTPException(status_code=401, detail="User not found")
         
@@ -176,18 +333,36 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
+def save_upload(upload: UploadFile, filename: str) -> str:
+    """Write an uploaded file under UPLOAD_DIR and return its public URL"""
+    with open(UPLOAD_DIR / filename, "wb") as buffer:
+        shutil.copyfileobj(upload.file, buffer)
+    return f"/uploads/{filename}"
+
+COMMENT_PAGE_SIZE = 50
+COMMENT_PAGE_MAX = 200
+
+async def list_entries(repository_call) -> dict:
+    """Await a comment/work-note listing and shape it as a page"""
+    try:
+        items, next_cursor = await repository_call
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"items": items, "nextCursor": next_cursor}
+
 # Add a comment to a complaint
 @api_router.post("/complaints/{complaint_id}/comments")
-def add_comment(
+async def add_comment(
     complaint_id: str,
     message: str,
     type: str = "public",  # public or internal
     current_user: User = Depends(get_current_user)
 ):
-    complaint = db.complaints.find_one({"id": complaint_id})
-    if not complaint:
+    if not await storage.complaints.exists(complaint_id):
         raise HTTPException(status_code=404, detail="Complaint not found")
     comment = {
+        "id": str(uuid.uuid4()),
+        "complaint_id": complaint_id,
         "author_id": current_user.id,
         "author_name": current_user.full_name,
         "author_role": current_user.role,
@@ -195,23 +370,27 @@ def add_comment(
         "timestamp": datetime.utcnow(),
         "type": type
     }
-    db.complaints.update_one({"id": complaint_id}, {"$push": {"comments": comment}, "$set": {"updated_at": datetime.utcnow()}})
+    await storage.comments.add(comment)
+    await storage.complaints.touch(complaint_id)
     return {"success": True, "comment": comment}
 
-# Get all comments for a complaint
+# Get comments for a complaint, oldest first; pass nextCursor back as `since` to poll for new ones
 @api_router.get("/complaints/{complaint_id}/comments")
-def get_comments(
+async def get_comments(
     complaint_id: str,
+    since: Optional[str] = None,
+    limit: int = COMMENT_PAGE_SIZE,
     current_user: User = Depends(get_current_user)
 ):
-    complaint = db.complaints.find_one({"id": complaint_id})
-    if not complaint:
+    if not await storage.complaints.exists(complaint_id):
         raise HTTPException(status_code=404, detail="Complaint not found")
-    comments = complaint.get("comments", [])
     # Only show internal notes to admins and officers
-    if current_user.role not in ["ADMIN", "admin", "OFFICER", "staff", "superadmin"]:
-        comments = [c for c in comments if c.get("type") != "internal"]
-    return comments
+    include_internal = current_user.role in ["ADMIN", "admin", "OFFICER", "staff", "superadmin"]
+    limit = max(1, min(limit, COMMENT_PAGE_MAX))
+    return await list_entries(
+        storage.comments.list(complaint_id, since=since, limit=limit, include_internal=include_internal)
+    )
+
 # WebSocket manager for broadcasting updates
 class ConnectionManager:
     def __init__(self):
@@ -242,6 +421,10 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: User
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 # Officer Management Models
 class OfficerCreate(BaseModel):
@@ -267,96 +450,100 @@ class Officer(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     created_by: str = "admin"
 
-# Helper functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
-
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
 # Routes
 @api_router.get("/")
-def root():
+async def root():
     return {"message": "CMRP API is running"}
 
+# Each analytics endpoint is one storage call (a single $facet aggregation on Mongo)
 @api_router.get("/analytics")
-def get_analytics():
-    total = db.complaints.count_documents({})
-    by_status = {
-        "PENDING": db.complaints.count_documents({"status": "PENDING"}),
-        "IN_PROGRESS": db.complaints.count_documents({"status": "IN_PROGRESS"}),
-        "RESOLVED": db.complaints.count_documents({"status": "RESOLVED"}),
-    }
-    
-    # Get category breakdown
-    category_pipeline = [
-        {"$group": {
-            "_id": "$category", 
-            "total": {"$sum": 1},
-            "resolved": {"$sum": {"$cond": [{"$eq": ["$status", "RESOLVED"]}, 1, 0]}}
-        }},
-        {"$sort": {"total": -1}},
-        {"$limit": 10}
-    ]
-    by_category = [{"name": doc.get("_id", "Unknown"), "total": doc.get("total", 0), "resolved": doc.get("resolved", 0)} for doc in db.complaints.aggregate(category_pipeline)]
+async def get_analytics():
+    stats = await storage.complaints.analytics(["byCategory"], category_limit=10)
     
     return {
-        "total": total, 
-        "byStatus": by_status, 
-        "byCategory": by_category
+        "total": stats["total"], 
+        "byStatus": stats["byStatus"], 
+        "byCategory": stats["byCategory"]
     }
 
 @api_router.post("/auth/register", response_model=Token)
-def register(user_data: UserCreate):
+async def register(user_data: UserCreate):
     # Check if user already exists
-    existing_user = db.users.find_one({"email": user_data.email})
+    existing_user = await storage.users.get_by_email(user_data.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     
     # Create user
     user_dict = user_data.dict()
     user_dict["password"] = hashed_password
     user_obj = User(**{k: v for k, v in user_dict.items() if k != "password"})
     
-    # Insert user
-    db.users.insert_one({**user_obj.dict(), "password": hashed_password})
-    
-    # Create access token
-    access_token = create_access_token(data={"sub": user_obj.email})
+    # Insert user; the unique email index catches a concurrent registration
+    try:
+        await storage.users.insert({**user_obj.dict(), "password": hashed_password})
+    except DuplicateKey:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
-    return Token(access_token=access_token, token_type="bearer", user=user_obj)
+    return issue_tokens(user_obj)
 
 @api_router.post("/auth/login", response_model=Token)
-def login(user_data: UserLogin):
+async def login(user_data: UserLogin):
     # Find user
-    user_doc = db.users.find_one({"email": user_data.email})
-    if not user_doc or not verify_password(user_data.password, user_doc["password"]):
+    user_doc = await storage.users.get_by_email(user_data.email)
+    if not user_doc or not await verify_password(user_data.password, user_doc["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     user_obj = User(**{k: v for k, v in user_doc.items() if k != "password"})
     
-    # Create access token
-    access_token = create_access_token(data={"sub": user_obj.email})
+    return issue_tokens(user_obj, user_doc.get("token_version", 0))
+
+@api_router.post("/auth/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshRequest):
+    """Exchange a refresh token for a new token pair without re-checking the password"""
+    try:
+        payload = jwt.decode(request.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    email = payload.get("sub")
+    principal_id = payload.get("uid")
+    version = payload.get("ver", 0)
+    if payload.get("type") != "refresh" or email is None or principal_id is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    if not token_versions.is_current(principal_id, version):
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+    
+    if email == "admin@cmrp.com":
+        return issue_tokens(admin_principal())
+    
+    # Re-read the principal so the new access token carries current role and pincodes
+    if email.endswith("@cmrp.com"):
+        officer = await storage.officers.get_by_username(email.replace("@cmrp.com", ""), active_only=True)
+        if not officer:
+            raise HTTPException(status_code=401, detail="Officer not found or inactive")
+        user_obj = officer_principal(officer)
+        stored_version = officer.get("token_version", 0)
+    else:
+        user_doc = await storage.users.get_by_email(email, include_password=False)
+        if not user_doc:
+            raise HTTPException(status_code=401, detail="User not found")
+        user_obj = User(**user_doc)
+        stored_version = user_doc.get("token_version", 0)
     
-    return Token(access_token=access_token, token_type="bearer", user=user_obj)
+    if version < stored_version:
+        token_versions.observe(principal_id, stored_version)
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+    return issue_tokens(user_obj, stored_version)
 
 
-def generate_public_id():
+async def generate_public_id():
     year = datetime.utcnow().strftime("%Y")
     for _ in range(5):
         number = ''.join(random.choices(string.digits, k=6))
         public_id = f"CMP-{year}-{number}"
-        if not db.complaints.find_one({"public_id": public_id}):
+        if not await storage.complaints.public_id_exists(public_id):
             return public_id
     return f"CMP-{year}-{str(uuid.uuid4())[:6].upper()}"
 
@@ -370,37 +557,49 @@ async def create_complaint(
 
     # Assign officer based on pincode using database lookup
     assigned_officer_id = None
-    print(f"🔍 Complaint pincode: {complaint_data.pincode}")
     
     if complaint_data.pincode:
         # Find officer in database for this pincode
-        officer = db.officers.find_one({
-            "pincodes": complaint_data.pincode,
-            "is_active": True
-        })
+        officer = await storage.officers.find_for_pincode(complaint_data.pincode)
         if officer:
             assigned_officer_id = officer["id"]
-            print(f"✅ Assigned to {officer['full_name']} ({officer['username']}) for pincode {complaint_data.pincode}")
-        else:
-            print(f"⚠️ No officer found for pincode {complaint_data.pincode}")
-    else:
-        print(f"⚠️ No pincode provided for complaint")
 
     complaint_dict = complaint_data.dict()
     # Set status based on whether officer is assigned
     final_status = "PENDING" if assigned_officer_id else "NO_OFFICER"
-    print(f"🔍 Final complaint status: {final_status}, assigned_to: {assigned_officer_id}")
+    logger.debug(
+        "Complaint routed",
+        extra={"pincode": complaint_data.pincode, "assigned_to": assigned_officer_id, "status": final_status},
+    )
     
     complaint_dict.update({
         "user_id": current_user.id,
         "user_name": current_user.full_name,
         "user_email": current_user.email,
-        "public_id": generate_public_id(),
+        "public_id": await generate_public_id(),
         "status": final_status,
         "assigned_to": assigned_officer_id,
     })
+    # Still stored, but linked to the first report so officers can handle them together
+    duplicate = await find_duplicate(storage, complaint_dict)
+    if duplicate:
+        complaint_dict["duplicate_of"], complaint_dict["duplicate_score"] = duplicate
     complaint_obj = Complaint(**complaint_dict)
-    db.complaints.insert_one(complaint_obj.dict())
+    # The public_id check above is racy; the unique index is the real guard
+    for _ in range(3):
+        try:
+            await storage.complaints.insert(complaint_obj.dict())
+            break
+        except DuplicateKey as exc:
+            if exc.field != "public_id":
+                raise
+            complaint_obj.public_id = await generate_public_id()
+    else:
+        raise HTTPException(status_code=503, detail="Could not allocate a tracking ID, please retry")
+    heatmap.add(complaint_obj.dict())
+    public_cache.invalidate()
+    if complaint_obj.duplicate_of:
+        await storage.complaints.touch(complaint_obj.duplicate_of, increment="duplicate_count")
     await manager.broadcast({
         "event": "new_complaint",
         "complaint": complaint_obj.dict()
@@ -408,55 +607,132 @@ async def create_complaint(
     return complaint_obj
 # Public endpoint: Track complaint by tracking ID (no login)
 @api_router.get("/complaints/public/{public_id}")
-def public_complaint_by_public_id(public_id: str):
-    complaint = db.complaints.find_one({"public_id": public_id})
+async def public_complaint_by_public_id(public_id: str, request: Request):
+    # Trackers poll this; answer unchanged polls from the (public_id, updated_at) index
+    count, updated_at = await storage.complaints.version(ComplaintQuery(public_id=public_id))
+    if not count:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    headers = validator_headers(make_etag("public", public_id, updated_at), updated_at)
+    if is_fresh(request.headers, headers["ETag"], updated_at):
+        return not_modified(headers)
+    complaint = await storage.complaints.get_by_public_id(public_id)
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
-    return {
+    return OrjsonResponse({
         "publicId": complaint.get("public_id"),
         "description": complaint.get("description"),
         "photoUrl": complaint.get("image_url"),
         "location": complaint.get("address"),
         "status": complaint.get("status"),
         "updatedAt": complaint.get("updated_at"),
-    }
+    }, headers=headers)
+
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a YYYY-MM-DD query parameter, ignoring malformed values"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+# Complaint listings page with an opaque cursor; the next one is returned in X-Next-Cursor
+LIST_PAGE_SIZE = 1000
+LIST_PAGE_MAX = 1000
+# Anonymous dashboard and map pages may be reused by browsers and proxies for this long
+PUBLIC_CACHE_CONTROL = f"public, max-age={int(os.getenv('PUBLIC_CACHE_MAX_AGE', '30'))}"
+
+async def complaint_page(query: ComplaintQuery, cursor: Optional[str], limit: int, include_total: bool = False, projection: Optional[dict] = None):
+    """Fetch one page (and, if asked, the total) of a complaint listing"""
+    if limit < 1 or limit > LIST_PAGE_MAX:
+        raise HTTPException(status_code=400, detail="Invalid pagination params")
+    try:
+        if include_total:
+            (items, next_cursor), total = await asyncio.gather(
+                storage.complaints.page(query, limit=limit, cursor=cursor, projection=projection),
+                storage.complaints.count(query),
+            )
+        else:
+            items, next_cursor = await storage.complaints.page(query, limit=limit, cursor=cursor, projection=projection)
+            total = None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return items, next_cursor, total
+
+def page_response(items: list, next_cursor: Optional[str], total: Optional[int], headers: Optional[dict] = None) -> OrjsonResponse:
+    # Returned directly so FastAPI skips response_model validation and jsonable_encoder
+    headers = dict(headers or {})
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        headers["X-Total-Count"] = str(total)
+    return OrjsonResponse(items, headers=headers)
+
+async def cached_response(key: tuple, build: Callable[[], Awaitable[Response]]) -> Response:
+    """Serve an anonymous endpoint's response from public_cache, building it on a miss"""
+    async def load():
+        response = await build()
+        headers = {name: value for name, value in response.headers.items() if name not in ("content-length", "content-type")}
+        return response.body, response.media_type, headers
+
+    body, media_type, headers = await public_cache.get(key, load)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def query_key(query: ComplaintQuery) -> str:
+    # Parsed filters, so equivalent query strings (e.g. malformed dates, which are ignored) share an entry
+    return query.model_dump_json(exclude_defaults=True)
+
+shape_complaint = shaper(Complaint)
+shape_summary = shaper(ComplaintSummary)
+SUMMARY_PROJECTION = {name: 1 for name in ComplaintSummary.model_fields}
+
+def complaint_fields(fields: Optional[str]):
+    """
+    Projection and row shaper for a list endpoint's ``fields`` parameter:
+    ComplaintSummary by default, "*" for the full Complaint, or a
+    comma-separated list of Complaint fields (id is always included).
+    """
+    if not fields:
+        return SUMMARY_PROJECTION, shape_summary
+    if fields.strip() == "*":
+        return None, shape_complaint
+    names = ["id"]
+    for name in fields.split(","):
+        name = name.strip()
+        if name not in Complaint.model_fields:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+        if name not in names:
+            names.append(name)
+    return {name: 1 for name in names}, lambda doc: {name: doc.get(name) for name in names}
 
 # Public dashboard endpoint: Anonymous view with filters
 @app.get("/public/complaints/dashboard")
-def public_dashboard(
+async def public_dashboard(
     status: Optional[str] = None,
     category: Optional[str] = None,
     zone: Optional[str] = None,
     from_date: Optional[str] = None,  # YYYY-MM-DD
-    to_date: Optional[str] = None
+    to_date: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = LIST_PAGE_SIZE,
+    include_total: bool = False
 ):
-    filter_dict = {}
-    if status:
-        filter_dict["status"] = status
-    if category:
-        filter_dict["category"] = category
-    if zone:
-        filter_dict["address"] = {"$regex": zone, "$options": "i"}
-    if from_date:
-        try:
-            from_dt = datetime.strptime(from_date, "%Y-%m-%d")
-            filter_dict["created_at"] = {"$gte": from_dt}
-        except Exception:
-            pass
-    if to_date:
-        try:
-            to_dt = datetime.strptime(to_date, "%Y-%m-%d")
-            if "created_at" in filter_dict:
-                filter_dict["created_at"]["$lte"] = to_dt
-            else:
-                filter_dict["created_at"] = {"$lte": to_dt}
-        except Exception:
-            pass
-    complaints_cursor = db.complaints.find(
-        filter_dict,
-        {"public_id": 1, "status": 1, "category": 1, "priority": 1, "created_at": 1, "address": 1, "image_url": 1, "admin_comments": 1}
-    ).sort("created_at", -1)
-    return list(complaints_cursor.limit(1000))
+    query = ComplaintQuery(
+        status=status,
+        category=category,
+        zone=zone,
+        created_from=parse_date(from_date),
+        created_to=parse_date(to_date),
+    )
+
+    async def build():
+        items, next_cursor, total = await complaint_page(
+            query, cursor, limit, include_total,
+            projection={"public_id": 1, "status": 1, "category": 1, "priority": 1, "created_at": 1, "address": 1, "image_url": 1, "admin_comments": 1},
+        )
+        return page_response(items, next_cursor, total, {"Cache-Control": PUBLIC_CACHE_CONTROL})
+
+    return await cached_response(("dashboard", query_key(query), cursor, limit, include_total), build)
 # WebSocket endpoint for real-time updates
 @app.websocket("/ws/complaints")
 async def websocket_endpoint(websocket: WebSocket):
@@ -468,36 +744,30 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 @api_router.post("/complaints/{complaint_id}/upload")
-def upload_complaint_image(
+async def upload_complaint_image(
     complaint_id: str,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
     # Check if complaint exists and belongs to user
-    complaint = db.complaints.find_one({"id": complaint_id, "user_id": current_user.id})
+    complaint = await storage.complaints.get(complaint_id, user_id=current_user.id)
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
     
-    # Save file
+    # Save file off the event loop
     file_extension = Path(file.filename).suffix
     filename = f"{complaint_id}_{uuid.uuid4()}{file_extension}"
-    file_path = UPLOAD_DIR / filename
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    image_url = await run_in_threadpool(save_upload, file, filename)
     
     # Update complaint with image URL
-    image_url = f"/uploads/{filename}"
-    db.complaints.update_one(
-        {"id": complaint_id},
-        {"$set": {"image_url": image_url, "updated_at": datetime.utcnow()}}
-    )
+    await storage.complaints.update(complaint_id, {"image_url": image_url, "updated_at": datetime.utcnow()})
+    public_cache.invalidate()
     
     return {"image_url": image_url}
 
 # Officer adds work note with optional photo
 @api_router.post("/officer/complaints/{complaint_id}/notes")
-def add_work_note(
+async def add_work_note(
     complaint_id: str,
     note: str = "",
     file: Optional[UploadFile] = File(None),
@@ -505,102 +775,311 @@ def add_work_note(
 ):
     if current_user.role != "OFFICER":
         raise HTTPException(status_code=403, detail="Officer access required")
-    complaint = db.complaints.find_one({"id": complaint_id, "assigned_to": current_user.id})
+    complaint = await storage.complaints.get(complaint_id, assigned_to=current_user.id)
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found or not assigned to you")
     photo_url = None
     if file is not None:
         file_extension = Path(file.filename).suffix
         filename = f"{complaint_id}_note_{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        photo_url = f"/uploads/{filename}"
+        photo_url = await run_in_threadpool(save_upload, file, filename)
     work_note = {
+        "id": str(uuid.uuid4()),
+        "complaint_id": complaint_id,
         "officerId": current_user.id,
         "note": note,
         "photoUrl": photo_url,
         "timestamp": datetime.utcnow(),
     }
-    db.complaints.update_one(
-        {"id": complaint_id},
-        {"$push": {"workNotes": work_note}, "$set": {"updated_at": datetime.utcnow()}}
-    )
+    await storage.work_notes.add(work_note)
+    await storage.complaints.touch(complaint_id, increment="work_note_count")
     return {"success": True, "workNote": work_note}
 
-@api_router.get("/complaints/my", response_model=List[Complaint])
-def get_my_complaints(current_user: User = Depends(get_current_user)):
+async def visible_complaint(complaint_id: str, current_user: User) -> Optional[dict]:
+    """The complaint if the user may see it: admins any, officers their assigned ones, citizens their own"""
+    if current_user.role in ["ADMIN", "admin"]:
+        return await storage.complaints.get(complaint_id)
+    if current_user.role == "OFFICER":
+        return await storage.complaints.get(complaint_id, assigned_to=current_user.id)
+    return await storage.complaints.get(complaint_id, user_id=current_user.id)
+
+# Officer work notes for a complaint, oldest first, with the same `since` cursor as comments.
+# Visible to whoever can see the complaint itself, as when notes were embedded in it
+@api_router.get("/complaints/{complaint_id}/notes")
+async def get_work_notes(
+    complaint_id: str,
+    since: Optional[str] = None,
+    limit: int = COMMENT_PAGE_SIZE,
+    current_user: User = Depends(get_current_user)
+):
+    if not await visible_complaint(complaint_id, current_user):
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    limit = max(1, min(limit, COMMENT_PAGE_MAX))
+    return await list_entries(storage.work_notes.list(complaint_id, since=since, limit=limit))
+
+@api_router.get("/complaints/my", response_model=List[ComplaintSummary])
+async def get_my_complaints(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = LIST_PAGE_SIZE,
+    include_total: bool = False,
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
     # Check if this is an officer requesting their assigned complaints
     if current_user.role == "OFFICER":
-        print(f"🔍 Officer {current_user.id} ({current_user.full_name}) requesting assigned complaints")
-        complaints = list(db.complaints.find({"assigned_to": current_user.id}).sort("created_at", -1).limit(1000))
-        print(f"🔍 Found {len(complaints)} complaints for officer {current_user.id}")
-        return [Complaint(**complaint) for complaint in complaints]
-    
-    # Regular user requesting their own complaints
-    complaints = list(db.complaints.find({"user_id": current_user.id}).sort("created_at", -1).limit(1000))
-    return [Complaint(**complaint) for complaint in complaints]
+        query = ComplaintQuery(assigned_to=current_user.id)
+    else:
+        # Regular user requesting their own complaints
+        query = ComplaintQuery(user_id=current_user.id)
+    projection, shape = complaint_fields(fields)
+    # Polled by the dashboard: skip the page query when nothing matching has changed
+    count, updated_at = await storage.complaints.version(query)
+    etag = make_etag("my", current_user.id, cursor, limit, fields, include_total, count, updated_at)
+    # ETag only: see conditional.py on why listings ignore If-Modified-Since
+    headers = validator_headers(etag, None, private=True)
+    if is_fresh(request.headers, etag, None):
+        return not_modified(headers)
+    complaints, next_cursor, total = await complaint_page(query, cursor, limit, include_total, projection)
+    return page_response([shape(complaint) for complaint in complaints], next_cursor, total, headers)
+
+# Admin text search over title, address and description, best match first
+SEARCH_PAGE_SIZE = 20
+SEARCH_PAGE_MAX = 100
+
+@api_router.get("/complaints/search", response_model=List[ComplaintSearchResult])
+async def search_complaints(
+    q: str,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    zone: Optional[str] = None,
+    from_date: Optional[str] = None,  # YYYY-MM-DD
+    to_date: Optional[str] = None,
+    limit: int = SEARCH_PAGE_SIZE,
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if current_user.role not in ["ADMIN", "admin"]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if not q.strip() or len(q) > 200:
+        raise HTTPException(status_code=400, detail="q must be 1-200 characters")
+    if limit < 1 or limit > SEARCH_PAGE_MAX:
+        raise HTTPException(status_code=400, detail="Invalid pagination params")
+    query = ComplaintQuery(
+        status=status,
+        category=category,
+        zone=zone,
+        created_from=parse_date(from_date),
+        created_to=parse_date(to_date),
+    )
+    projection, shape = complaint_fields(fields)
+    results = await storage.complaints.search(q, query, limit=limit, projection=projection)
+    # Relevance is returned alongside the requested fields
+    return OrjsonResponse([{**shape(doc), "score": round(doc["score"], 4)} for doc in results])
+
+# Full detail for one complaint: admins see any, officers their assigned ones, citizens their own
+@api_router.get("/complaints/{complaint_id}", response_model=Complaint)
+async def get_complaint(complaint_id: str, current_user: User = Depends(get_current_user)):
+    complaint = await visible_complaint(complaint_id, current_user)
+    if not complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    return OrjsonResponse(shape_complaint(complaint))
 
 
 # Enhanced: Get all complaints with optional filters, including geolocation/zone
-@api_router.get("/complaints", response_model=List[Complaint])
-def get_all_complaints(
+@api_router.get("/complaints", response_model=List[ComplaintSummary])
+async def get_all_complaints(
     status: Optional[str] = None,
     category: Optional[str] = None,
     zone: Optional[str] = None,  # e.g., "North Zone"
     has_location: Optional[bool] = None,  # Only complaints with lat/lng
+    cursor: Optional[str] = None,
+    limit: int = LIST_PAGE_SIZE,
+    include_total: bool = False,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    print(f"🔍 Admin complaints request - User ID: {current_user.id}, Role: {current_user.role}")
     if current_user.role not in ["ADMIN", "admin"]:
-        print(f"❌ Admin access denied - Role: {current_user.role}")
         raise HTTPException(status_code=403, detail="Admin access required")
-    filter_dict = {}
-    if status:
-        filter_dict["status"] = status
-    if category:
-        filter_dict["category"] = category
-    if has_location:
-        filter_dict["latitude"] = {"$ne": None}
-        filter_dict["longitude"] = {"$ne": None}
-    if zone:
-        # Example: zone-based filtering by address substring (customize as needed)
-        filter_dict["address"] = {"$regex": zone, "$options": "i"}
-    complaints = list(db.complaints.find(filter_dict).sort("created_at", -1).limit(1000))
-    return [Complaint(**complaint) for complaint in complaints]
-
-# Public endpoint: Get all complaints with location (for map/heatmap, no auth)
-@app.get("/public/complaints/locations")
-def public_complaints_locations(
+    query = ComplaintQuery(status=status, category=category, zone=zone, has_location=bool(has_location))
+    projection, shape = complaint_fields(fields)
+    complaints, next_cursor, total = await complaint_page(query, cursor, limit, include_total, projection)
+    return page_response([shape(complaint) for complaint in complaints], next_cursor, total)
+
+# Bulk export for reporting: streams every matching complaint, so there is no row cap
+@api_router.get("/admin/complaints/export")
+async def export_complaints(
+    format: str = "ndjson",  # ndjson | csv
     status: Optional[str] = None,
     category: Optional[str] = None,
-    zone: Optional[str] = None
+    zone: Optional[str] = None,
+    from_date: Optional[str] = None,  # YYYY-MM-DD
+    to_date: Optional[str] = None,
+    gzip: bool = False,
+    current_user: User = Depends(get_current_user)
 ):
-    filter_dict = {"latitude": {"$ne": None}, "longitude": {"$ne": None}}
-    if status:
-        filter_dict["status"] = status
-    if category:
-        filter_dict["category"] = category
-    if zone:
-        filter_dict["address"] = {"$regex": zone, "$options": "i"}
-    complaints = list(db.complaints.find(filter_dict, {"id": 1, "latitude": 1, "longitude": 1, "category": 1, "status": 1, "priority": 1, "created_at": 1, "address": 1}).sort("created_at", -1).limit(1000))
-    # Return only minimal info for map
-    return [
-        {
-            "id": c.get("id"),
-            "latitude": c.get("latitude"),
-            "longitude": c.get("longitude"),
-            "category": c.get("category"),
-            "status": c.get("status"),
-            "priority": c.get("priority"),
-            "created_at": c.get("created_at"),
-            "address": c.get("address"),
+    if current_user.role not in ["ADMIN", "admin"]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if format not in ENCODERS:
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    query = ComplaintQuery(
+        status=status,
+        category=category,
+        zone=zone,
+        created_from=parse_date(from_date),
+        created_to=parse_date(to_date),
+    )
+    chunks = ENCODERS[format](storage.complaints.stream(query, projection=EXPORT_PROJECTION))
+    filename = f"complaints-{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
+
+def parse_coordinates(value: str, count: int, name: str) -> List[float]:
+    try:
+        numbers = [float(part) for part in value.split(",")]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count or not all(math.isfinite(number) for number in numbers):
+        raise HTTPException(status_code=400, detail=f"{name} must be {count} comma-separated numbers")
+    return numbers
+
+def parse_bbox(value: Optional[str]):
+    """west,south,east,north (Leaflet's toBBoxString()); None when the box spans half the globe or more"""
+    if not value:
+        return None
+    west, south, east, north = parse_coordinates(value, 4, "bbox")
+    # Zoomed-out maps report longitudes past +/-180; clamp them
+    west, east = max(west, -180.0), min(east, 180.0)
+    south, north = max(south, -90.0), min(north, 90.0)
+    if west >= east or south >= north:
+        raise HTTPException(status_code=400, detail="bbox must be west,south,east,north with west < east and south < north")
+    if east - west >= 180:
+        return None  # A world view: every point is visible anyway
+    return (west, south, east, north)
+
+MAX_RADIUS_M = 50000
+
+def split_values(value: Optional[str]) -> Optional[List[str]]:
+    return [part.strip() for part in value.split(",") if part.strip()] if value else None
+
+# Public endpoint: complaint density grid for the heatmap layer (no auth)
+@app.get("/public/complaints/heatmap")
+async def public_complaints_heatmap(
+    category: Optional[str] = None,  # comma-separated
+    status: Optional[str] = None,  # comma-separated
+    resolution: int = 128,  # cells per side, one of heatmap.RESOLUTIONS
+    format: str = "json",  # json | binary
+):
+    """
+    Complaint counts per cell of a resolution x resolution grid over
+    ``extent`` (west, south, east, north), row-major from the south-west
+    corner. Only non-empty cells are sent: as parallel ``indexes``/``counts``
+    arrays in JSON, or as little-endian uint32 (index, count) pairs in the
+    binary format, with the extent and resolution in headers.
+    """
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {', '.join(map(str, RESOLUTIONS))}")
+    if format not in ("json", "binary"):
+        raise HTTPException(status_code=400, detail="format must be json or binary")
+    grid = heatmap.grid(resolution, split_values(category), split_values(status))
+    extent = list(heatmap.extent) if heatmap.extent else None
+    if format == "binary":
+        headers = {
+            "Cache-Control": PUBLIC_CACHE_CONTROL,
+            "X-Heatmap-Extent": ",".join(map(str, extent or [])),
+            "X-Heatmap-Resolution": str(resolution),
         }
-        for c in complaints
-    ]
+        return Response(encode_binary(grid), media_type="application/octet-stream", headers=headers)
+    indexes, counts = sparse(grid)
+    return OrjsonResponse(
+        {
+            "extent": extent,
+            "resolution": resolution,
+            "total": int(counts.sum()),
+            "max": int(counts.max(initial=0)),
+            "indexes": indexes.tolist(),
+            "counts": counts.tolist(),
+        },
+        headers={"Cache-Control": PUBLIC_CACHE_CONTROL},
+    )
+
+MAX_MAP_ZOOM = 22
+WORLD_BBOX = (-180.0, -90.0, 180.0, 90.0)
+
+# Public endpoint: clustered complaint counts for the map viewport at a zoom level (no auth)
+@app.get("/public/complaints/clusters")
+async def public_complaint_clusters(bbox: str, zoom: int):
+    """
+    Counts, centroids and status breakdowns of the complaints in each grid
+    cell visible in bbox. Read from a grid precomputed on write, so the
+    cost and size are bounded by the viewport, not by the number of
+    complaints.
+    """
+    if not 0 <= zoom <= MAX_MAP_ZOOM:
+        raise HTTPException(status_code=400, detail=f"zoom must be 0-{MAX_MAP_ZOOM}")
+    level, clusters = await storage.complaints.clusters(parse_bbox(bbox) or WORLD_BBOX, zoom)
+    return OrjsonResponse({"level": level, "clusters": clusters}, headers={"Cache-Control": PUBLIC_CACHE_CONTROL})
+
+# Public endpoint: complaints with a location for the map, optionally within a viewport or radius (no auth)
+@app.get("/public/complaints/locations")
+async def public_complaints_locations(
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    zone: Optional[str] = None,
+    bbox: Optional[str] = None,  # west,south,east,north
+    near: Optional[str] = None,  # lng,lat
+    radius: float = 1000,  # metres around `near`
+    cursor: Optional[str] = None,
+    limit: int = LIST_PAGE_SIZE
+):
+    center = None
+    if near:
+        longitude, latitude = parse_coordinates(near, 2, "near")
+        if not (-180 <= longitude <= 180 and -90 <= latitude <= 90) or not (0 < radius <= MAX_RADIUS_M):
+            raise HTTPException(status_code=400, detail=f"near must be lng,lat and radius 1-{MAX_RADIUS_M} metres")
+        center = (longitude, latitude)
+    query = ComplaintQuery(
+        status=status,
+        category=category,
+        zone=zone,
+        has_location=True,
+        bbox=parse_bbox(bbox),
+        near=center,
+        radius_m=radius,
+    )
+
+    async def build():
+        complaints, next_cursor, _ = await complaint_page(
+            query, cursor, limit,
+            projection={"id": 1, "latitude": 1, "longitude": 1, "category": 1, "status": 1, "priority": 1, "created_at": 1, "address": 1},
+        )
+        # Return only minimal info for map
+        return page_response(
+            [
+                {
+                    "id": c.get("id"),
+                    "latitude": c.get("latitude"),
+                    "longitude": c.get("longitude"),
+                    "category": c.get("category"),
+                    "status": c.get("status"),
+                    "priority": c.get("priority"),
+                    "created_at": c.get("created_at"),
+                    "address": c.get("address"),
+                }
+                for c in complaints
+            ],
+            next_cursor,
+            None,
+            {"Cache-Control": PUBLIC_CACHE_CONTROL},
+        )
+
+    return await cached_response(("locations", query_key(query), cursor, limit), build)
 
 @api_router.put("/complaints/{complaint_id}", response_model=Complaint)
-def update_complaint(
+async def update_complaint(
     complaint_id: str,
     update_data: ComplaintUpdate,
     current_user: User = Depends(get_current_user)
@@ -608,21 +1087,22 @@ def update_complaint(
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    complaint = db.complaints.find_one({"id": complaint_id})
-    if not complaint:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-    
     update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
     update_dict["updated_at"] = datetime.utcnow()
     
-    db.complaints.update_one({"id": complaint_id}, {"$set": update_dict})
-    
-    updated_complaint = db.complaints.find_one({"id": complaint_id})
+    # The heatmap counts complaints per status, so it needs the status being left
+    previous = await storage.complaints.get(complaint_id) if "status" in update_dict else None
+    updated_complaint = await storage.complaints.update(complaint_id, update_dict)
+    if not updated_complaint:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    if previous:
+        heatmap.move(updated_complaint, previous.get("status"))
+    public_cache.invalidate()
     return Complaint(**updated_complaint)
 
 # Officer update endpoint
 @api_router.put("/officer/complaints/{complaint_id}")
-def officer_update_complaint(
+async def officer_update_complaint(
     complaint_id: str,
     update_data: ComplaintUpdate,
     current_user: User = Depends(get_current_user)
@@ -632,7 +1112,7 @@ def officer_update_complaint(
         raise HTTPException(status_code=403, detail="Officer access required")
     
     # Find complaint assigned to this officer
-    complaint = db.complaints.find_one({"id": complaint_id, "assigned_to": current_user.id})
+    complaint = await storage.complaints.get(complaint_id, assigned_to=current_user.id)
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found or not assigned to you")
     
@@ -647,31 +1127,91 @@ def officer_update_complaint(
         raise HTTPException(status_code=400, detail="No valid fields to update")
     
     update_dict["updated_at"] = datetime.utcnow()
-    db.complaints.update_one({"id": complaint_id}, {"$set": update_dict})
-    
-    updated_complaint = db.complaints.find_one({"id": complaint_id})
+    updated_complaint = await storage.complaints.update(complaint_id, update_dict)
+    heatmap.move(updated_complaint, complaint.get("status"))
+    public_cache.invalidate()
     return Complaint(**updated_complaint)
 
+@api_router.get("/admin/metrics")
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    """In-process cache and pool counters (Admin only)"""
+    if current_user.role not in ["ADMIN", "admin"]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {
+        "public_cache": public_cache.stats(),
+        "heatmap": heatmap.stats(),
+        "performance": performance_job.stats(),
+        "stats_reconciliation": stats_reconciliation,
+        "password_service": password_service.stats(),
+        "token_versions": token_versions.stats(),
+        "logging": logging_config.stats(),
+        "compression": compression_stats.stats(),
+    }
+
+@api_router.get("/admin/indexes")
+async def get_index_drift(current_user: User = Depends(get_current_user)):
+    """Declared vs actual MongoDB indexes (Admin only)"""
+    if current_user.role not in ["ADMIN", "admin"]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    report = await storage.check_indexes()
+    return report.as_dict()
+
+async def reconcile_stats() -> dict:
+    report = await storage.complaints.reconcile_stats()
+    stats_reconciliation["runs"] += 1
+    stats_reconciliation["last"] = report
+    if report["repaired"] or report["removed"]:
+        logger.warning(
+            "Complaint stats drifted: repaired %d counters, removed %d (%s)",
+            report["repaired"], report["removed"], ", ".join(report["drifted"]),
+        )
+    return report
+
+@api_router.post("/admin/stats/reconcile")
+async def reconcile_complaint_stats(current_user: User = Depends(get_current_user)):
+    """Recompute the complaint stats counters now and repair any drift (Admin only)"""
+    if current_user.role not in ["ADMIN", "admin"]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await reconcile_stats()
+
+@api_router.get("/admin/performance")
+async def get_performance(dimension: str = "officer", limit: int = 100, current_user: User = Depends(get_current_user)):
+    """Resolution times, backlog age and throughput per officer, pincode, category or overall (Admin only)"""
+    if current_user.role not in ["ADMIN", "admin"]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if dimension not in PERFORMANCE_DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of {', '.join(PERFORMANCE_DIMENSIONS)}")
+    if limit < 1 or limit > 1000:
+        raise HTTPException(status_code=400, detail="limit must be 1-1000")
+    now = datetime.utcnow()
+    results = await storage.performance.list(dimension, limit=limit)
+    return OrjsonResponse({"dimension": dimension, "results": [present(result, now) for result in results]})
+
+@api_router.post("/admin/performance/recompute")
+async def recompute_performance(full: bool = False, current_user: User = Depends(get_current_user)):
+    """Run the performance batch job now: changed complaints only, or everything with full=true (Admin only)"""
+    if current_user.role not in ["ADMIN", "admin"]:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await performance_job.recompute(storage, full=full)
+
 @api_router.get("/dashboard/stats")
-def get_dashboard_stats(current_user: User = Depends(get_current_user)):
+async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    total_complaints =  db.complaints.count_documents({})
-    open_complaints =  db.complaints.count_documents({"status": "PENDING"})
-    in_progress_complaints =  db.complaints.count_documents({"status": "IN_PROGRESS"})
-    resolved_complaints =  db.complaints.count_documents({"status": "RESOLVED"})
+    stats = await storage.complaints.analytics([])
+    by_status = stats["byStatus"]
     
     return {
-        "total_complaints": total_complaints,
-        "open_complaints": open_complaints,
-        "in_progress_complaints": in_progress_complaints,
-        "resolved_complaints": resolved_complaints
+        "total_complaints": stats["total"],
+        "open_complaints": by_status["PENDING"],
+        "in_progress_complaints": by_status["IN_PROGRESS"],
+        "resolved_complaints": by_status["RESOLVED"]
     }
 
 # Officer Management Endpoints
 @api_router.post("/admin/officers", response_model=Officer)
-def create_officer(
+async def create_officer(
     officer_data: OfficerCreate,
     current_user: User = Depends(get_current_user)
 ):
@@ -680,7 +1220,7 @@ def create_officer(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     # Check if username already exists
-    existing_officer = db.officers.find_one({"username": officer_data.username})
+    existing_officer = await storage.officers.get_by_username(officer_data.username)
     if existing_officer:
         raise HTTPException(status_code=400, detail="Username already exists")
     
@@ -693,49 +1233,44 @@ def create_officer(
     )
     
     # Hash password and store separately
-    hashed_password = hash_password(officer_data.password)
+    hashed_password = await hash_password(officer_data.password)
     
     officer_dict = officer.dict()
     officer_dict["password_hash"] = hashed_password
     
-    db.officers.insert_one(officer_dict)
+    try:
+        await storage.officers.insert(officer_dict)
+    except DuplicateKey:
+        raise HTTPException(status_code=400, detail="Username already exists")
     
     # Automatically assign existing "NO_OFFICER" complaints to this officer
     if officer_data.pincodes:
         assigned_count = 0
         for pincode in officer_data.pincodes:
-            result = db.complaints.update_many(
-                {
-                    "pincode": pincode,
-                    "status": "NO_OFFICER"
-                },
-                {
-                    "$set": {
-                        "assigned_to": officer.id,
-                        "status": "PENDING",
-                        "updated_at": datetime.utcnow()
-                    }
-                }
-            )
-            assigned_count += result.modified_count
-            print(f"✅ Assigned {result.modified_count} complaints with pincode {pincode} to officer {officer.full_name}")
+            modified_count = await storage.complaints.assign_unassigned(pincode, officer.id)
+            assigned_count += modified_count
         
         if assigned_count > 0:
-            print(f"🎉 Total {assigned_count} complaints assigned to {officer.full_name}")
+            heatmap.mark_stale()
+            public_cache.invalidate()
+            logger.info(
+                "Assigned waiting complaints to new officer",
+                extra={"officer_id": officer.id, "pincodes": officer_data.pincodes, "count": assigned_count},
+            )
     
     return Officer(**officer_dict)
 
 @api_router.get("/admin/officers", response_model=List[Officer])
-def get_officers(current_user: User = Depends(get_current_user)):
+async def get_officers(current_user: User = Depends(get_current_user)):
     """Get all officers (Admin only)"""
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    officers = list(db.officers.find({"is_active": True}).sort("created_at", -1))
+    officers = await storage.officers.list_active()
     return [Officer(**officer) for officer in officers]
 
 @api_router.put("/admin/officers/{officer_id}", response_model=Officer)
-def update_officer(
+async def update_officer(
     officer_id: str,
     officer_data: OfficerUpdate,
     current_user: User = Depends(get_current_user)
@@ -744,20 +1279,22 @@ def update_officer(
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    officer = db.officers.find_one({"id": officer_id})
-    if not officer:
-        raise HTTPException(status_code=404, detail="Officer not found")
-    
     update_dict = {k: v for k, v in officer_data.dict().items() if v is not None}
-    if update_dict:
-        update_dict["updated_at"] = datetime.utcnow()
-        db.officers.update_one({"id": officer_id}, {"$set": update_dict})
+    if not update_dict:
+        officer = await storage.officers.get(officer_id)
+        if not officer:
+            raise HTTPException(status_code=404, detail="Officer not found")
+        return Officer(**officer)
     
-    updated_officer = db.officers.find_one({"id": officer_id})
+    update_dict["updated_at"] = datetime.utcnow()
+    updated_officer = await storage.officers.update(officer_id, update_dict, revoke_tokens=True)
+    if not updated_officer:
+        raise HTTPException(status_code=404, detail="Officer not found")
+    revoke_tokens(officer_id, updated_officer["token_version"])
     return Officer(**updated_officer)
 
 @api_router.put("/admin/officers/{officer_id}/password")
-def update_officer_password(
+async def update_officer_password(
     officer_id: str,
     password_data: OfficerPasswordUpdate,
     current_user: User = Depends(get_current_user)
@@ -766,20 +1303,22 @@ def update_officer_password(
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    officer = db.officers.find_one({"id": officer_id})
+    officer = await storage.officers.get(officer_id)
     if not officer:
         raise HTTPException(status_code=404, detail="Officer not found")
     
-    hashed_password = hash_password(password_data.new_password)
-    db.officers.update_one(
-        {"id": officer_id}, 
-        {"$set": {"password_hash": hashed_password, "updated_at": datetime.utcnow()}}
+    hashed_password = await hash_password(password_data.new_password)
+    updated_officer = await storage.officers.update(
+        officer_id,
+        {"password_hash": hashed_password, "updated_at": datetime.utcnow()},
+        revoke_tokens=True,
     )
+    revoke_tokens(officer_id, updated_officer["token_version"])
     
     return {"message": "Password updated successfully"}
 
 @api_router.delete("/admin/officers/{officer_id}")
-def deactivate_officer(
+async def deactivate_officer(
     officer_id: str,
     current_user: User = Depends(get_current_user)
 ):
@@ -787,19 +1326,19 @@ def deactivate_officer(
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    officer = db.officers.find_one({"id": officer_id})
-    if not officer:
-        raise HTTPException(status_code=404, detail="Officer not found")
-    
-    db.officers.update_one(
-        {"id": officer_id}, 
-        {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
+    updated_officer = await storage.officers.update(
+        officer_id,
+        {"is_active": False, "updated_at": datetime.utcnow()},
+        revoke_tokens=True,
     )
+    if not updated_officer:
+        raise HTTPException(status_code=404, detail="Officer not found")
+    revoke_tokens(officer_id, updated_officer["token_version"])
     
     return {"message": "Officer deactivated successfully"}
 
 @api_router.get("/admin/officers/{officer_id}/pincodes")
-def get_officer_pincodes(
+async def get_officer_pincodes(
     officer_id: str,
     current_user: User = Depends(get_current_user)
 ):
@@ -807,7 +1346,7 @@ def get_officer_pincodes(
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    officer = db.officers.find_one({"id": officer_id})
+    officer = await storage.officers.get(officer_id)
     if not officer:
         raise HTTPException(status_code=404, detail="Officer not found")
     
@@ -815,113 +1354,151 @@ def get_officer_pincodes(
 
 # Officer Login Endpoint
 @api_router.post("/officer/login", response_model=Token)
-def officer_login(username: str = Form(...), password: str = Form(...)):
+async def officer_login(username: str = Form(...), password: str = Form(...)):
     """Login for officers and admin"""
     
     # Check if this is admin login
     if username == "admin" and password == os.getenv("ADMIN_PASSWORD", "admin"):
-        user_obj = User(
-            id="admin",
-            email="admin@cmrp.com",
-            full_name="Administrator",
-            phone="",
-            role="ADMIN",
-            officerRequestStatus="NONE",
-            locationsAssigned=[],
-            created_at=datetime.utcnow(),
-            is_active=True
-        )
-        access_token = create_access_token(data={"sub": user_obj.email})
-        return Token(access_token=access_token, token_type="bearer", user=user_obj)
+        return issue_tokens(admin_principal())
     
     # Find officer in database
-    officer = db.officers.find_one({"username": username, "is_active": True})
+    officer = await storage.officers.get_by_username(username, active_only=True)
     if not officer:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Verify password
-    if not verify_password(password, officer["password_hash"]):
+    if not await verify_password(password, officer["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    # Create user object for database officer
-    user_obj = User(
-        id=officer["id"],
-        email=f"{officer['username']}@cmrp.com",
-        full_name=officer["full_name"],
-        phone="",
-        role="OFFICER",
-        officerRequestStatus="NONE",
-        locationsAssigned=officer.get("pincodes", []),
-        created_at=officer.get("created_at", datetime.utcnow()),
-        is_active=True
-    )
-    
-    # Generate token
-    access_token = create_access_token(data={"sub": user_obj.email})
-    return Token(access_token=access_token, token_type="bearer", user=user_obj)
+    # Generate tokens for database officer
+    return issue_tokens(officer_principal(officer), officer.get("token_version", 0))
 
 # Officer Complaints
 @api_router.get("/officer/complaints")
-def officer_complaints(status: Optional[str] = None, page: int = 1, page_size: int = 20, current_user: User = Depends(get_current_user)):
-    print(f"🔍 Officer complaints request - User ID: {current_user.id}, Role: {current_user.role}")
-    print(f"🔍 User object: {current_user}")
+async def officer_complaints(
+    request: Request,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = 20,
+    include_total: bool = False,
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role != "OFFICER":
-        print(f"❌ Access denied - Role: {current_user.role}")
         raise HTTPException(status_code=403, detail="Officer access required")
-    if page < 1 or page_size < 1 or page_size > 100:
+    if page_size > 100:
         raise HTTPException(status_code=400, detail="Invalid pagination params")
     # Filter complaints assigned to this officer
-    filters = {"assigned_to": current_user.id}
-    print(f"🔍 Looking for complaints assigned to: {current_user.id}")
-    if status:
-        filters["status"] = status
-    skip = (page - 1) * page_size
-    cursor = db.complaints.find(filters).sort("created_at", -1).skip(skip).limit(page_size)
-    items = list(cursor)
-    total = db.complaints.count_documents(filters)
-    
-    # Convert to Complaint objects for proper JSON serialization
-    complaint_objects = [Complaint(**item) for item in items]
-    
-    # Debug: Check all complaints in database
-    all_complaints = list(db.complaints.find({}, {"id": 1, "assigned_to": 1, "pincode": 1, "title": 1}))
-    print(f"🔍 All complaints in database: {all_complaints}")
-    print(f"🔍 Found {total} complaints for officer {current_user.id}")
-    
-    return {"items": [item.dict() for item in complaint_objects], "page": page, "pageSize": page_size, "total": total}
+    query = ComplaintQuery(assigned_to=current_user.id, status=status)
+    projection, shape = complaint_fields(fields)
+    # Covered by the (assigned_to, status, updated_at) index
+    count, updated_at = await storage.complaints.version(query)
+    etag = make_etag("officer", current_user.id, status, cursor, page_size, fields, include_total, count, updated_at)
+    # ETag only: see conditional.py on why listings ignore If-Modified-Since
+    headers = validator_headers(etag, None, private=True)
+    if is_fresh(request.headers, etag, None):
+        return not_modified(headers)
+    items, next_cursor, total = await complaint_page(query, cursor, page_size, include_total, projection)
+    
+    logger.debug("Officer queue page", extra={"officer_id": current_user.id, "count": len(items), "status": status})
+    
+    page = {"items": [shape(item) for item in items], "pageSize": page_size, "nextCursor": next_cursor}
+    if total is not None:
+        page["total"] = total
+    return OrjsonResponse(page, headers=headers)
 
 # Public endpoint to get officers for displaying names (read-only)
 @api_router.get("/officers", response_model=List[Officer])
-def get_officers_public(current_user: User = Depends(get_current_user)):
+async def get_officers_public(current_user: User = Depends(get_current_user)):
     """Get all officers (read-only, for displaying names)"""
-    officers = list(db.officers.find({"is_active": True}).sort("created_at", -1))
+    officers = await storage.officers.list_active()
     return [Officer(**officer) for officer in officers]
 
-# Include the router in the main app
-app.include_router(api_router)
-
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Last-Modified", "X-Heatmap-Extent", "X-Heatmap-Resolution"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# gzip/brotli for JSON and export bodies; see compression.py
+compression_stats = CompressionStats()
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
+    cache_entries=int(os.getenv("COMPRESSION_CACHE_ENTRIES", "32")),
+    stats=compression_stats,
 )
-logger = logging.getLogger(__name__)
 
-# @app.on_event("shutdown")
-# async def shutdown_db_client():
-#     client.close()
+@app.on_event("startup")
+async def start_index_build():
+    if not ENSURE_INDEXES_ON_STARTUP:
+        return
+
+    async def build():
+        try:
+            log_report(await storage.ensure_indexes())
+        except Exception:
+            logger.exception("Index build failed")
+
+    # Don't hold up startup: the server can serve (slowly) while indexes build
+    app.state.index_build = asyncio.create_task(build())
+
+@app.on_event("startup")
+async def start_heatmap_rebuilds():
+    app.state.heatmap_rebuild = asyncio.create_task(heatmap.run(storage, HEATMAP_REBUILD_SECONDS))
+
+@app.on_event("shutdown")
+def stop_heatmap_rebuilds():
+    app.state.heatmap_rebuild.cancel()
+
+@app.on_event("startup")
+async def start_performance_job():
+    app.state.performance_job = asyncio.create_task(
+        performance_job.run(storage, PERFORMANCE_INTERVAL_SECONDS, PERFORMANCE_FULL_SECONDS)
+    )
+
+@app.on_event("shutdown")
+def stop_performance_job():
+    app.state.performance_job.cancel()
+
+@app.on_event("startup")
+async def start_stats_reconciliation():
+    async def run():
+        while True:
+            try:
+                await reconcile_stats()
+            except Exception:
+                logger.exception("Complaint stats reconciliation failed")
+            await asyncio.sleep(STATS_RECONCILE_SECONDS)
+
+    app.state.stats_reconciliation = asyncio.create_task(run())
+
+@app.on_event("shutdown")
+def stop_stats_reconciliation():
+    app.state.stats_reconciliation.cancel()
+
+@app.on_event("shutdown")
+def stop_public_cache_refreshes():
+    public_cache.close()
+
+@app.on_event("shutdown")
+def shutdown_password_service():
+    password_service.shutdown()
+
+@app.on_event("shutdown")
+def shutdown_db_client():
+    storage.close()
+
+@app.on_event("shutdown")
+def shutdown_logging():
+    logging_config.shutdown_logging()
 
 # Officer Request Flow
 @api_router.post("/users/request-officer")
-def request_officer(
+async def request_officer(
     full_name: str = Form(...),
     phone: str = Form(...),
     locations: str = Form(""),
@@ -931,7 +1508,7 @@ def request_officer(
 ):
     if current_user.role not in ["CITIZEN", "citizen"]:
         raise HTTPException(status_code=403, detail="Only citizens can request officer role")
-    user_doc = db.users.find_one({"id": current_user.id})
+    user_doc = await storage.users.get(current_user.id)
     if not user_doc:
         raise HTTPException(status_code=404, detail="User not found")
     status_val = user_doc.get("officerRequestStatus", "NONE")
@@ -941,10 +1518,7 @@ def request_officer(
     if id_proof is not None:
         ext = Path(id_proof.filename).suffix
         filename = f"officer_request_{current_user.id}_{uuid.uuid4()}{ext}"
-        file_path = UPLOAD_DIR / filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(id_proof.file, buffer)
-        id_proof_url = f"/uploads/{filename}"
+        id_proof_url = await run_in_threadpool(save_upload, id_proof, filename)
     request_payload = {
         "officerRequestStatus": "PENDING",
         "updated_at": datetime.utcnow(),
@@ -957,51 +1531,59 @@ def request_officer(
             "submittedAt": datetime.utcnow(),
         }
     }
-    db.users.update_one({"id": current_user.id}, {"$set": request_payload})
+    await storage.users.update(current_user.id, request_payload)
     return {"success": True, "idProofUrl": id_proof_url}
 
 @api_router.get("/admin/officer-requests")
-def list_officer_requests(current_user: User = Depends(get_current_user)):
+async def list_officer_requests(current_user: User = Depends(get_current_user)):
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
-    users = list(db.users.find({"officerRequestStatus": "PENDING"}, {"password": 0}))
+    users = await storage.users.list_pending_officer_requests()
     return users
 
 @api_router.post("/admin/approve-officer/{user_id}")
-def approve_officer(user_id: str, current_user: User = Depends(get_current_user)):
+async def approve_officer(user_id: str, current_user: User = Depends(get_current_user)):
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
-    res = db.users.update_one({"id": user_id}, {"$set": {"role": "OFFICER", "officerRequestStatus": "APPROVED", "updated_at": datetime.utcnow()}})
-    if res.matched_count == 0:
+    res = await storage.users.update(
+        user_id,
+        {"role": "OFFICER", "officerRequestStatus": "APPROVED", "updated_at": datetime.utcnow()},
+        revoke_tokens=True,
+    )
+    if res is None:
         raise HTTPException(status_code=404, detail="User not found")
+    revoke_tokens(user_id, res["token_version"])
     return {"success": True}
 
 @api_router.post("/admin/reject-officer/{user_id}")
-def reject_officer(user_id: str, current_user: User = Depends(get_current_user)):
+async def reject_officer(user_id: str, current_user: User = Depends(get_current_user)):
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
-    res = db.users.update_one({"id": user_id}, {"$set": {"officerRequestStatus": "REJECTED", "updated_at": datetime.utcnow()}})
-    if res.matched_count == 0:
+    res = await storage.users.update(
+        user_id,
+        {"officerRequestStatus": "REJECTED", "updated_at": datetime.utcnow()},
+        revoke_tokens=True,
+    )
+    if res is None:
         raise HTTPException(status_code=404, detail="User not found")
+    revoke_tokens(user_id, res["token_version"])
     return {"success": True}
 
 
 # Test endpoint
 @api_router.get("/test")
-def test_endpoint():
+async def test_endpoint():
     return {"message": "Test endpoint is working"}
 
 # Migration endpoint to assign existing complaints to officers
 @api_router.post("/admin/migrate-complaints")
-def migrate_complaints(current_user: User = Depends(get_current_user)):
+async def migrate_complaints(current_user: User = Depends(get_current_user)):
     if current_user.role not in ["ADMIN", "admin"]:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    print("🔄 Starting complaint migration...")
-    
     # Get all complaints
-    complaints = list(db.complaints.find({}))
-    print(f"📊 Found {len(complaints)} complaints to migrate")
+    complaints = [c async for c in storage.complaints.iter_all({"id": 1, "pincode": 1})]
+    logger.info("Starting complaint migration", extra={"count": len(complaints)})
     
     updated_count = 0
     
@@ -1014,39 +1596,24 @@ def migrate_complaints(current_user: User = Depends(get_current_user)):
         status = "NO_OFFICER"
         
         if pincode:
-            officer = db.officers.find_one({
-                "pincodes": pincode,
-                "is_active": True
-            })
+            officer = await storage.officers.find_for_pincode(pincode)
             if officer:
                 assigned_to = officer["id"]
                 status = "PENDING"
-                print(f"✅ Assigning complaint {complaint_id} (pincode: {pincode}) to {officer['full_name']}")
-            else:
-                print(f"⚠️ No officer found for complaint {complaint_id} (pincode: {pincode})")
-        else:
-            print(f"⚠️ No pincode for complaint {complaint_id}")
         
         # Update the complaint
-        result = db.complaints.update_one(
-            {"id": complaint_id},
-            {
-                "$set": {
-                    "assigned_to": assigned_to,
-                    "status": status,
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
-        
-        if result.modified_count > 0:
+        if await storage.complaints.set_assignment(complaint_id, assigned_to, status):
             updated_count += 1
     
-    print(f"🎉 Migration complete! Updated {updated_count} complaints")
+    logger.info("Complaint migration complete", extra={"updated": updated_count})
+    heatmap.mark_stale()
+    public_cache.invalidate()
     
     # Verify the results
-    assigned_count = db.complaints.count_documents({"assigned_to": {"$ne": None}})
-    no_officer_count = db.complaints.count_documents({"status": "NO_OFFICER"})
+    assigned_count, no_officer_count = await asyncio.gather(
+        storage.complaints.count_assigned(),
+        storage.complaints.count(ComplaintQuery(status="NO_OFFICER")),
+    )
     
     return {
         "message": f"Migration complete! Updated {updated_count} complaints",
@@ -1056,198 +1623,75 @@ def migrate_complaints(current_user: User = Depends(get_current_user)):
 
 # Test endpoint
 @api_router.get("/test-analytics")
-def test_analytics():
-    return {"message": "Analytics endpoint is working", "total": db.complaints.count_documents({})}
+async def test_analytics():
+    return {"message": "Analytics endpoint is working", "total": await storage.complaints.count(ComplaintQuery())}
 
 # Public Analytics
 @api_router.get("/analytics/public")
-def public_analytics():
-    total = db.complaints.count_documents({})
-    by_status = {
-        "PENDING": db.complaints.count_documents({"status": "PENDING"}),
-        "IN_PROGRESS": db.complaints.count_documents({"status": "IN_PROGRESS"}),
-        "RESOLVED": db.complaints.count_documents({"status": "RESOLVED"}),
-    }
-    
-    # Get category breakdown
-    category_pipeline = [
-        {"$group": {
-            "_id": "$category", 
-            "total": {"$sum": 1},
-            "resolved": {"$sum": {"$cond": [{"$eq": ["$status", "RESOLVED"]}, 1, 0]}}
-        }},
-        {"$sort": {"total": -1}},
-        {"$limit": 10}
-    ]
-    by_category = [{"name": doc.get("_id", "Unknown"), "total": doc.get("total", 0), "resolved": doc.get("resolved", 0)} for doc in db.complaints.aggregate(category_pipeline)]
-    
-    # Get 7-day trend
-    today = datetime.utcnow().date()
-    trend = []
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        start = datetime(day.year, day.month, day.day)
-        end = start + timedelta(days=1)
-        count = db.complaints.count_documents({"created_at": {"$gte": start, "$lt": end}})
-        trend.append({"date": day.isoformat(), "count": count})
-    
-    # Get top locations
-    location_pipeline = [
-        {"$group": {"_id": "$address", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 5},
-    ]
-    top_locations = [{"location": doc.get("_id", "Unknown"), "count": doc.get("count", 0)} for doc in db.complaints.aggregate(location_pipeline)]
-    
-    return {
-        "total": total, 
-        "byStatus": by_status, 
-        "byCategory": by_category,
-        "trend7d": trend, 
-        "topLocations": top_locations
-    }
-
+async def public_analytics():
+    async def build():
+        stats = await storage.complaints.analytics(
+            ["byCategory", "trend", "topLocations"], days=7, category_limit=10, location_limit=5
+        )
 
-# Officer Management Endpoints
-@api_router.post("/admin/officers", response_model=Officer)
-def create_officer(
-    officer_data: OfficerCreate,
-    current_user: User = Depends(get_current_user)
-):
-    """Create a new officer (Admin only)"""
-    if current_user.role not in ["ADMIN", "admin"]:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    # Check if username already exists
-    existing_officer = db.officers.find_one({"username": officer_data.username})
-    if existing_officer:
-        raise HTTPException(status_code=400, detail="Username already exists")
-    
-    # Create officer
-    officer = Officer(
-        username=officer_data.username,
-        full_name=officer_data.full_name,
-        pincodes=officer_data.pincodes,
-        created_by=current_user.id
-    )
-    
-    # Hash password and store separately
-    hashed_password = hash_password(officer_data.password)
-    
-    officer_dict = officer.dict()
-    officer_dict["password_hash"] = hashed_password
-    
-    db.officers.insert_one(officer_dict)
-    
-    # Automatically assign existing "NO_OFFICER" complaints to this officer
-    if officer_data.pincodes:
-        assigned_count = 0
-        for pincode in officer_data.pincodes:
-            result = db.complaints.update_many(
-                {
-                    "pincode": pincode,
-                    "status": "NO_OFFICER"
-                },
-                {
-                    "$set": {
-                        "assigned_to": officer.id,
-                        "status": "PENDING",
-                        "updated_at": datetime.utcnow()
-                    }
-                }
-            )
-            assigned_count += result.modified_count
-            print(f"✅ Assigned {result.modified_count} complaints with pincode {pincode} to officer {officer.full_name}")
-        
-        if assigned_count > 0:
-            print(f"🎉 Total {assigned_count} complaints assigned to {officer.full_name}")
-    
-    return Officer(**officer_dict)
+        return OrjsonResponse({
+            "total": stats["total"],
+            "byStatus": stats["byStatus"],
+            "byCategory": stats["byCategory"],
+            "trend7d": stats["trend"],
+            "topLocations": stats["topLocations"]
+        })
 
-@api_router.get("/admin/officers", response_model=List[Officer])
-def get_officers(current_user: User = Depends(get_current_user)):
-    """Get all officers (Admin only)"""
-    if current_user.role not in ["ADMIN", "admin"]:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    officers = list(db.officers.find({"is_active": True}).sort("created_at", -1))
-    return [Officer(**officer) for officer in officers]
+    return await cached_response(("analytics",), build)
 
-@api_router.put("/admin/officers/{officer_id}", response_model=Officer)
-def update_officer(
-    officer_id: str,
-    officer_data: OfficerUpdate,
-    current_user: User = Depends(get_current_user)
-):
-    """Update officer details (Admin only)"""
-    if current_user.role not in ["ADMIN", "admin"]:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    officer = db.officers.find_one({"id": officer_id})
-    if not officer:
-        raise HTTPException(status_code=404, detail="Officer not found")
-    
-    update_dict = {k: v for k, v in officer_data.dict().items() if v is not None}
-    if update_dict:
-        update_dict["updated_at"] = datetime.utcnow()
-        db.officers.update_one({"id": officer_id}, {"$set": update_dict})
-    
-    updated_officer = db.officers.find_one({"id": officer_id})
-    return Officer(**updated_officer)
+# Longest range /analytics/trend serves from day buckets; hourly trends are bounded by their retention
+TREND_MAX_DAYS = 1096
 
-@api_router.put("/admin/officers/{officer_id}/password")
-def update_officer_password(
-    officer_id: str,
-    password_data: OfficerPasswordUpdate,
-    current_user: User = Depends(get_current_user)
+def parse_trend_bound(value: str, name: str, end: bool = False) -> datetime:
+    """YYYY-MM-DDTHH, or YYYY-MM-DD meaning the first (or, for the end, last) hour of that UTC day"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H")
+    except ValueError:
+        pass
+    try:
+        day = datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be YYYY-MM-DD or YYYY-MM-DDTHH")
+    return day + timedelta(hours=23) if end else day
+
+# Public complaint trend over any range, from the hourly and daily buckets (see storage/stats.py)
+@api_router.get("/analytics/trend")
+async def analytics_trend(
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+    granularity: str = "day",  # hour, day, week or month
 ):
-    """Update officer password (Admin only)"""
-    if current_user.role not in ["ADMIN", "admin"]:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    officer = db.officers.find_one({"id": officer_id})
-    if not officer:
-        raise HTTPException(status_code=404, detail="Officer not found")
-    
-    hashed_password = hash_password(password_data.new_password)
-    db.officers.update_one(
-        {"id": officer_id}, 
-        {"$set": {"password_hash": hashed_password, "updated_at": datetime.utcnow()}}
-    )
-    
-    return {"message": "Password updated successfully"}
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    last = parse_trend_bound(to, "to", end=True) if to else now
+    if from_:
+        first = parse_trend_bound(from_, "from")
+    else:
+        first = last - (timedelta(hours=23) if granularity == "hour" else timedelta(days=29))
+    if first > last:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if granularity == "hour" and first < now - timedelta(days=HOUR_RETENTION_DAYS):
+        raise HTTPException(status_code=400, detail=f"Hourly trends cover the last {HOUR_RETENTION_DAYS} days; use day granularity")
+    if (last - first).days > TREND_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Trends span at most {TREND_MAX_DAYS} days")
+
+    async def build():
+        buckets = await storage.complaints.trend(granularity, first, last)
+        if buckets is None:
+            # Counters are rebuilt at startup; see reconcile_stats
+            raise HTTPException(status_code=503, detail="Trend data is being rebuilt, retry shortly", headers={"Retry-After": "30"})
+        return OrjsonResponse(
+            {"granularity": granularity, "from": first, "to": last, "buckets": buckets},
+            headers={"Cache-Control": PUBLIC_CACHE_CONTROL},
+        )
 
-@api_router.delete("/admin/officers/{officer_id}")
-def deactivate_officer(
-    officer_id: str,
-    current_user: User = Depends(get_current_user)
-):
-    """Deactivate officer (Admin only)"""
-    if current_user.role not in ["ADMIN", "admin"]:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    officer = db.officers.find_one({"id": officer_id})
-    if not officer:
-        raise HTTPException(status_code=404, detail="Officer not found")
-    
-    db.officers.update_one(
-        {"id": officer_id}, 
-        {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
-    )
-    
-    return {"message": "Officer deactivated successfully"}
+    return await cached_response(("trend", granularity, first, last), build)
 
-@api_router.get("/admin/officers/{officer_id}/pincodes")
-def get_officer_pincodes(
-    officer_id: str,
-    current_user: User = Depends(get_current_user)
-):
-    """Get pincodes assigned to an officer (Admin only)"""
-    if current_user.role not in ["ADMIN", "admin"]:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    officer = db.officers.find_one({"id": officer_id})
-    if not officer:
-        raise HTTPException(status_code=404, detail="Officer not found")
-    
-    return {"pincodes": officer.get("pincodes", [])}
+# Include the router in the main app once every route is registered
+app.include_router(api_router)
@@ -0,0 +1,60 @@
+"""
+Async data-access layer used by server.py.
+
+create_storage picks a backend by name: "mongo" (default) or "memory".
+"""
+
+from typing import Optional
+
+from .base import (
+    CommentRepository,
+    ComplaintEntryRepository,
+    ComplaintQuery,
+    ComplaintRepository,
+    DuplicateKey,
+    OfficerRepository,
+    PerformanceRepository,
+    Storage,
+    UserRepository,
+    decode_cursor,
+    encode_cursor,
+)
+from .indexes import INDEXES, IndexReport, IndexSpec, check_indexes, ensure_indexes
+from .memory import MemoryStorage
+from .mongo import MongoStorage
+
+BACKENDS = ("mongo", "memory")
+
+
+def create_storage(backend: str = "mongo", mongo_url: Optional[str] = None, db_name: Optional[str] = None) -> Storage:
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "mongo":
+        if not mongo_url or not db_name:
+            raise ValueError("The mongo storage backend needs MONGO_URL and DB_NAME")
+        return MongoStorage(mongo_url, db_name)
+    raise ValueError(f"Unknown storage backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+
+__all__ = [
+    "BACKENDS",
+    "CommentRepository",
+    "ComplaintEntryRepository",
+    "ComplaintQuery",
+    "ComplaintRepository",
+    "DuplicateKey",
+    "INDEXES",
+    "IndexReport",
+    "IndexSpec",
+    "MemoryStorage",
+    "MongoStorage",
+    "OfficerRepository",
+    "PerformanceRepository",
+    "Storage",
+    "UserRepository",
+    "check_indexes",
+    "create_storage",
+    "decode_cursor",
+    "encode_cursor",
+    "ensure_indexes",
+]
@@ -0,0 +1,125 @@
+"""
+Dashboard analytics in one pass over the complaints.
+
+The analytics endpoints need totals, a status breakdown, the largest
+categories, a daily trend and the most reported localities.
+ComplaintRepository.analytics answers any subset of these in one go. Mongo
+uses a single $facet aggregation: one round-trip and one collection scan,
+where it used to take a count_documents per number. The memory backend
+makes one pass over its rows. Both produce the same facet documents, which
+``from_facets`` turns into the API shape, so the backends cannot drift
+apart.
+
+Once the materialized counters (storage/stats.py) have been reconciled,
+analytics reads those instead; this scan is the fallback until then.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Always computed: the total is the sum of the status counts
+BY_STATUS = "byStatus"
+BY_CATEGORY = "byCategory"
+TREND = "trend"
+TOP_LOCATIONS = "topLocations"
+SECTIONS = (BY_STATUS, BY_CATEGORY, TREND, TOP_LOCATIONS)
+
+# Reported even when zero, as the dashboards expect
+STATUSES = ("PENDING", "IN_PROGRESS", "RESOLVED")
+
+
+def trend_days(days: int, today: Optional[date] = None) -> List[date]:
+    """The last ``days`` UTC dates, oldest first, ending today"""
+    today = today or datetime.utcnow().date()
+    return [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+
+
+def day_bounds(days: List[date]):
+    first, last = days[0], days[-1]
+    return datetime(first.year, first.month, first.day), datetime(last.year, last.month, last.day) + timedelta(days=1)
+
+
+def facet_pipeline(sections: Sequence[str], days: List[date], category_limit: int, location_limit: int) -> List[dict]:
+    facets = {BY_STATUS: [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]}
+    if BY_CATEGORY in sections:
+        facets[BY_CATEGORY] = [
+            {"$group": {
+                "_id": "$category",
+                "total": {"$sum": 1},
+                "resolved": {"$sum": {"$cond": [{"$eq": ["$status", "RESOLVED"]}, 1, 0]}},
+            }},
+            {"$sort": {"total": -1}},
+            {"$limit": category_limit},
+        ]
+    if TREND in sections:
+        start, end = day_bounds(days)
+        facets[TREND] = [
+            {"$match": {"created_at": {"$gte": start, "$lt": end}}},
+            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}}, "count": {"$sum": 1}}},
+        ]
+    if TOP_LOCATIONS in sections:
+        # Groups on the locality key (see storage/locality.py), not raw addresses
+        facets[TOP_LOCATIONS] = [
+            {"$match": {"locality": {"$ne": None}}},
+            {"$group": {"_id": "$locality", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": location_limit},
+        ]
+    return [{"$facet": facets}]
+
+
+def scan_facets(rows: Iterable[dict], sections: Sequence[str], days: List[date], category_limit: int, location_limit: int) -> dict:
+    """facet_pipeline's output computed in Python, for backends without an aggregation engine"""
+    statuses: Dict[object, int] = {}
+    categories: Dict[object, List[int]] = {}
+    trend: Dict[str, int] = {}
+    localities: Dict[object, int] = {}
+    start, end = day_bounds(days) if TREND in sections else (None, None)
+    for doc in rows:
+        status = doc.get("status")
+        statuses[status] = statuses.get(status, 0) + 1
+        if BY_CATEGORY in sections:
+            counts = categories.setdefault(doc.get("category"), [0, 0])
+            counts[0] += 1
+            counts[1] += status == "RESOLVED"
+        if TREND in sections:
+            created_at = doc.get("created_at")
+            if created_at and start <= created_at < end:
+                key = created_at.strftime("%Y-%m-%d")
+                trend[key] = trend.get(key, 0) + 1
+        if TOP_LOCATIONS in sections and doc.get("locality") is not None:
+            localities[doc["locality"]] = localities.get(doc["locality"], 0) + 1
+
+    facets = {BY_STATUS: [{"_id": status, "count": count} for status, count in statuses.items()]}
+    if BY_CATEGORY in sections:
+        top = sorted(categories.items(), key=lambda item: item[1][0], reverse=True)[:category_limit]
+        facets[BY_CATEGORY] = [{"_id": name, "total": total, "resolved": resolved} for name, (total, resolved) in top]
+    if TREND in sections:
+        facets[TREND] = [{"_id": day, "count": count} for day, count in trend.items()]
+    if TOP_LOCATIONS in sections:
+        top = sorted(localities.items(), key=lambda item: item[1], reverse=True)[:location_limit]
+        facets[TOP_LOCATIONS] = [{"_id": locality, "count": count} for locality, count in top]
+    return facets
+
+
+def from_facets(facets: dict, sections: Sequence[str], days: List[date]) -> dict:
+    """The API shape: total, byStatus and whichever other sections were asked for"""
+    statuses = {row["_id"]: row["count"] for row in facets.get(BY_STATUS, [])}
+    result = {
+        "total": sum(statuses.values()),
+        BY_STATUS: {status: statuses.get(status, 0) for status in STATUSES},
+    }
+    if BY_CATEGORY in sections:
+        result[BY_CATEGORY] = [
+            {"name": row.get("_id", "Unknown"), "total": row.get("total", 0), "resolved": row.get("resolved", 0)}
+            for row in facets.get(BY_CATEGORY, [])
+        ]
+    if TREND in sections:
+        counts = {row["_id"]: row["count"] for row in facets.get(TREND, [])}
+        result[TREND] = [{"date": day.isoformat(), "count": counts.get(day.isoformat(), 0)} for day in days]
+    if TOP_LOCATIONS in sections:
+        result[TOP_LOCATIONS] = [
+            {"location": row.get("_id", "Unknown"), "count": row.get("count", 0)}
+            for row in facets.get(TOP_LOCATIONS, [])
+        ]
+    return result
@@ -0,0 +1,301 @@
+"""
+Interfaces and query types shared by the storage backends.
+
+Route handlers only talk to these interfaces. MongoStorage (storage/mongo.py)
+is the production backend. MemoryStorage (storage/memory.py) keeps everything
+in process, for tests, CI and benchmarking the API without a database.
+
+Documents are plain dicts shaped like the Pydantic models in server.py.
+Projections use MongoDB's {"field": 1} / {"field": 0} syntax on every
+backend.
+"""
+
+import base64
+import binascii
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+
+class ComplaintQuery(BaseModel):
+    """Filters accepted by the complaint listing and counting methods."""
+    status: Optional[str] = None
+    category: Optional[str] = None
+    zone: Optional[str] = None  # matched against the normalized zone_terms, see storage/locality.py
+    public_id: Optional[str] = None
+    user_id: Optional[str] = None
+    assigned_to: Optional[str] = None
+    pincode: Optional[str] = None
+    has_location: bool = False
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    created_before: Optional[datetime] = None  # exclusive upper bound
+    updated_from: Optional[datetime] = None  # complaints written since, for incremental batch jobs
+    # Map queries on the GeoJSON point (see storage/geo.py); coordinates are (lng, lat)
+    bbox: Optional[Tuple[float, float, float, float]] = None  # (min_lng, min_lat, max_lng, max_lat)
+    near: Optional[Tuple[float, float]] = None
+    radius_m: float = 1000.0
+    # LSH band keys (see storage/minhash.py); matches complaints sharing any of them
+    dup_bands: Optional[List[str]] = None
+
+
+# Fields covered by complaint text search, with their relevance weights
+SEARCH_WEIGHTS = (("title", 10), ("address", 3), ("description", 1))
+
+
+class DuplicateKey(Exception):
+    """Raised by insert methods when a unique index rejects the document."""
+
+    def __init__(self, field: Optional[str] = None):
+        super().__init__(f"duplicate value for {field or 'a unique field'}")
+        self.field = field
+
+
+def encode_cursor(timestamp: datetime, entry_id: str) -> str:
+    """Opaque keyset cursor for (timestamp, id) ordered collections"""
+    raw = f"{timestamp.isoformat()}|{entry_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def cursor_projection(projection: Optional[dict]) -> Tuple[Optional[dict], List[str]]:
+    """
+    Make sure an inclusion projection returns the fields a complaint cursor is
+    built from. Returns the projection to query with and the fields to strip
+    again before handing documents back.
+    """
+    if not projection or not any(value for key, value in projection.items() if key != "_id"):
+        return projection, []
+    added = [field for field in ("created_at", "id") if not projection.get(field)]
+    return {**projection, **{field: 1 for field in added}}, added
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError on anything malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, entry_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), entry_id
+    except (UnicodeError, binascii.Error, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+class ComplaintRepository(ABC):
+    @abstractmethod
+    async def get(self, complaint_id: str, user_id: Optional[str] = None, assigned_to: Optional[str] = None) -> Optional[dict]:
+        """Complaint by id, optionally only if it belongs to a user or officer"""
+
+    @abstractmethod
+    async def get_by_public_id(self, public_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def public_id_exists(self, public_id: str) -> bool: ...
+
+    @abstractmethod
+    async def exists(self, complaint_id: str) -> bool: ...
+
+    @abstractmethod
+    async def insert(self, complaint: dict) -> None:
+        """Raises DuplicateKey if id or public_id is taken"""
+
+    @abstractmethod
+    async def update(self, complaint_id: str, fields: dict) -> Optional[dict]:
+        """Set fields and return the updated document, or None if missing"""
+
+    @abstractmethod
+    async def touch(self, complaint_id: str, increment: Optional[str] = None) -> None:
+        """Bump updated_at, and optionally a counter, after a comment or note is added"""
+
+    async def find(self, query: ComplaintQuery, limit: int = 1000, projection: Optional[dict] = None) -> List[dict]:
+        """First ``limit`` matching complaints, newest first"""
+        items, _ = await self.page(query, limit=limit, projection=projection)
+        return items
+
+    @abstractmethod
+    async def page(self, query: ComplaintQuery, limit: int = 100, cursor: Optional[str] = None, projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        One page of matching complaints, newest first, and the cursor for the
+        next page (None on the last one). Keyset on (created_at, id), so deep
+        pages cost the same as the first. Raises ValueError on a bad cursor.
+        """
+
+    @abstractmethod
+    async def count(self, query: ComplaintQuery) -> int: ...
+
+    @abstractmethod
+    async def version(self, query: ComplaintQuery) -> Tuple[int, Optional[datetime]]:
+        """
+        Count and newest updated_at of the matching complaints. Every write
+        bumps updated_at, so this changes whenever the result would; it is
+        the validator for conditional GETs and is answered from an index.
+        """
+
+    @abstractmethod
+    def iter_all(self, projection: Optional[dict] = None) -> AsyncIterator[dict]: ...
+
+    @abstractmethod
+    def stream(self, query: ComplaintQuery, projection: Optional[dict] = None, batch_size: int = 1000) -> AsyncIterator[dict]:
+        """Every matching complaint, newest first, without holding the result set in memory"""
+
+    @abstractmethod
+    async def search(self, text: str, query: ComplaintQuery, limit: int = 20, projection: Optional[dict] = None) -> List[dict]:
+        """
+        Complaints matching ``text`` in SEARCH_WEIGHTS fields and the query
+        filters, best first. Each document carries its relevance as "score".
+        Terms are OR-ed; a leading "-" excludes complaints with that term.
+        """
+
+    @abstractmethod
+    async def assign_unassigned(self, pincode: str, officer_id: str) -> int:
+        """Hand NO_OFFICER complaints for a pincode to a newly created officer"""
+
+    @abstractmethod
+    async def set_assignment(self, complaint_id: str, assigned_to: Optional[str], status: str) -> bool: ...
+
+    @abstractmethod
+    async def count_assigned(self) -> int: ...
+
+    @abstractmethod
+    async def analytics(
+        self,
+        sections: Sequence[str],
+        days: int = 7,
+        category_limit: int = 10,
+        location_limit: int = 5,
+        today: Optional[date] = None,
+    ) -> dict:
+        """
+        Dashboard figures: always total and byStatus, plus any of byCategory
+        ([{name, total, resolved}] for the largest categories), trend (daily
+        counts for the last ``days`` days) and topLocations ([{location,
+        count}] for the most reported localities). Read from the complaint
+        stats counters (storage/stats.py) once they have been reconciled,
+        otherwise computed in one pass (storage/analytics.py).
+        """
+
+    @abstractmethod
+    async def trend(self, granularity: str, first: datetime, last: datetime) -> Optional[List[dict]]:
+        """
+        Complaints created from first to last, per hour, day, week or month
+        ([{start, count, byStatus, byCategory}], see stats.trend). Read
+        from the time buckets; None until the counters have been reconciled.
+        """
+
+    @abstractmethod
+    async def reconcile_stats(self) -> dict:
+        """
+        Compact aged-out hour buckets, recompute the complaint stats
+        counters from the complaints, repair any that drifted and report
+        what changed (stats.report).
+        """
+
+    @abstractmethod
+    async def clusters(self, bbox: Tuple[float, float, float, float], zoom: int) -> Tuple[int, List[dict]]:
+        """
+        The grid level used for a map zoom and the non-empty clusters inside
+        bbox at that level, [{id, count, latitude, longitude, statuses}].
+        Read from the precomputed grid (storage/clusters.py), never more
+        than clusters.MAX_CELLS of them.
+        """
+
+
+class ComplaintEntryRepository(ABC):
+    """
+    Append-only entries attached to a complaint (comments, work notes).
+
+    Entries are read in (timestamp, id) order with a keyset cursor, so a
+    client can poll for "everything after what I already have" cheaply.
+    """
+
+    @abstractmethod
+    async def add(self, entry: dict) -> None: ...
+
+    @abstractmethod
+    async def list(self, complaint_id: str, since: Optional[str] = None, limit: int = 50) -> Tuple[List[dict], Optional[str]]:
+        """Entries after ``since`` (oldest first) and the cursor to poll with next"""
+
+
+class CommentRepository(ComplaintEntryRepository):
+    @abstractmethod
+    async def list(self, complaint_id: str, since: Optional[str] = None, limit: int = 50, include_internal: bool = True) -> Tuple[List[dict], Optional[str]]: ...
+
+
+class OfficerRepository(ABC):
+    @abstractmethod
+    async def get(self, officer_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def get_by_username(self, username: str, active_only: bool = False) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def find_for_pincode(self, pincode: str) -> Optional[dict]:
+        """Active officer responsible for a pincode, if any"""
+
+    @abstractmethod
+    async def insert(self, officer: dict) -> None:
+        """Raises DuplicateKey if id or username is taken"""
+
+    @abstractmethod
+    async def update(self, officer_id: str, fields: dict, revoke_tokens: bool = False) -> Optional[dict]:
+        """Set fields (bumping token_version if revoke_tokens) and return the updated document"""
+
+    @abstractmethod
+    async def list_active(self) -> List[dict]: ...
+
+
+class UserRepository(ABC):
+    @abstractmethod
+    async def get(self, user_id: str) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def get_by_email(self, email: str, include_password: bool = True) -> Optional[dict]: ...
+
+    @abstractmethod
+    async def insert(self, user: dict) -> None:
+        """Raises DuplicateKey if id or email is taken"""
+
+    @abstractmethod
+    async def update(self, user_id: str, fields: dict, revoke_tokens: bool = False) -> Optional[dict]:
+        """Set fields (bumping token_version if revoke_tokens) and return the updated document without its password"""
+
+    @abstractmethod
+    async def list_pending_officer_requests(self) -> List[dict]: ...
+
+
+class PerformanceRepository(ABC):
+    """Results of the resolution-time batch job (backend/performance.py), one document per group"""
+
+    @abstractmethod
+    async def save(self, results: List[dict]) -> None:
+        """Insert or replace results by their _id"""
+
+    @abstractmethod
+    async def retain(self, result_ids: List[str]) -> int:
+        """Delete every result not listed, after a full recompute; returns how many went"""
+
+    @abstractmethod
+    async def list(self, dimension: str, limit: int = 100) -> List[dict]:
+        """Results for one dimension, largest groups first"""
+
+
+class Storage(ABC):
+    """One repository per collection plus backend lifecycle hooks"""
+
+    complaints: ComplaintRepository
+    comments: CommentRepository
+    work_notes: ComplaintEntryRepository
+    officers: OfficerRepository
+    users: UserRepository
+    performance: PerformanceRepository
+
+    @abstractmethod
+    async def check_indexes(self):
+        """IndexReport comparing declared and actual indexes"""
+
+    @abstractmethod
+    async def ensure_indexes(self, rebuild: bool = False):
+        """Build missing indexes and return the resulting IndexReport"""
+
+    @abstractmethod
+    def close(self) -> None: ...
@@ -0,0 +1,130 @@
+"""
+Precomputed grid of complaint counts behind the clustered public map.
+
+Every complaint with a GeoJSON point (see storage/geo.py) is counted in one
+Web Mercator tile per level, from the whole world at level 0 down to
+MAX_LEVEL (about 150 m across). A tile at level z splits into four at z + 1,
+so the cells form a quadtree. Each cell keeps a count, a status breakdown and
+coordinate sums for its centroid. Writes apply increments to the cells
+instead of the map recounting complaints. A viewport then costs one read per
+visible cell, however many complaints there are.
+
+Increments use Mongo's $inc syntax, with dotted paths into ``statuses``, on
+both backends.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from .geo import BBox
+
+MAX_LEVEL = 18
+# Clusters a quarter of a 256 px map tile across, so roughly 64 px on screen
+LEVEL_OFFSET = 2
+# Upper bound on cells (and so clusters) in one response; a full-HD viewport needs ~500
+MAX_CELLS = 1024
+MAX_LATITUDE = 85.05112878  # Web Mercator stops here
+WORLD: BBox = (-180.0, -MAX_LATITUDE, 180.0, MAX_LATITUDE)
+
+STATUSES = ("NO_OFFICER", "PENDING", "IN_PROGRESS", "RESOLVED")
+
+Cell = Tuple[int, int, int]  # (level, x, y); y grows southwards like map tiles
+
+
+def status_key(status) -> str:
+    # A fixed set of keys keeps the breakdown bounded and safe as a Mongo field name
+    return status if status in STATUSES else "OTHER"
+
+
+def cell_id(cell: Cell) -> str:
+    return "{}/{}/{}".format(*cell)
+
+
+def tile(longitude: float, latitude: float, level: int) -> Tuple[int, int]:
+    scale = 1 << level
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    sin_lat = math.sin(math.radians(latitude))
+    x = (longitude + 180.0) / 360.0 * scale
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return min(max(int(x), 0), scale - 1), min(max(int(y), 0), scale - 1)
+
+
+def cells(geo: Optional[dict]) -> List[Cell]:
+    """The cell containing a point at every level, coarsest first"""
+    if not geo:
+        return []
+    x, y = tile(*geo["coordinates"], MAX_LEVEL)
+    return [(level, x >> (MAX_LEVEL - level), y >> (MAX_LEVEL - level)) for level in range(MAX_LEVEL + 1)]
+
+
+def cell_range(bbox: BBox, level: int) -> Tuple[int, int, int, int]:
+    """(min_x, min_y, max_x, max_y) of the cells a bbox touches at a level"""
+    west, south, east, north = bbox
+    min_x, min_y = tile(west, north, level)
+    max_x, max_y = tile(east, south, level)
+    return min_x, min_y, max_x, max_y
+
+
+def choose_level(bbox: BBox, zoom: int) -> int:
+    """Grid level for a map zoom, coarsened until the viewport spans at most MAX_CELLS cells"""
+    level = max(0, min(zoom + LEVEL_OFFSET, MAX_LEVEL))
+    while level > 0:
+        min_x, min_y, max_x, max_y = cell_range(bbox, level)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) <= MAX_CELLS:
+            break
+        level -= 1
+    return level
+
+
+def point_increments(geo: Optional[dict], status) -> Dict[Cell, dict]:
+    """Increments for a newly stored complaint"""
+    if not geo:
+        return {}
+    longitude, latitude = geo["coordinates"]
+    increment = {"count": 1, "lng": longitude, "lat": latitude, f"statuses.{status_key(status)}": 1}
+    return {cell: dict(increment) for cell in cells(geo)}
+
+
+def status_increments(geo: Optional[dict], old_status, new_status) -> Dict[Cell, dict]:
+    """Increments moving a complaint between statuses; empty if its breakdown key is unchanged"""
+    old, new = status_key(old_status), status_key(new_status)
+    if not geo or old == new:
+        return {}
+    return {cell: {f"statuses.{old}": -1, f"statuses.{new}": 1} for cell in cells(geo)}
+
+
+def merge(into: Dict[Cell, dict], increments: Dict[Cell, dict]) -> Dict[Cell, dict]:
+    """Add one set of increments to another, so a batch touches each cell once"""
+    for cell, increment in increments.items():
+        target = into.setdefault(cell, {})
+        for field, amount in increment.items():
+            target[field] = target.get(field, 0) + amount
+    return into
+
+
+def apply(doc: dict, increment: dict) -> None:
+    """$inc on an in-memory cell (or counter) document, with one level of dotted paths"""
+    for field, amount in increment.items():
+        if "." in field:
+            parent, key = field.split(".", 1)
+            breakdown = doc.setdefault(parent, {})
+            breakdown[key] = breakdown.get(key, 0) + amount
+        else:
+            doc[field] = doc.get(field, 0) + amount
+
+
+def new_cell(cell: Cell) -> dict:
+    level, x, y = cell
+    return {"_id": cell_id(cell), "z": level, "x": x, "y": y, "count": 0, "lng": 0.0, "lat": 0.0, "statuses": {}}
+
+
+def summarize(doc: dict) -> dict:
+    """A stored cell as an API cluster: count, centroid and non-zero status counts"""
+    count = doc["count"]
+    return {
+        "id": doc["_id"],
+        "count": count,
+        "latitude": doc["lat"] / count,
+        "longitude": doc["lng"] / count,
+        "statuses": {status: n for status, n in (doc.get("statuses") or {}).items() if n > 0},
+    }
@@ -0,0 +1,59 @@
+"""
+GeoJSON points for complaints and the geometry behind map queries.
+
+Complaints keep their loose latitude/longitude floats for the API. Insert
+also stores them as a GeoJSON point in ``geo``, backed by a 2dsphere index,
+so the map can ask for a viewport (bbox) or a radius around a point. The
+name ``geo`` avoids the Complaint model's unrelated ``location`` string.
+
+Coordinates follow GeoJSON order: longitude first.
+"""
+
+import math
+from typing import Optional, Tuple
+
+EARTH_RADIUS_M = 6378100.0
+
+BBox = Tuple[float, float, float, float]  # (min_lng, min_lat, max_lng, max_lat)
+
+
+def point(latitude, longitude) -> Optional[dict]:
+    """GeoJSON point for valid coordinates, None otherwise"""
+    if not isinstance(latitude, (int, float)) or not isinstance(longitude, (int, float)):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return {"type": "Point", "coordinates": [float(longitude), float(latitude)]}
+
+
+def geo_fields(latitude, longitude) -> dict:
+    """The derived field to store alongside a complaint's coordinates"""
+    return {"geo": point(latitude, longitude)}
+
+
+def bbox_polygon(bbox: BBox) -> dict:
+    # Mongo draws polygon edges as great circles; for a city-sized viewport the
+    # difference from lines of latitude is negligible
+    min_lng, min_lat, max_lng, max_lat = bbox
+    ring = [[min_lng, min_lat], [max_lng, min_lat], [max_lng, max_lat], [min_lng, max_lat], [min_lng, min_lat]]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def in_bbox(geo: Optional[dict], bbox: BBox) -> bool:
+    if not geo:
+        return False
+    longitude, latitude = geo["coordinates"]
+    min_lng, min_lat, max_lng, max_lat = bbox
+    return min_lng <= longitude <= max_lng and min_lat <= latitude <= max_lat
+
+
+def distance_m(geo: dict, center: Tuple[float, float]) -> float:
+    """Great-circle (haversine) distance between a GeoJSON point and a (lng, lat) pair"""
+    lng1, lat1 = map(math.radians, geo["coordinates"])
+    lng2, lat2 = map(math.radians, center)
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def within_radius(geo: Optional[dict], center: Tuple[float, float], radius_m: float) -> bool:
+    return bool(geo) and distance_m(geo, center) <= radius_m
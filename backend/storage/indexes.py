@@ -0,0 +1,205 @@
+"""
+Declared MongoDB indexes and the tooling that keeps the database in line with them.
+
+INDEXES lists every index the API's queries depend on. ``check_indexes``
+compares it with what the database actually has and reports drift.
+``ensure_indexes`` builds whatever is missing. The server runs it in the
+background at startup, and backend/manage_indexes.py exposes both to
+operators.
+
+Index names are left to MongoDB's default (``field_1_other_-1``), so indexes
+created by hand with the same keys are recognised rather than duplicated.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from .base import SEARCH_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    weights: Optional[Tuple[Tuple[str, int], ...]] = None  # text indexes only
+
+    @property
+    def options(self) -> dict:
+        options = {"unique": self.unique}
+        if self.weights:
+            options["weights"] = dict(self.weights)
+        return options
+
+    @property
+    def name(self) -> str:
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+
+INDEXES: List[IndexSpec] = [
+    # Complaints: point lookups, tracking IDs, officer queue, "my complaints", filters
+    IndexSpec("complaints", (("id", ASCENDING),), unique=True),
+    IndexSpec("complaints", (("public_id", ASCENDING),), unique=True),
+    # Listings page newest-first on (created_at, id); see ComplaintRepository.page
+    IndexSpec("complaints", (("assigned_to", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING))),
+    IndexSpec("complaints", (("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING))),
+    IndexSpec("complaints", (("status", ASCENDING),)),
+    IndexSpec("complaints", (("category", ASCENDING),)),
+    IndexSpec("complaints", (("pincode", ASCENDING), ("status", ASCENDING))),
+    IndexSpec("complaints", (("created_at", DESCENDING), ("id", DESCENDING))),
+    # Zone filter and topLocations (storage/locality.py)
+    IndexSpec("complaints", (("zone_terms", ASCENDING),)),
+    IndexSpec("complaints", (("locality", ASCENDING),)),
+    # Duplicate candidates at submission (storage/minhash.py); multikey over the LSH bands
+    IndexSpec("complaints", (("dup_bands", ASCENDING),)),
+    # Map viewport and radius queries (storage/geo.py)
+    IndexSpec("complaints", (("geo", "2dsphere"),)),
+    # Text search (ComplaintRepository.search); MongoDB allows one text index per collection
+    IndexSpec(
+        "complaints",
+        tuple((field, "text") for field, _ in sorted(SEARCH_WEIGHTS)),
+        weights=tuple(sorted(SEARCH_WEIGHTS)),
+    ),
+    # Cover ComplaintRepository.version() for the polled endpoints' conditional GETs
+    IndexSpec("complaints", (("public_id", ASCENDING), ("updated_at", DESCENDING))),
+    IndexSpec("complaints", (("user_id", ASCENDING), ("updated_at", DESCENDING))),
+    IndexSpec("complaints", (("assigned_to", ASCENDING), ("status", ASCENDING), ("updated_at", DESCENDING))),
+    # Incremental pulls of recently written complaints (backend/performance.py)
+    IndexSpec("complaints", (("updated_at", ASCENDING),)),
+    # Map cluster grid (storage/clusters.py): cells of one level inside a viewport
+    IndexSpec("complaint_clusters", (("z", ASCENDING), ("x", ASCENDING), ("y", ASCENDING))),
+    # Complaint stats counters (storage/stats.py): largest categories and localities
+    IndexSpec("complaint_stats", (("kind", ASCENDING), ("count", DESCENDING))),
+    # ...and time bucket ranges for trends
+    IndexSpec("complaint_stats", (("kind", ASCENDING), ("key", ASCENDING))),
+    # Resolution-time results (backend/performance.py), largest groups first per dimension
+    IndexSpec("complaint_performance", (("dimension", ASCENDING), ("total", DESCENDING))),
+    # Comments and work notes: keyset reads per complaint
+    IndexSpec("comments", (("id", ASCENDING),), unique=True),
+    IndexSpec("comments", (("complaint_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING))),
+    IndexSpec("work_notes", (("id", ASCENDING),), unique=True),
+    IndexSpec("work_notes", (("complaint_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING))),
+    # Officers: login and pincode routing
+    IndexSpec("officers", (("id", ASCENDING),), unique=True),
+    IndexSpec("officers", (("username", ASCENDING),), unique=True),
+    IndexSpec("officers", (("pincodes", ASCENDING), ("is_active", ASCENDING))),
+    # Users: login and registration
+    IndexSpec("users", (("id", ASCENDING),), unique=True),
+    IndexSpec("users", (("email", ASCENDING),), unique=True),
+]
+
+
+@dataclass
+class IndexReport:
+    missing: List[IndexSpec]
+    mismatched: List[IndexSpec]  # same keys, different options (e.g. not unique)
+    extra: List[Tuple[str, str]]  # (collection, index name) not declared here
+    created: List[IndexSpec]
+    failed: List[Tuple[IndexSpec, str]]
+
+    @property
+    def in_sync(self) -> bool:
+        return not (self.missing or self.mismatched or self.failed)
+
+    def as_dict(self) -> dict:
+        return {
+            "inSync": self.in_sync,
+            "missing": [f"{s.collection}.{s.name}" for s in self.missing],
+            "mismatched": [f"{s.collection}.{s.name}" for s in self.mismatched],
+            "extra": [f"{collection}.{name}" for collection, name in self.extra],
+            "created": [f"{s.collection}.{s.name}" for s in self.created],
+            "failed": {f"{s.collection}.{s.name}": error for s, error in self.failed},
+        }
+
+
+def _normalise_keys(key, weights: Optional[dict] = None) -> Tuple[Tuple[str, int], ...]:
+    # Server reports directions as floats; special index types ("2dsphere") stay strings
+    keys = []
+    for field, direction in key:
+        if field == "_fts":
+            # A text index reports its fields only as weights; declared in sorted order
+            keys.extend((name, "text") for name in sorted(weights or {}))
+        elif field != "_ftsx":
+            keys.append((field, direction if isinstance(direction, str) else int(direction)))
+    return tuple(keys)
+
+
+def _options(details: dict) -> dict:
+    options = {"unique": bool(details.get("unique", False))}
+    if details.get("weights"):
+        options["weights"] = {field: int(weight) for field, weight in details["weights"].items()}
+    return options
+
+
+async def check_indexes(db, specs: List[IndexSpec] = INDEXES) -> IndexReport:
+    """Compare declared indexes against the database without changing anything"""
+    report = IndexReport(missing=[], mismatched=[], extra=[], created=[], failed=[])
+    actual: Dict[str, Dict[Tuple, dict]] = {}
+    for collection in sorted({spec.collection for spec in specs}):
+        info = await db[collection].index_information()
+        actual[collection] = {
+            _normalise_keys(details["key"], details.get("weights")): {"name": name, **details}
+            for name, details in info.items()
+            if name != "_id_"
+        }
+
+    declared = {(spec.collection, spec.keys) for spec in specs}
+    for spec in specs:
+        existing = actual[spec.collection].get(spec.keys)
+        if existing is None:
+            report.missing.append(spec)
+        elif _options(existing) != spec.options:
+            report.mismatched.append(spec)
+    for collection, by_keys in actual.items():
+        for keys, details in by_keys.items():
+            if (collection, keys) not in declared:
+                report.extra.append((collection, details["name"]))
+    return report
+
+
+async def ensure_indexes(db, specs: List[IndexSpec] = INDEXES, rebuild: bool = False) -> IndexReport:
+    """
+    Build missing indexes. Mismatched ones are only dropped and rebuilt when
+    ``rebuild`` is set. Undeclared indexes are reported, never dropped.
+    """
+    report = await check_indexes(db, specs)
+    to_build = list(report.missing)
+    if rebuild:
+        to_build.extend(report.mismatched)
+
+    for spec in to_build:
+        collection = db[spec.collection]
+        try:
+            if spec in report.mismatched:
+                info = await collection.index_information()
+                for name, details in info.items():
+                    if _normalise_keys(details["key"], details.get("weights")) == spec.keys:
+                        await collection.drop_index(name)
+            await collection.create_index(list(spec.keys), background=True, **spec.options)
+            report.created.append(spec)
+        except OperationFailure as exc:
+            # A unique build fails on existing duplicates; leave it for an operator
+            report.failed.append((spec, str(exc.details.get("errmsg", exc)) if exc.details else str(exc)))
+
+    report.missing = [spec for spec in report.missing if spec not in report.created]
+    report.mismatched = [spec for spec in report.mismatched if spec not in report.created]
+    return report
+
+
+def log_report(report: IndexReport) -> None:
+    for spec in report.created:
+        logger.info("Built index %s.%s", spec.collection, spec.name)
+    for spec in report.missing:
+        logger.warning("Missing index %s.%s", spec.collection, spec.name)
+    for spec in report.mismatched:
+        logger.warning("Index %s.%s exists with different options (%s expected)", spec.collection, spec.name, spec.options)
+    for spec, error in report.failed:
+        logger.error("Could not build index %s.%s: %s", spec.collection, spec.name, error)
+    for collection, name in report.extra:
+        logger.info("Undeclared index %s.%s", collection, name)
@@ -0,0 +1,55 @@
+"""
+Normalized locality keys for complaints.
+
+Addresses are free text: typed by citizens or reverse-geocoded, as in
+"12 Market Rd, North Zone, Bhimavaram, 534201, India". Filtering or grouping
+on them directly needs a case-insensitive regex, which can't use an index.
+So each complaint also stores two keys, derived once when it is written:
+
+- zone_terms: every comma-separated component of the address, normalized,
+  plus the pincode. The zone filter is an exact match against this
+  multikey-indexed array, so "north zone", "North  Zone" and "NORTH-ZONE"
+  all find the complaint above.
+- locality: the pincode, or the 6-digit PIN found in the address, or else
+  the normalized address. Public analytics groups on it for topLocations.
+"""
+
+import re
+from typing import List, Optional
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+_PINCODE = re.compile(r"\b(\d{6})\b")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Casefold and reduce punctuation and whitespace runs to single spaces"""
+    if not text:
+        return ""
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+
+def zone_terms(address: Optional[str], pincode: Optional[str]) -> List[str]:
+    terms = []
+    for part in (address or "").split(","):
+        term = normalize(part)
+        if term and term not in terms:
+            terms.append(term)
+    pin = normalize(pincode)
+    if pin and pin not in terms:
+        terms.append(pin)
+    return terms
+
+
+def locality_key(address: Optional[str], pincode: Optional[str]) -> Optional[str]:
+    pin = normalize(pincode)
+    if pin:
+        return pin
+    match = _PINCODE.search(address or "")
+    if match:
+        return match.group(1)
+    return normalize(address) or None
+
+
+def locality_fields(address: Optional[str], pincode: Optional[str]) -> dict:
+    """The derived fields to store alongside a complaint's address"""
+    return {"zone_terms": zone_terms(address, pincode), "locality": locality_key(address, pincode)}
@@ -0,0 +1,533 @@
+"""
+In-process storage backend.
+
+Keeps every collection in dicts with hash indexes on the fields the routes
+filter by, so lookups stay O(1) and listings only scan candidate rows.
+Nothing is persisted and nothing is shared between processes. Use it for
+tests, CI and benchmarking the API layer without database latency
+(STORAGE_BACKEND=memory), not for production.
+
+Methods never await while touching the tables, so each call is atomic with
+respect to the event loop, as a single-document Mongo operation would be.
+"""
+
+import bisect
+import copy
+import heapq
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .base import (
+    SEARCH_WEIGHTS,
+    CommentRepository,
+    ComplaintEntryRepository,
+    ComplaintQuery,
+    ComplaintRepository,
+    DuplicateKey,
+    OfficerRepository,
+    PerformanceRepository,
+    Storage,
+    UserRepository,
+    cursor_projection,
+    decode_cursor,
+    encode_cursor,
+)
+from . import analytics, clusters, stats, timeline
+from .geo import geo_fields, in_bbox, within_radius
+from .indexes import IndexReport
+from .locality import locality_fields, normalize
+from .minhash import duplicate_fields
+from .text_index import TextIndex
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    """Apply a Mongo-style inclusion or exclusion projection to a copy of doc"""
+    if not projection:
+        return dict(doc)
+    if any(value for key, value in projection.items() if key != "_id"):
+        return {key: doc[key] for key, value in projection.items() if value and key in doc}
+    return {key: value for key, value in doc.items() if key not in projection}
+
+
+def _values(value) -> Iterable:
+    # Array fields are indexed per element, like a Mongo multikey index
+    return value if isinstance(value, list) else [value]
+
+
+def _matches(doc: dict, field: str, value) -> bool:
+    stored = doc.get(field)
+    return value in stored if isinstance(stored, list) else stored == value
+
+
+class Table:
+    """Rows keyed by ``id`` with unique and non-unique hash indexes"""
+
+    def __init__(self, unique: Tuple[str, ...] = (), indexed: Tuple[str, ...] = ()):
+        self.rows: Dict[str, dict] = {}
+        self.unique: Dict[str, Dict] = {field: {} for field in ("id",) + unique}
+        self.indexed: Dict[str, Dict[object, Set[str]]] = {field: defaultdict(set) for field in indexed}
+
+    def _check_unique(self, doc: dict, row_id: Optional[str] = None) -> None:
+        for field, index in self.unique.items():
+            value = doc.get(field)
+            if value is not None and index.get(value, row_id) != row_id:
+                raise DuplicateKey(field)
+
+    def _index(self, row_id: str, doc: dict) -> None:
+        for field, index in self.unique.items():
+            if doc.get(field) is not None:
+                index[doc[field]] = row_id
+        for field, index in self.indexed.items():
+            for value in _values(doc.get(field)):
+                index[value].add(row_id)
+
+    def _unindex(self, row_id: str, doc: dict) -> None:
+        for field, index in self.unique.items():
+            index.pop(doc.get(field), None)
+        for field, index in self.indexed.items():
+            for value in _values(doc.get(field)):
+                index[value].discard(row_id)
+                if not index[value]:
+                    del index[value]
+
+    def insert(self, doc: dict) -> None:
+        self._check_unique(doc)
+        doc = copy.deepcopy(doc)
+        self.rows[doc["id"]] = doc
+        self._index(doc["id"], doc)
+
+    def get(self, row_id: str) -> Optional[dict]:
+        return self.rows.get(row_id)
+
+    def get_by(self, field: str, value) -> Optional[dict]:
+        row_id = self.unique[field].get(value)
+        return self.rows.get(row_id) if row_id is not None else None
+
+    def update(self, row_id: str, fields: Optional[dict] = None, increment: Optional[dict] = None) -> Optional[dict]:
+        doc = self.rows.get(row_id)
+        if doc is None:
+            return None
+        updated = {**doc, **copy.deepcopy(fields or {})}
+        for field, amount in (increment or {}).items():
+            updated[field] = updated.get(field, 0) + amount
+        self._check_unique(updated, row_id)
+        self._unindex(row_id, doc)
+        self.rows[row_id] = updated
+        self._index(row_id, updated)
+        return updated
+
+    def select(self, **equals) -> List[dict]:
+        """Rows whose fields equal (or, for arrays, contain) every given value"""
+        candidates = None
+        for field, value in equals.items():
+            if field in self.unique:
+                row_id = self.unique[field].get(value)
+                candidates = {row_id} if row_id is not None else set()
+                break
+            if field in self.indexed:
+                ids = self.indexed[field].get(value, set())
+                if candidates is None or len(ids) < len(candidates):
+                    candidates = ids
+        rows = self.rows.values() if candidates is None else [self.rows[row_id] for row_id in candidates]
+        return [doc for doc in rows if all(_matches(doc, field, value) for field, value in equals.items())]
+
+
+# Filters matching at most this many complaints are scored directly rather than checked during the search
+SEARCH_CANDIDATE_LIMIT = 5000
+
+
+def _sort_key(doc: dict) -> Tuple[datetime, str]:
+    return doc.get("created_at") or datetime.min, doc.get("id") or ""
+
+
+def _newest_first(docs: Iterable[dict]) -> List[dict]:
+    return sorted(docs, key=_sort_key, reverse=True)
+
+
+class MemoryComplaintRepository(ComplaintRepository):
+    def __init__(self):
+        self.table = Table(
+            unique=("public_id",),
+            indexed=("user_id", "assigned_to", "pincode", "status", "category", "zone_terms", "locality", "dup_bands"),
+        )
+        self.text = TextIndex(SEARCH_WEIGHTS)
+        self.cells: Dict[clusters.Cell, dict] = {}  # the map's cluster grid
+        self.counters: Dict[str, Dict[str, dict]] = defaultdict(dict)  # complaint_stats by kind, then id
+
+    def _count_cells(self, increments: Dict[clusters.Cell, dict]) -> None:
+        for cell, increment in increments.items():
+            doc = self.cells.get(cell) or self.cells.setdefault(cell, clusters.new_cell(cell))
+            clusters.apply(doc, increment)
+
+    def _count_stats(self, increments: Dict[stats.Counter, dict]) -> None:
+        for counter, increment in increments.items():
+            by_id = self.counters[counter[0]]
+            doc_id = stats.counter_id(counter)
+            doc = by_id.get(doc_id) or by_id.setdefault(doc_id, stats.new_counter(counter))
+            clusters.apply(doc, increment)
+
+    def _update(self, complaint_id: str, fields: dict) -> Optional[dict]:
+        """Table update that keeps the map grid and the complaint stats in step"""
+        before = self.table.get(complaint_id)
+        if before is not None and stats.COUNTED_FIELDS.intersection(fields):
+            now = fields.get("updated_at") or datetime.utcnow()
+            fields = {**fields, **timeline.stamps(before, {**before, **fields}, now)}
+        doc = self.table.update(complaint_id, fields)
+        if doc is not None and "status" in fields:
+            self._count_cells(clusters.status_increments(doc.get("geo"), before.get("status"), doc.get("status")))
+        if doc is not None and stats.COUNTED_FIELDS.intersection(fields):
+            self._count_stats(stats.increments(before, doc))
+        return doc
+
+    @staticmethod
+    def _equals(query: ComplaintQuery) -> dict:
+        """The query's filters that the table's hash indexes can answer"""
+        equals = {
+            field: getattr(query, field)
+            for field in ("public_id", "user_id", "assigned_to", "pincode", "status", "category")
+            if getattr(query, field)
+        }
+        zone = normalize(query.zone)
+        if zone:
+            equals["zone_terms"] = zone
+        return equals
+
+    @staticmethod
+    def _refine(doc: dict, query: ComplaintQuery) -> bool:
+        """The remaining, unindexed filters"""
+        if query.has_location and (doc.get("latitude") is None or doc.get("longitude") is None):
+            return False
+        created_at = doc.get("created_at")
+        if query.created_from and not (created_at and created_at >= query.created_from):
+            return False
+        if query.created_to and not (created_at and created_at <= query.created_to):
+            return False
+        if query.created_before and not (created_at and created_at < query.created_before):
+            return False
+        if query.updated_from and not (doc.get("updated_at") and doc["updated_at"] >= query.updated_from):
+            return False
+        if query.bbox and not in_bbox(doc.get("geo"), query.bbox):
+            return False
+        if query.near and not within_radius(doc.get("geo"), query.near, query.radius_m):
+            return False
+        if query.dup_bands and not set(query.dup_bands).intersection(doc.get("dup_bands") or ()):
+            return False
+        return True
+
+    def _select(self, query: ComplaintQuery) -> List[dict]:
+        equals = self._equals(query)
+        if query.dup_bands:
+            # Complaints sharing a band are few; start from them rather than the equality filters
+            index = self.table.indexed["dup_bands"]
+            ids = set().union(*(index.get(band, ()) for band in query.dup_bands))
+            rows = [self.table.rows[row_id] for row_id in ids]
+            rows = [doc for doc in rows if all(_matches(doc, field, value) for field, value in equals.items())]
+        else:
+            rows = self.table.select(**equals)
+        return [doc for doc in rows if self._refine(doc, query)]
+
+    async def get(self, complaint_id: str, user_id: Optional[str] = None, assigned_to: Optional[str] = None) -> Optional[dict]:
+        doc = self.table.get(complaint_id)
+        if doc is None:
+            return None
+        if user_id is not None and doc.get("user_id") != user_id:
+            return None
+        if assigned_to is not None and doc.get("assigned_to") != assigned_to:
+            return None
+        return dict(doc)
+
+    async def get_by_public_id(self, public_id: str) -> Optional[dict]:
+        doc = self.table.get_by("public_id", public_id)
+        return dict(doc) if doc else None
+
+    async def public_id_exists(self, public_id: str) -> bool:
+        return self.table.get_by("public_id", public_id) is not None
+
+    async def exists(self, complaint_id: str) -> bool:
+        return self.table.get(complaint_id) is not None
+
+    async def insert(self, complaint: dict) -> None:
+        derived = geo_fields(complaint.get("latitude"), complaint.get("longitude"))
+        self.table.insert({
+            **complaint,
+            **locality_fields(complaint.get("address"), complaint.get("pincode")),
+            **duplicate_fields(complaint.get("title"), complaint.get("description")),
+            **derived,
+            **timeline.stamps(None, complaint, complaint.get("created_at") or datetime.utcnow()),
+        })
+        self.text.add(complaint["id"], complaint)
+        self._count_cells(clusters.point_increments(derived["geo"], complaint.get("status")))
+        self._count_stats(stats.increments(None, self.table.get(complaint["id"])))
+
+    async def update(self, complaint_id: str, fields: dict) -> Optional[dict]:
+        doc = self._update(complaint_id, fields)
+        if doc and any(field in fields for field, _ in SEARCH_WEIGHTS):
+            self.text.add(complaint_id, doc)
+        return dict(doc) if doc else None
+
+    async def touch(self, complaint_id: str, increment: Optional[str] = None) -> None:
+        self.table.update(complaint_id, {"updated_at": datetime.utcnow()}, {increment: 1} if increment else None)
+
+    async def page(self, query: ComplaintQuery, limit: int = 100, cursor: Optional[str] = None, projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+        docs = _newest_first(self._select(query))
+        if cursor:
+            after = decode_cursor(cursor)
+            docs = [doc for doc in docs if _sort_key(doc) < after]
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["created_at"], docs[-1]["id"])
+        projection, added = cursor_projection(projection)
+        items = [project(doc, projection) for doc in docs]
+        for item in items:
+            for field in added:
+                item.pop(field, None)
+        return items, next_cursor
+
+    async def count(self, query: ComplaintQuery) -> int:
+        return len(self._select(query))
+
+    async def version(self, query: ComplaintQuery) -> Tuple[int, Optional[datetime]]:
+        docs = self._select(query)
+        return len(docs), max((doc["updated_at"] for doc in docs if doc.get("updated_at")), default=None)
+
+    async def iter_all(self, projection: Optional[dict] = None):
+        for doc in list(self.table.rows.values()):
+            yield project(doc, projection)
+
+    async def stream(self, query: ComplaintQuery, projection: Optional[dict] = None, batch_size: int = 1000):
+        for doc in _newest_first(self._select(query)):
+            yield project(doc, projection)
+
+    async def search(self, text: str, query: ComplaintQuery, limit: int = 20, projection: Optional[dict] = None) -> List[dict]:
+        accept = candidates = None
+        if query != ComplaintQuery():
+            equals = self._equals(query)
+            sizes = [len(self.table.indexed[field].get(value, ())) for field, value in equals.items() if field in self.table.indexed]
+            if sizes and min(sizes) <= SEARCH_CANDIDATE_LIMIT:
+                # A selective filter: score its few matches directly
+                candidates = [doc["id"] for doc in self._select(query)]
+            else:
+                def accept(doc_id: str) -> bool:
+                    doc = self.table.rows[doc_id]
+                    return all(_matches(doc, field, value) for field, value in equals.items()) and self._refine(doc, query)
+        best = self.text.top(text, limit, accept=accept, candidates=candidates)
+        return [{**project(self.table.rows[doc_id], projection), "score": score} for doc_id, score in best]
+
+    async def assign_unassigned(self, pincode: str, officer_id: str) -> int:
+        docs = self.table.select(pincode=pincode, status="NO_OFFICER")
+        now = datetime.utcnow()
+        for doc in docs:
+            self._update(doc["id"], {"assigned_to": officer_id, "status": "PENDING", "updated_at": now})
+        return len(docs)
+
+    async def set_assignment(self, complaint_id: str, assigned_to: Optional[str], status: str) -> bool:
+        doc = self._update(complaint_id, {"assigned_to": assigned_to, "status": status, "updated_at": datetime.utcnow()})
+        return doc is not None
+
+    async def count_assigned(self) -> int:
+        return sum(len(ids) for value, ids in self.table.indexed["assigned_to"].items() if value is not None)
+
+    async def analytics(
+        self,
+        sections: Sequence[str],
+        days: int = 7,
+        category_limit: int = 10,
+        location_limit: int = 5,
+        today: Optional[date] = None,
+    ) -> dict:
+        trend_days = analytics.trend_days(days, today)
+        total = self.counters[stats.TOTAL_ID].get(stats.TOTAL_ID)
+        if total is None or "reconciled_at" not in total:
+            facets = analytics.scan_facets(self.table.rows.values(), sections, trend_days, category_limit, location_limit)
+            return analytics.from_facets(facets, sections, trend_days)
+        categories = localities = days_counted = ()
+        if analytics.BY_CATEGORY in sections:
+            categories = heapq.nlargest(category_limit, self._live("category"), key=lambda doc: doc["count"])
+        if analytics.TREND in sections:
+            day_ids = (stats.counter_id(("day", day.isoformat())) for day in trend_days)
+            days_counted = [self.counters["day"][doc_id] for doc_id in day_ids if doc_id in self.counters["day"]]
+        if analytics.TOP_LOCATIONS in sections:
+            localities = heapq.nlargest(location_limit, self._live("locality"), key=lambda doc: doc["count"])
+        return analytics.from_facets(stats.as_facets(total, categories, days_counted, localities), sections, trend_days)
+
+    def _live(self, kind: str) -> List[dict]:
+        return [doc for doc in self.counters[kind].values() if doc["count"] > 0]
+
+    async def trend(self, granularity: str, first: datetime, last: datetime) -> Optional[List[dict]]:
+        total = self.counters[stats.TOTAL_ID].get(stats.TOTAL_ID)
+        if total is None or "reconciled_at" not in total:
+            return None
+        kind = stats.bucket_kind(granularity)
+        first_key, last_key = stats.bucket_key(kind, first), stats.bucket_key(kind, last)
+        buckets = [doc for doc in self.counters[kind].values() if first_key <= doc["key"] <= last_key]
+        return stats.trend(granularity, first, last, buckets)
+
+    async def reconcile_stats(self) -> dict:
+        now = datetime.utcnow()
+        cutoff = stats.hour_cutoff(now)
+        aged = [doc_id for doc_id, doc in self.counters["hour"].items() if doc["key"] < cutoff]
+        for doc_id in aged:
+            del self.counters["hour"][doc_id]
+        truth: Dict[str, dict] = {}
+        for doc in self.table.rows.values():
+            stats.count(truth, doc, now)
+        actual = [doc for by_id in self.counters.values() for doc in by_id.values()]
+        repaired, removed = stats.drift(truth, actual)
+        for doc in repaired:
+            self.counters[doc["kind"]][doc["_id"]] = copy.deepcopy(doc)
+        for doc_id in removed:
+            for by_id in self.counters.values():
+                by_id.pop(doc_id, None)
+        total = self.counters[stats.TOTAL_ID].setdefault(stats.TOTAL_ID, stats.new_counter((stats.TOTAL_ID, None)))
+        total["reconciled_at"] = now
+        return stats.report(truth, repaired, removed, now, compacted=len(aged))
+
+    async def clusters(self, bbox: Tuple[float, float, float, float], zoom: int) -> Tuple[int, List[dict]]:
+        level = clusters.choose_level(bbox, zoom)
+        min_x, min_y, max_x, max_y = clusters.cell_range(bbox, level)
+        found = []
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                doc = self.cells.get((level, x, y))
+                if doc and doc["count"] > 0:
+                    found.append(clusters.summarize(doc))
+        return level, found
+
+
+class MemoryComplaintEntryRepository(ComplaintEntryRepository):
+    def __init__(self):
+        self.ids: Set[str] = set()
+        # complaint_id -> entries sorted by (timestamp, id)
+        self.by_complaint: Dict[str, List[dict]] = defaultdict(list)
+
+    async def add(self, entry: dict) -> None:
+        if entry["id"] in self.ids:
+            raise DuplicateKey("id")
+        self.ids.add(entry["id"])
+        entries = self.by_complaint[entry["complaint_id"]]
+        key = (entry["timestamp"], entry["id"])
+        if entries and key < (entries[-1]["timestamp"], entries[-1]["id"]):
+            position = bisect.bisect_right([(e["timestamp"], e["id"]) for e in entries], key)
+        else:
+            position = len(entries)  # the usual case: newest entry goes last
+        entries.insert(position, copy.deepcopy(entry))
+
+    def _list(self, complaint_id: str, since: Optional[str], limit: int, include) -> Tuple[List[dict], Optional[str]]:
+        entries = self.by_complaint.get(complaint_id, [])
+        start = 0
+        if since:
+            after = decode_cursor(since)
+            start = bisect.bisect_right([(e["timestamp"], e["id"]) for e in entries], after)
+        items = []
+        for entry in entries[start:]:
+            if len(items) == limit:
+                break
+            if include(entry):
+                items.append(dict(entry))
+        next_cursor = encode_cursor(items[-1]["timestamp"], items[-1]["id"]) if items else since
+        return items, next_cursor
+
+    async def list(self, complaint_id: str, since: Optional[str] = None, limit: int = 50) -> Tuple[List[dict], Optional[str]]:
+        return self._list(complaint_id, since, limit, lambda entry: True)
+
+
+class MemoryCommentRepository(MemoryComplaintEntryRepository, CommentRepository):
+    async def list(self, complaint_id: str, since: Optional[str] = None, limit: int = 50, include_internal: bool = True) -> Tuple[List[dict], Optional[str]]:
+        return self._list(complaint_id, since, limit, lambda entry: include_internal or entry.get("type") != "internal")
+
+
+class MemoryOfficerRepository(OfficerRepository):
+    def __init__(self):
+        self.table = Table(unique=("username",), indexed=("pincodes", "is_active"))
+
+    async def get(self, officer_id: str) -> Optional[dict]:
+        doc = self.table.get(officer_id)
+        return dict(doc) if doc else None
+
+    async def get_by_username(self, username: str, active_only: bool = False) -> Optional[dict]:
+        doc = self.table.get_by("username", username)
+        if doc is None or (active_only and doc.get("is_active") is not True):
+            return None
+        return dict(doc)
+
+    async def find_for_pincode(self, pincode: str) -> Optional[dict]:
+        docs = self.table.select(pincodes=pincode, is_active=True)
+        return dict(docs[0]) if docs else None
+
+    async def insert(self, officer: dict) -> None:
+        self.table.insert(officer)
+
+    async def update(self, officer_id: str, fields: dict, revoke_tokens: bool = False) -> Optional[dict]:
+        doc = self.table.update(officer_id, fields, {"token_version": 1} if revoke_tokens else None)
+        return dict(doc) if doc else None
+
+    async def list_active(self) -> List[dict]:
+        return [dict(doc) for doc in _newest_first(self.table.select(is_active=True))]
+
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self):
+        self.table = Table(unique=("email",), indexed=("officerRequestStatus",))
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        doc = self.table.get(user_id)
+        return dict(doc) if doc else None
+
+    async def get_by_email(self, email: str, include_password: bool = True) -> Optional[dict]:
+        doc = self.table.get_by("email", email)
+        if doc is None:
+            return None
+        return dict(doc) if include_password else project(doc, {"password": 0})
+
+    async def insert(self, user: dict) -> None:
+        self.table.insert(user)
+
+    async def update(self, user_id: str, fields: dict, revoke_tokens: bool = False) -> Optional[dict]:
+        doc = self.table.update(user_id, fields, {"token_version": 1} if revoke_tokens else None)
+        return project(doc, {"password": 0}) if doc else None
+
+    async def list_pending_officer_requests(self) -> List[dict]:
+        return [project(doc, {"password": 0}) for doc in self.table.select(officerRequestStatus="PENDING")]
+
+
+class MemoryPerformanceRepository(PerformanceRepository):
+    def __init__(self):
+        self.results: Dict[str, dict] = {}
+
+    async def save(self, results: List[dict]) -> None:
+        for result in results:
+            self.results[result["_id"]] = copy.deepcopy(result)
+
+    async def retain(self, result_ids: List[str]) -> int:
+        keep = set(result_ids)
+        gone = [result_id for result_id in self.results if result_id not in keep]
+        for result_id in gone:
+            del self.results[result_id]
+        return len(gone)
+
+    async def list(self, dimension: str, limit: int = 100) -> List[dict]:
+        found = [result for result in self.results.values() if result["dimension"] == dimension]
+        return [copy.deepcopy(result) for result in heapq.nlargest(limit, found, key=lambda result: result["total"])]
+
+
+class MemoryStorage(Storage):
+    """Every collection in process memory; indexes are part of the tables"""
+
+    def __init__(self):
+        self.complaints = MemoryComplaintRepository()
+        self.officers = MemoryOfficerRepository()
+        self.users = MemoryUserRepository()
+        self.comments = MemoryCommentRepository()
+        self.work_notes = MemoryComplaintEntryRepository()
+        self.performance = MemoryPerformanceRepository()
+
+    async def check_indexes(self) -> IndexReport:
+        return IndexReport(missing=[], mismatched=[], extra=[], created=[], failed=[])
+
+    async def ensure_indexes(self, rebuild: bool = False) -> IndexReport:
+        return await self.check_indexes()
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,84 @@
+"""
+MinHash signatures and LSH band keys for near-duplicate complaint text.
+
+A complaint's title and description are normalized (tokenize from
+storage/text_index.py), then cut into character 4-grams. That makes
+"pot hole near bus stand" and "Potholes near the bus-stand" share most
+shingles. NUM_PERM seeded hash functions give the MinHash signature, cut
+into BANDS bands of ROWS values. Two complaints share a band with
+probability 1 - (1 - s^ROWS)^BANDS for text Jaccard similarity s: about 80%
+at s = 0.5 and over 99% at s = 0.7, but only ~0.2% for unrelated text.
+
+Insert stores the band keys in ``dup_bands``, a multikey index, so finding
+candidates is one index lookup rather than a comparison with every
+complaint. Hashes are derived from fixed byte strings, never Python's
+salted hash(), so keys written by one process match those computed by
+another.
+"""
+
+import hashlib
+import zlib
+from typing import List, Optional, Set
+
+import numpy as np
+
+from .text_index import tokenize
+
+BANDS = 12
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+SHINGLE = 4
+
+# Mersenne prime 2^31 - 1: a, b and the shingle hash all stay below it, so
+# a * h + b < 2^63 never overflows uint64 and the modulus really mixes
+_PRIME = (1 << 31) - 1
+# Bump when the hash functions change; find_duplicates.py recomputes older band keys
+VERSION = 2
+
+
+def _coefficient(label: str, low: int) -> int:
+    # Uniform in [low, _PRIME), so each (a, b) pair is an independent hash function
+    digest = int.from_bytes(hashlib.blake2b(label.encode("ascii"), digest_size=8).digest(), "big")
+    return digest % (_PRIME - low) + low
+
+
+_A = np.array([_coefficient(f"a{i}", 1) for i in range(NUM_PERM)], dtype=np.uint64)
+_B = np.array([_coefficient(f"b{i}", 0) for i in range(NUM_PERM)], dtype=np.uint64)
+
+
+def shingles(title: Optional[str], description: Optional[str]) -> Set[str]:
+    text = " ".join(tokenize(title) + tokenize(description))
+    if len(text) <= SHINGLE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """Exact Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def signature(shingle_set: Set[str]) -> Optional[np.ndarray]:
+    if not shingle_set:
+        return None
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingle_set), dtype=np.uint64, count=len(shingle_set),
+    )
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def band_keys(shingle_set: Set[str]) -> List[str]:
+    """One "band:hash" key per band; empty for text with no shingles"""
+    values = signature(shingle_set)
+    if values is None:
+        return []
+    # Fixed byte order, so keys match across platforms
+    rows = values.astype("<u8").reshape(BANDS, ROWS)
+    return [f"{band}:{hashlib.blake2b(rows[band].tobytes(), digest_size=6).hexdigest()}" for band in range(BANDS)]
+
+
+def duplicate_fields(title: Optional[str], description: Optional[str]) -> dict:
+    """The derived fields to store alongside a complaint's text"""
+    return {"dup_bands": band_keys(shingles(title, description)), "dup_version": VERSION}
@@ -0,0 +1,484 @@
+"""
+Motor-backed repositories for complaints, officers and users.
+
+Every method is a coroutine, so route handlers can await the database
+without blocking the event loop or taking a threadpool worker.
+"""
+
+import asyncio
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, DeleteOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from pymongo.server_api import ServerApi
+
+from .base import (
+    CommentRepository,
+    ComplaintEntryRepository,
+    ComplaintQuery,
+    ComplaintRepository,
+    DuplicateKey,
+    OfficerRepository,
+    PerformanceRepository,
+    Storage,
+    UserRepository,
+    cursor_projection,
+    decode_cursor,
+    encode_cursor,
+)
+from . import analytics, clusters, stats, timeline
+from .geo import EARTH_RADIUS_M, bbox_polygon, geo_fields
+from .indexes import check_indexes, ensure_indexes
+from .locality import locality_fields, normalize
+from .minhash import duplicate_fields
+
+
+def complaint_filter(query: ComplaintQuery) -> dict:
+    filter_dict = {}
+    if query.status:
+        filter_dict["status"] = query.status
+    if query.category:
+        filter_dict["category"] = query.category
+    if query.public_id:
+        filter_dict["public_id"] = query.public_id
+    if query.user_id:
+        filter_dict["user_id"] = query.user_id
+    if query.assigned_to:
+        filter_dict["assigned_to"] = query.assigned_to
+    if query.pincode:
+        filter_dict["pincode"] = query.pincode
+    if query.has_location:
+        filter_dict["latitude"] = {"$ne": None}
+        filter_dict["longitude"] = {"$ne": None}
+    zone = normalize(query.zone)
+    if zone:
+        filter_dict["zone_terms"] = zone
+    if query.dup_bands:
+        filter_dict["dup_bands"] = {"$in": list(query.dup_bands)}
+    created_at = {}
+    if query.created_from:
+        created_at["$gte"] = query.created_from
+    if query.created_to:
+        created_at["$lte"] = query.created_to
+    if query.created_before:
+        created_at["$lt"] = query.created_before
+    if created_at:
+        filter_dict["created_at"] = created_at
+    if query.updated_from:
+        filter_dict["updated_at"] = {"$gte": query.updated_from}
+    geo = []
+    if query.bbox:
+        geo.append({"geo": {"$geoWithin": {"$geometry": bbox_polygon(query.bbox)}}})
+    if query.near:
+        # $geoWithin rather than $near: it keeps our newest-first sort and works in counts
+        geo.append({"geo": {"$geoWithin": {"$centerSphere": [list(query.near), query.radius_m / EARTH_RADIUS_M]}}})
+    if len(geo) == 1:
+        filter_dict.update(geo[0])
+    elif geo:
+        filter_dict["$and"] = geo
+    return filter_dict
+
+
+NO_ID = {"_id": 0}
+
+
+def without_id(projection: Optional[dict]) -> dict:
+    """
+    Drop Mongo's ObjectId from results. Documents are addressed by their own
+    `id`, and _id would otherwise leak into responses that can't encode it.
+    """
+    return {**projection, "_id": 0} if projection else NO_ID
+
+
+async def insert_unique(collection, document: dict) -> None:
+    """insert_one, translating unique index violations into DuplicateKey"""
+    try:
+        # insert_one adds _id to the dict it is given; keep the caller's copy clean
+        await collection.insert_one(dict(document))
+    except DuplicateKeyError as exc:
+        key_pattern = (exc.details or {}).get("keyPattern") or {}
+        raise DuplicateKey(next(iter(key_pattern), None)) from exc
+
+
+LEGACY_ARRAYS_EXCLUDED = {"_id": 0, "comments": 0, "workNotes": 0}
+# id breaks ties between complaints created in the same millisecond
+NEWEST_FIRST = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+
+class MongoComplaintRepository(ComplaintRepository):
+    def __init__(self, collection, cells, counters):
+        self.collection = collection
+        self.cells = cells  # the map's cluster grid, see storage/clusters.py
+        self.counters = counters  # complaint_stats, see storage/stats.py
+
+    async def _count_cells(self, increments: dict) -> None:
+        # Not atomic with the complaint write; migrate_clusters.py rebuilds the grid if it ever drifts
+        if increments:
+            await self.cells.bulk_write([
+                UpdateOne({"_id": clusters.cell_id(cell)}, {"$inc": increment, "$setOnInsert": {"z": cell[0], "x": cell[1], "y": cell[2]}}, upsert=True)
+                for cell, increment in increments.items()
+            ], ordered=False)
+
+    async def _count_stats(self, increments: dict) -> None:
+        # Each $inc is atomic, but not together with the complaint write; reconcile_stats repairs any drift
+        if increments:
+            await self.counters.bulk_write([
+                UpdateOne({"_id": stats.counter_id(counter)}, {"$inc": increment, "$setOnInsert": {"kind": counter[0], "key": counter[1]}}, upsert=True)
+                for counter, increment in increments.items()
+            ], ordered=False)
+
+    async def get(self, complaint_id: str, user_id: Optional[str] = None, assigned_to: Optional[str] = None) -> Optional[dict]:
+        filter_dict = {"id": complaint_id}
+        if user_id is not None:
+            filter_dict["user_id"] = user_id
+        if assigned_to is not None:
+            filter_dict["assigned_to"] = assigned_to
+        return await self.collection.find_one(filter_dict, NO_ID)
+
+    async def get_by_public_id(self, public_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"public_id": public_id}, NO_ID)
+
+    async def public_id_exists(self, public_id: str) -> bool:
+        return await self.collection.find_one({"public_id": public_id}, {"_id": 1}) is not None
+
+    async def insert(self, complaint: dict) -> None:
+        derived = geo_fields(complaint.get("latitude"), complaint.get("longitude"))
+        stored = {
+            **complaint,
+            **locality_fields(complaint.get("address"), complaint.get("pincode")),
+            **duplicate_fields(complaint.get("title"), complaint.get("description")),
+            **derived,
+            **timeline.stamps(None, complaint, complaint.get("created_at") or datetime.utcnow()),
+        }
+        await insert_unique(self.collection, stored)
+        await self._count_cells(clusters.point_increments(derived["geo"], complaint.get("status")))
+        await self._count_stats(stats.increments(None, stored))
+
+    async def update(self, complaint_id: str, fields: dict) -> Optional[dict]:
+        """Set fields and return the updated document in one round-trip"""
+        if not stats.COUNTED_FIELDS.intersection(fields):
+            return await self.collection.find_one_and_update(
+                {"id": complaint_id},
+                {"$set": fields},
+                projection=NO_ID,
+                return_document=ReturnDocument.AFTER,
+            )
+        # Moving the complaint on the map grid and between stats counters needs its old state
+        before = await self.collection.find_one_and_update({"id": complaint_id}, {"$set": fields}, projection=NO_ID)
+        if before is None:
+            return None
+        after = {**before, **fields}
+        await self._stamp(complaint_id, before, after)
+        if "status" in fields:
+            await self._count_cells(clusters.status_increments(before.get("geo"), before.get("status"), fields["status"]))
+        await self._count_stats(stats.increments(before, after))
+        return after
+
+    async def _stamp(self, complaint_id: str, before: dict, after: dict) -> None:
+        """Record transition times (storage/timeline.py); a second write, only when something changed"""
+        stamps = timeline.stamps(before, after, after.get("updated_at") or datetime.utcnow())
+        if stamps:
+            await self.collection.update_one({"id": complaint_id}, {"$set": stamps})
+            after.update(stamps)
+
+    async def exists(self, complaint_id: str) -> bool:
+        return await self.collection.find_one({"id": complaint_id}, {"_id": 1}) is not None
+
+    async def touch(self, complaint_id: str, increment: Optional[str] = None) -> None:
+        update = {"$set": {"updated_at": datetime.utcnow()}}
+        if increment:
+            update["$inc"] = {increment: 1}
+        await self.collection.update_one({"id": complaint_id}, update)
+
+    async def page(self, query: ComplaintQuery, limit: int = 100, cursor: Optional[str] = None, projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+        filter_dict = complaint_filter(query)
+        if cursor:
+            created_at, complaint_id = decode_cursor(cursor)
+            filter_dict["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "id": {"$lt": complaint_id}},
+            ]
+        if projection is None:
+            # Documents not yet migrated by migrate_comments.py still embed these arrays
+            projection = LEGACY_ARRAYS_EXCLUDED
+        projection, added = cursor_projection(without_id(projection))
+        # One extra document tells us whether there is a next page without a count
+        docs = await self.collection.find(filter_dict, projection).sort(NEWEST_FIRST).limit(limit + 1).to_list(length=limit + 1)
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["created_at"], docs[-1]["id"])
+        for doc in docs:
+            for field in added:
+                doc.pop(field, None)
+        return docs, next_cursor
+
+    async def count(self, query: ComplaintQuery) -> int:
+        return await self.collection.count_documents(complaint_filter(query))
+
+    async def version(self, query: ComplaintQuery) -> Tuple[int, Optional[datetime]]:
+        # Reads only the filter fields and updated_at, so the (filter, updated_at) indexes cover it
+        pipeline = [
+            {"$match": complaint_filter(query)},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "updated_at": {"$max": "$updated_at"}}},
+        ]
+        async for doc in self.collection.aggregate(pipeline):
+            return doc["count"], doc["updated_at"]
+        return 0, None
+
+    async def iter_all(self, projection: Optional[dict] = None):
+        async for doc in self.collection.find({}, without_id(projection)):
+            yield doc
+
+    async def stream(self, query: ComplaintQuery, projection: Optional[dict] = None, batch_size: int = 1000):
+        # Server-side cursor: Motor pulls one batch at a time as the consumer iterates
+        cursor = self.collection.find(complaint_filter(query), without_id(projection)).sort(NEWEST_FIRST).batch_size(batch_size)
+        async for doc in cursor:
+            yield doc
+
+    async def search(self, text: str, query: ComplaintQuery, limit: int = 20, projection: Optional[dict] = None) -> List[dict]:
+        filter_dict = complaint_filter(query)
+        filter_dict["$text"] = {"$search": text}
+        if projection is None:
+            projection = LEGACY_ARRAYS_EXCLUDED
+        projection = {**without_id(projection), "score": {"$meta": "textScore"}}
+        cursor = self.collection.find(filter_dict, projection).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def assign_unassigned(self, pincode: str, officer_id: str) -> int:
+        filter_dict = {"pincode": pincode, "status": "NO_OFFICER"}
+        assignment = {"assigned_to": officer_id, "status": "PENDING"}
+        now = datetime.utcnow()
+        # Read the complaints first; new ones for this pincode already go to the new officer
+        cell_increments, stat_increments = {}, {}
+        async for doc in self.collection.find(filter_dict, {**stats.PROJECTION, "geo": 1}):
+            clusters.merge(cell_increments, clusters.status_increments(doc.get("geo"), "NO_OFFICER", "PENDING"))
+            clusters.merge(stat_increments, stats.increments(doc, {**doc, **assignment}))
+        # Every match moves from unassigned NO_OFFICER to PENDING, so all get the same stamps
+        stamps = timeline.stamps({"status": "NO_OFFICER"}, assignment, now)
+        result = await self.collection.update_many(filter_dict, {"$set": {**assignment, **stamps, "updated_at": now}})
+        await self._count_cells(cell_increments)
+        await self._count_stats(stat_increments)
+        return result.modified_count
+
+    async def set_assignment(self, complaint_id: str, assigned_to: Optional[str], status: str) -> bool:
+        # updated_at always changes, so a match is a modification
+        fields = {"assigned_to": assigned_to, "status": status, "updated_at": datetime.utcnow()}
+        before = await self.collection.find_one_and_update(
+            {"id": complaint_id},
+            {"$set": fields},
+            projection={**stats.PROJECTION, "geo": 1},
+        )
+        if before is None:
+            return False
+        await self._stamp(complaint_id, before, {**before, **fields})
+        await self._count_cells(clusters.status_increments(before.get("geo"), before.get("status"), status))
+        await self._count_stats(stats.increments(before, {**before, **fields}))
+        return True
+
+    async def count_assigned(self) -> int:
+        return await self.collection.count_documents({"assigned_to": {"$ne": None}})
+
+    async def analytics(
+        self,
+        sections: Sequence[str],
+        days: int = 7,
+        category_limit: int = 10,
+        location_limit: int = 5,
+        today: Optional[date] = None,
+    ) -> dict:
+        trend_days = analytics.trend_days(days, today)
+        total = await self.counters.find_one({"_id": stats.TOTAL_ID})
+        if total is None or "reconciled_at" not in total:
+            # Counters not trusted until the first reconcile; scan the complaints instead
+            pipeline = analytics.facet_pipeline(sections, trend_days, category_limit, location_limit)
+            facets = {}
+            async for doc in self.collection.aggregate(pipeline):
+                facets = doc
+            return analytics.from_facets(facets, sections, trend_days)
+
+        async def largest(kind: str, limit: int) -> List[dict]:
+            cursor = self.counters.find({"kind": kind, "count": {"$gt": 0}}).sort("count", DESCENDING).limit(limit)
+            return await cursor.to_list(length=limit)
+
+        async def none() -> List[dict]:
+            return []
+
+        day_ids = [stats.counter_id(("day", day.isoformat())) for day in trend_days]
+        categories, days_counted, localities = await asyncio.gather(
+            largest("category", category_limit) if analytics.BY_CATEGORY in sections else none(),
+            self.counters.find({"_id": {"$in": day_ids}}).to_list(length=None) if analytics.TREND in sections else none(),
+            largest("locality", location_limit) if analytics.TOP_LOCATIONS in sections else none(),
+        )
+        return analytics.from_facets(stats.as_facets(total, categories, days_counted, localities), sections, trend_days)
+
+    async def trend(self, granularity: str, first: datetime, last: datetime) -> Optional[List[dict]]:
+        total = await self.counters.find_one({"_id": stats.TOTAL_ID}, {"reconciled_at": 1})
+        if total is None or "reconciled_at" not in total:
+            return None
+        kind = stats.bucket_kind(granularity)
+        cursor = self.counters.find({"kind": kind, "key": {"$gte": stats.bucket_key(kind, first), "$lte": stats.bucket_key(kind, last)}})
+        return stats.trend(granularity, first, last, await cursor.to_list(length=None))
+
+    async def reconcile_stats(self) -> dict:
+        now = datetime.utcnow()
+        # Hour buckets past retention; their complaints stay counted in the day buckets
+        compacted = await self.counters.delete_many({"kind": "hour", "key": {"$lt": stats.hour_cutoff(now)}})
+        # Writes landing mid-scan may be miscounted by the repair; the next run corrects them
+        truth = {}
+        async for doc in self.collection.find({}, stats.PROJECTION):
+            stats.count(truth, doc, now)
+        actual = await self.counters.find({}).to_list(length=None)
+        repaired, removed = stats.drift(truth, actual)
+        ops = [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in repaired]
+        ops.extend(DeleteOne({"_id": doc_id}) for doc_id in removed)
+        if ops:
+            await self.counters.bulk_write(ops, ordered=False)
+        await self.counters.update_one(
+            {"_id": stats.TOTAL_ID},
+            {"$set": {"reconciled_at": now}, "$setOnInsert": {"kind": stats.TOTAL_ID, "key": None}},
+            upsert=True,
+        )
+        return stats.report(truth, repaired, removed, now, compacted=compacted.deleted_count)
+
+    async def clusters(self, bbox: Tuple[float, float, float, float], zoom: int) -> Tuple[int, List[dict]]:
+        level = clusters.choose_level(bbox, zoom)
+        min_x, min_y, max_x, max_y = clusters.cell_range(bbox, level)
+        cursor = self.cells.find({
+            "z": level,
+            "x": {"$gte": min_x, "$lte": max_x},
+            "y": {"$gte": min_y, "$lte": max_y},
+            "count": {"$gt": 0},
+        })
+        return level, [clusters.summarize(doc) async for doc in cursor]
+
+
+class MongoComplaintEntryRepository(ComplaintEntryRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def add(self, entry: dict) -> None:
+        # insert_one adds _id to the dict it is given; keep the caller's copy clean
+        await self.collection.insert_one(dict(entry))
+
+    async def _list(self, filter_dict: dict, since: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+        if since:
+            timestamp, entry_id = decode_cursor(since)
+            filter_dict["$or"] = [
+                {"timestamp": {"$gt": timestamp}},
+                {"timestamp": timestamp, "id": {"$gt": entry_id}},
+            ]
+        cursor = self.collection.find(filter_dict, NO_ID).sort([("timestamp", ASCENDING), ("id", ASCENDING)]).limit(limit)
+        items = await cursor.to_list(length=limit)
+        next_cursor = encode_cursor(items[-1]["timestamp"], items[-1]["id"]) if items else since
+        return items, next_cursor
+
+    async def list(self, complaint_id: str, since: Optional[str] = None, limit: int = 50) -> Tuple[List[dict], Optional[str]]:
+        return await self._list({"complaint_id": complaint_id}, since, limit)
+
+
+class MongoCommentRepository(MongoComplaintEntryRepository, CommentRepository):
+    async def list(self, complaint_id: str, since: Optional[str] = None, limit: int = 50, include_internal: bool = True) -> Tuple[List[dict], Optional[str]]:
+        filter_dict = {"complaint_id": complaint_id}
+        if not include_internal:
+            filter_dict["type"] = {"$ne": "internal"}
+        return await self._list(filter_dict, since, limit)
+
+
+class MongoOfficerRepository(OfficerRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get(self, officer_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": officer_id}, NO_ID)
+
+    async def get_by_username(self, username: str, active_only: bool = False) -> Optional[dict]:
+        filter_dict = {"username": username}
+        if active_only:
+            filter_dict["is_active"] = True
+        return await self.collection.find_one(filter_dict, NO_ID)
+
+    async def find_for_pincode(self, pincode: str) -> Optional[dict]:
+        return await self.collection.find_one({"pincodes": pincode, "is_active": True}, NO_ID)
+
+    async def insert(self, officer: dict) -> None:
+        await insert_unique(self.collection, officer)
+
+    async def update(self, officer_id: str, fields: dict, revoke_tokens: bool = False) -> Optional[dict]:
+        update = {"$set": fields}
+        if revoke_tokens:
+            update["$inc"] = {"token_version": 1}
+        return await self.collection.find_one_and_update(
+            {"id": officer_id}, update, projection=NO_ID, return_document=ReturnDocument.AFTER
+        )
+
+    async def list_active(self) -> List[dict]:
+        return await self.collection.find({"is_active": True}, NO_ID).sort("created_at", DESCENDING).to_list(length=None)
+
+
+class MongoUserRepository(UserRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": user_id}, NO_ID)
+
+    async def get_by_email(self, email: str, include_password: bool = True) -> Optional[dict]:
+        projection = NO_ID if include_password else {"_id": 0, "password": 0}
+        return await self.collection.find_one({"email": email}, projection)
+
+    async def insert(self, user: dict) -> None:
+        await insert_unique(self.collection, user)
+
+    async def update(self, user_id: str, fields: dict, revoke_tokens: bool = False) -> Optional[dict]:
+        update = {"$set": fields}
+        if revoke_tokens:
+            update["$inc"] = {"token_version": 1}
+        return await self.collection.find_one_and_update(
+            {"id": user_id}, update, projection={"_id": 0, "password": 0}, return_document=ReturnDocument.AFTER
+        )
+
+    async def list_pending_officer_requests(self) -> List[dict]:
+        return await self.collection.find({"officerRequestStatus": "PENDING"}, {"_id": 0, "password": 0}).to_list(length=None)
+
+
+class MongoPerformanceRepository(PerformanceRepository):
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def save(self, results: List[dict]) -> None:
+        if results:
+            await self.collection.bulk_write([ReplaceOne({"_id": result["_id"]}, result, upsert=True) for result in results], ordered=False)
+
+    async def retain(self, result_ids: List[str]) -> int:
+        result = await self.collection.delete_many({"_id": {"$nin": list(result_ids)}})
+        return result.deleted_count
+
+    async def list(self, dimension: str, limit: int = 100) -> List[dict]:
+        cursor = self.collection.find({"dimension": dimension}).sort("total", DESCENDING).limit(limit)
+        return await cursor.to_list(length=limit)
+
+
+class MongoStorage(Storage):
+    """Motor client plus one repository per collection"""
+
+    def __init__(self, mongo_url: str, db_name: str):
+        self.client = AsyncIOMotorClient(mongo_url, server_api=ServerApi('1'))
+        self.db = self.client[db_name]
+        self.complaints = MongoComplaintRepository(self.db.complaints, self.db.complaint_clusters, self.db.complaint_stats)
+        self.officers = MongoOfficerRepository(self.db.officers)
+        self.users = MongoUserRepository(self.db.users)
+        self.comments = MongoCommentRepository(self.db.comments)
+        self.work_notes = MongoComplaintEntryRepository(self.db.work_notes)
+        self.performance = MongoPerformanceRepository(self.db.complaint_performance)
+
+    async def check_indexes(self):
+        return await check_indexes(self.db)
+
+    async def ensure_indexes(self, rebuild: bool = False):
+        return await ensure_indexes(self.db, rebuild=rebuild)
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,218 @@
+"""
+Materialized complaint counters (the complaint_stats collection).
+
+One counter document per total, category, pincode, locality, officer,
+creation day and creation hour. Each holds the number of complaints it
+covers and their status breakdown. Day and hour buckets also break the
+count down by category, so trends over any range read one document per
+bucket (``trend``). The complaint repository works out the difference between
+a complaint before and after each write, and applies it as $inc updates. A
+new complaint adds 1 to each of its counters; a status change moves 1
+between two status keys; a reassignment moves the complaint from one
+officer's counter to another's. Dashboard reads then fetch a handful of
+small documents, however many complaints there are.
+
+The increments are not in a transaction with the complaint write, and
+scripts that edit complaints directly bypass them. reconcile_stats
+recomputes every counter from the complaints, repairs drifted ones and
+marks the total with ``reconciled_at``. The server runs it at startup and
+periodically. Until the first run, analytics falls back to scanning the
+complaints (storage/analytics.py).
+
+Day buckets are kept indefinitely. Hour buckets only exist for complaints
+created in the last HOUR_RETENTION_DAYS. Writes to older complaints leave
+them alone, and reconcile_stats deletes the ones that have aged out. Longer
+trends read the day buckets instead.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import analytics
+from .clusters import apply, status_key
+
+TOTAL_ID = "total"
+# Counter kind -> complaint field it is keyed by
+FIELDS = (("category", "category"), ("pincode", "pincode"), ("locality", "locality"), ("officer", "assigned_to"))
+# Fields whose change moves a complaint between counters
+COUNTED_FIELDS = frozenset(["status", "created_at"] + [field for _, field in FIELDS])
+PROJECTION = {"_id": 0, **{field: 1 for field in COUNTED_FIELDS}}
+# Time bucket kind -> key format for created_at; keys sort chronologically as strings
+BUCKETS = {"day": "%Y-%m-%d", "hour": "%Y-%m-%dT%H"}
+HOUR_RETENTION_DAYS = 14
+
+Counter = Tuple[str, Optional[str]]  # (kind, key)
+
+
+def counter_id(counter: Counter) -> str:
+    kind, key = counter
+    return TOTAL_ID if kind == TOTAL_ID else f"{kind}:{key}"
+
+
+def bucket_key(kind: str, moment: datetime) -> str:
+    return moment.strftime(BUCKETS[kind])
+
+
+def hour_cutoff(now: Optional[datetime] = None) -> str:
+    """Hour bucket key before which buckets are compacted away"""
+    return bucket_key("hour", (now or datetime.utcnow()) - timedelta(days=HOUR_RETENTION_DAYS))
+
+
+def category_key(category) -> str:
+    # Category names become field names under "categories"; keep them valid for Mongo
+    return str(category or "").replace(".", "_").lstrip("$") or "Unknown"
+
+
+def counters(doc: dict, now: Optional[datetime] = None) -> List[Counter]:
+    """Every counter a complaint is counted in"""
+    keys = [(TOTAL_ID, None)]
+    keys.extend((kind, doc[field]) for kind, field in FIELDS if doc.get(field) is not None)
+    created_at = doc.get("created_at")
+    if created_at:
+        keys.append(("day", bucket_key("day", created_at)))
+        hour = bucket_key("hour", created_at)
+        if hour >= hour_cutoff(now):
+            keys.append(("hour", hour))
+    return keys
+
+
+def increments(before: Optional[dict], after: Optional[dict], now: Optional[datetime] = None) -> Dict[Counter, dict]:
+    """$inc per counter to go from a complaint's old state to its new one (None for a missing side)"""
+    now = now or datetime.utcnow()
+    result: Dict[Counter, dict] = {}
+    for doc, sign in ((before, -1), (after, 1)):
+        if doc is None:
+            continue
+        status = f"statuses.{status_key(doc.get('status'))}"
+        category = f"categories.{category_key(doc.get('category'))}"
+        for counter in counters(doc, now):
+            increment = result.setdefault(counter, {})
+            increment["count"] = increment.get("count", 0) + sign
+            increment[status] = increment.get(status, 0) + sign
+            if counter[0] in BUCKETS:
+                increment[category] = increment.get(category, 0) + sign
+    changed = {}
+    for counter, increment in result.items():
+        increment = {field: amount for field, amount in increment.items() if amount}
+        if increment:
+            changed[counter] = increment
+    return changed
+
+
+def new_counter(counter: Counter) -> dict:
+    kind, key = counter
+    doc = {"_id": counter_id(counter), "kind": kind, "key": key, "count": 0, "statuses": {}}
+    if kind in BUCKETS:
+        doc["categories"] = {}
+    return doc
+
+
+def count(docs: Dict[str, dict], complaint: dict, now: Optional[datetime] = None) -> None:
+    """Add one complaint to counters being recomputed from scratch (keyed by id)"""
+    for counter, increment in increments(None, complaint, now).items():
+        doc_id = counter_id(counter)
+        if doc_id not in docs:
+            docs[doc_id] = new_counter(counter)
+        apply(docs[doc_id], increment)
+
+
+def _nonzero(breakdown: Optional[dict]) -> Dict[str, int]:
+    return {key: n for key, n in (breakdown or {}).items() if n}
+
+
+def _comparable(doc: dict) -> Tuple[int, Dict[str, int], Dict[str, int]]:
+    return doc.get("count", 0), _nonzero(doc.get("statuses")), _nonzero(doc.get("categories"))
+
+
+def drift(truth: Dict[str, dict], actual: Iterable[dict]) -> Tuple[List[dict], List[str]]:
+    """Counters to overwrite (missing or wrong) and counter ids to delete (nothing left to count)"""
+    seen = set()
+    removed = []
+    wrong = []
+    for doc in actual:
+        seen.add(doc["_id"])
+        right = truth.get(doc["_id"])
+        if right is None:
+            if _comparable(doc) != (0, {}, {}):
+                removed.append(doc["_id"])
+        elif _comparable(doc) != _comparable(right):
+            wrong.append(right)
+    missing = [doc for doc_id, doc in truth.items() if doc_id not in seen]
+    return wrong + missing, removed
+
+
+def as_facets(total: dict, categories: Iterable[dict], days: Iterable[dict], localities: Iterable[dict]) -> dict:
+    """Counter documents in the shape analytics.from_facets reads"""
+    return {
+        analytics.BY_STATUS: [{"_id": status, "count": n} for status, n in (total.get("statuses") or {}).items()],
+        analytics.BY_CATEGORY: [
+            {"_id": doc["key"], "total": doc["count"], "resolved": (doc.get("statuses") or {}).get("RESOLVED", 0)}
+            for doc in categories
+        ],
+        analytics.TREND: [{"_id": doc["key"], "count": doc["count"]} for doc in days],
+        analytics.TOP_LOCATIONS: [{"_id": doc["key"], "count": doc["count"]} for doc in localities],
+    }
+
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+
+def bucket_kind(granularity: str) -> str:
+    """The bucket kind a trend granularity is summed from"""
+    return "hour" if granularity == "hour" else "day"
+
+
+def period_start(granularity: str, moment: datetime) -> datetime:
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = datetime(moment.year, moment.month, moment.day)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())  # weeks start on Monday
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_period(granularity: str, start: datetime) -> datetime:
+    if granularity == "hour":
+        return start + timedelta(hours=1)
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + timedelta(days=1)
+
+
+def trend(granularity: str, first: datetime, last: datetime, buckets: Iterable[dict]) -> List[dict]:
+    """
+    Bucket documents between first and last (inclusive) summed into one
+    entry per period, oldest first. Periods with no complaints are zero.
+    """
+    periods = {}
+    start = period_start(granularity, first)
+    while start <= last:
+        periods[start] = {"start": start, "count": 0, "byStatus": {}, "byCategory": {}}
+        start = next_period(granularity, start)
+    key_format = BUCKETS[bucket_kind(granularity)]
+    for doc in buckets:
+        entry = periods.get(period_start(granularity, datetime.strptime(doc["key"], key_format)))
+        if entry is None:
+            continue
+        entry["count"] += doc.get("count", 0)
+        for field, breakdown in (("byStatus", doc.get("statuses")), ("byCategory", doc.get("categories"))):
+            for key, n in _nonzero(breakdown).items():
+                entry[field][key] = entry[field].get(key, 0) + n
+    return list(periods.values())
+
+
+def report(truth: Dict[str, dict], repaired: List[dict], removed: List[str], reconciled_at, compacted: int = 0) -> dict:
+    """What reconcile_stats found; drifted ids are capped to keep logs readable"""
+    drifted = [doc["_id"] for doc in repaired] + removed
+    return {
+        "counters": len(truth),
+        "compacted": compacted,
+        "repaired": len(repaired),
+        "removed": len(removed),
+        "drifted": drifted[:20],
+        "reconciled_at": reconciled_at,
+    }
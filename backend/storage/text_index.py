@@ -0,0 +1,155 @@
+"""
+In-process inverted index for complaint text search (memory backend).
+
+Mirrors what the Mongo text index gives the API: weighted fields, terms
+OR-ed together, "-term" to exclude, English stop words dropped and light
+suffix stemming so "potholes" finds "pothole". Scores are the weighted term
+frequency times an idf factor, so rare terms outrank common ones. Absolute
+values differ from Mongo's textScore; only the ordering is meaningful.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its near no not of on or "
+    "the this that there to was were will with".split()
+)
+
+
+def _stem(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    for suffix, keep in (("ing", 4), ("ed", 4), ("s", 3)):
+        if word.endswith(suffix) and not word.endswith("ss") and len(word) - len(suffix) >= keep:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text) -> List[str]:
+    if not isinstance(text, str):
+        return []
+    return [_stem(word) for word in _WORD.findall(text.casefold()) if len(word) > 1 and word not in STOP_WORDS]
+
+
+def parse_search(text: str) -> Tuple[Set[str], Set[str]]:
+    """Split a search string into included and excluded (leading "-") terms"""
+    include, exclude = set(), set()
+    for raw in text.split():
+        target = exclude if raw.startswith("-") else include
+        target.update(tokenize(raw.lstrip("-")))
+    return include - exclude, exclude
+
+
+class TextIndex:
+    """
+    Weighted postings per token (document id -> weighted term frequency),
+    also bucketed by frequency so documents can be read best-first.
+
+    top() uses the threshold algorithm: it reads every query term's postings
+    in descending frequency order and scores each new document in full. It
+    stops once the k-th best score beats anything an unread document could
+    still reach. A common term then costs about k documents, not its whole
+    posting list.
+    """
+
+    def __init__(self, weights: Iterable[Tuple[str, int]]):
+        self.weights = tuple(weights)
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.buckets: Dict[str, Dict[int, Set[str]]] = {}  # token -> frequency -> document ids
+        self.tokens: Dict[str, Dict[str, int]] = {}  # document id -> its postings, for removal
+
+    def add(self, doc_id: str, doc: dict) -> None:
+        """Index (or re-index) a document"""
+        self.remove(doc_id)
+        counts = Counter()
+        for field, weight in self.weights:
+            for token in tokenize(doc.get(field)):
+                counts[token] += weight
+        for token, count in counts.items():
+            self.postings.setdefault(token, {})[doc_id] = count
+            self.buckets.setdefault(token, {}).setdefault(count, set()).add(doc_id)
+        self.tokens[doc_id] = dict(counts)
+
+    def remove(self, doc_id: str) -> None:
+        for token, count in self.tokens.pop(doc_id, {}).items():
+            del self.postings[token][doc_id]
+            bucket = self.buckets[token][count]
+            bucket.discard(doc_id)
+            if not bucket:
+                del self.buckets[token][count]
+            if not self.postings[token]:
+                del self.postings[token]
+                del self.buckets[token]
+
+    def _idf(self, token: str) -> float:
+        return math.log(1 + len(self.tokens) / len(self.postings[token]))
+
+    def _best_first(self, token: str) -> Iterator[Tuple[int, str]]:
+        buckets = self.buckets[token]
+        for count in sorted(buckets, reverse=True):
+            for doc_id in buckets[count]:
+                yield count, doc_id
+
+    def top(
+        self,
+        text: str,
+        limit: int,
+        accept: Optional[Callable[[str], bool]] = None,
+        candidates: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        The ``limit`` best (document id, score) pairs for a search string.
+        ``accept`` rejects documents that fail other filters. When the
+        filters already narrow things down to a few ``candidates``, only
+        those are scored.
+        """
+        include, exclude = parse_search(text)
+        terms = [(token, self._idf(token)) for token in include if token in self.postings]
+        if not terms or limit < 1:
+            return []
+        excluded = [self.postings[token] for token in exclude if token in self.postings]
+
+        def score(doc_id: str) -> float:
+            return sum(self.postings[token].get(doc_id, 0) * idf for token, idf in terms)
+
+        def wanted(doc_id: str) -> bool:
+            return not any(doc_id in postings for postings in excluded) and (accept is None or accept(doc_id))
+
+        if candidates is not None:
+            scored = ((doc_id, score(doc_id)) for doc_id in candidates if wanted(doc_id))
+            return heapq.nlargest(limit, ((doc_id, value) for doc_id, value in scored if value > 0), key=lambda item: item[1])
+
+        best: List[Tuple[float, str]] = []  # min-heap of the current top results
+        seen: Set[str] = set()
+        streams = [self._best_first(token) for token, _ in terms]
+        bounds = [max(self.buckets[token]) * idf for token, idf in terms]
+        active = list(range(len(terms)))
+        while active:
+            for i in list(active):
+                item = next(streams[i], None)
+                if item is None:
+                    active.remove(i)
+                    bounds[i] = 0.0
+                    continue
+                count, doc_id = item
+                bounds[i] = count * terms[i][1]
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if not wanted(doc_id):
+                    continue
+                entry = (score(doc_id), doc_id)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+            # No unread document can score more than the sum of the current bounds
+            if len(best) == limit and best[0][0] >= sum(bounds):
+                break
+        return [(doc_id, value) for value, doc_id in sorted(best, reverse=True)]
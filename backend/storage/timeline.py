@@ -0,0 +1,40 @@
+"""
+When a complaint was assigned, started and resolved.
+
+Complaints only keep their current status. Resolution-time analytics
+(backend/performance.py) also need to know when each transition happened.
+The complaint repositories compare a complaint before and after every write
+that changes its status or officer, and stamp:
+
+- ``assigned_at``: when it was handed to its current officer (None once unassigned)
+- ``started_at``: when it last moved to IN_PROGRESS
+- ``resolved_at``: when it last moved to RESOLVED (None once reopened)
+
+Rewriting the same status or officer stamps nothing, so repeated admin
+edits do not reset the clocks. Complaints written before these fields
+existed have none of them. performance.py takes ``updated_at`` as the
+resolution time of those already RESOLVED; their assignment and start
+times stay unknown.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+FIELDS = ("assigned_at", "started_at", "resolved_at")
+
+
+def stamps(before: Optional[dict], after: dict, now: datetime) -> dict:
+    """Timestamps to set for the transitions between two states of a complaint (None before an insert)"""
+    before = before or {}
+    fields = {}
+    if after.get("assigned_to") != before.get("assigned_to"):
+        fields["assigned_at"] = now if after.get("assigned_to") else None
+    old, new = before.get("status"), after.get("status")
+    if new != old:
+        if new == "IN_PROGRESS":
+            fields["started_at"] = now
+        if new == "RESOLVED":
+            fields["resolved_at"] = now
+        elif old == "RESOLVED":
+            fields["resolved_at"] = None
+    return fields
@@ -0,0 +1,67 @@
+"""
+Per-principal token versions used to revoke JWTs with few database reads.
+
+Every access and refresh token carries the version of its principal at the
+time it was issued. Editing, deactivating or re-credentialing an officer, or
+changing a user's role, bumps the version. Tokens with a lower version are
+then rejected. The counter is stored on the officer/user document as
+``token_version``, and each process keeps a copy of it in memory.
+
+The in-memory copy is only authoritative in the process that made the
+change. Other workers, and a process that has just restarted, learn of it
+by re-reading ``token_version`` from the database. A principal is read the
+first time a process sees it, and again once its entry is older than
+``recheck_seconds``. A revocation made elsewhere therefore takes effect
+within ``recheck_seconds`` (30 by default) rather than immediately. Refresh
+always reads the stored version, so revoked tokens can never be renewed.
+"""
+
+import threading
+import time
+
+
+class TokenVersionTable:
+    def __init__(self, recheck_seconds: float = 30.0):
+        self.recheck_seconds = recheck_seconds
+        self._versions = {}
+        self._checked_at = {}  # principal id -> when its stored version was last read
+        self._lock = threading.Lock()
+        self.rechecks = 0
+
+    def current(self, principal_id: str) -> int:
+        with self._lock:
+            return self._versions.get(principal_id, 0)
+
+    def observe(self, principal_id: str, version: int) -> int:
+        """Raise the in-memory floor to a version read from the database."""
+        with self._lock:
+            current = max(self._versions.get(principal_id, 0), version)
+            self._versions[principal_id] = current
+            return current
+
+    def needs_check(self, principal_id: str) -> bool:
+        """Whether the stored version should be read before trusting the in-memory one"""
+        with self._lock:
+            checked_at = self._checked_at.get(principal_id)
+            return checked_at is None or time.monotonic() - checked_at >= self.recheck_seconds
+
+    def checked(self, principal_id: str, version: int) -> int:
+        """Record a version just read from the database"""
+        with self._lock:
+            current = max(self._versions.get(principal_id, 0), version)
+            self._versions[principal_id] = current
+            self._checked_at[principal_id] = time.monotonic()
+            self.rechecks += 1
+            return current
+
+    def is_current(self, principal_id: str, version: int) -> bool:
+        with self._lock:
+            return version >= self._versions.get(principal_id, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "trackedPrincipals": len(self._versions),
+                "recheckSeconds": self.recheck_seconds,
+                "rechecks": self.rechecks,
+            }
@@ -45,6 +45,29 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Interceptor to renew an expired or revoked access token once using the refresh token
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (error.response?.status !== 401 || !refreshToken || original._retried || original.url === '/api/auth/refresh') {
+      return Promise.reject(error);
+    }
+    original._retried = true;
+    try {
+      const response = await api.post('/api/auth/refresh', { refresh_token: refreshToken });
+      localStorage.setItem('token', response.data.access_token);
+      localStorage.setItem('refresh_token', response.data.refresh_token);
+      localStorage.setItem('user', JSON.stringify(response.data.user));
+      return api(original);
+    } catch (refreshError) {
+      localStorage.removeItem('refresh_token');
+      return Promise.reject(error);
+    }
+  }
+);
+
 // Map component for location selection
 function LocationSelector({ position, setPosition, onAddressChange }) {
   const [isLoadingLocation, setIsLoadingLocation] = React.useState(false);
@@ -262,8 +285,9 @@ function AuthProvider({ children }) {
   const login = async (email, password) => {
     try {
       const response = await api.post('/api/auth/login', { email, password });
-      const { access_token, user: userData } = response.data;
+      const { access_token, refresh_token, user: userData } = response.data;
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       localStorage.setItem('user', JSON.stringify(userData));
       setUser(userData);
       return true;
@@ -276,8 +300,9 @@ function AuthProvider({ children }) {
   const register = async (userData) => {
     try {
       const response = await api.post('/api/auth/register', userData);
-      const { access_token, user: userInfo } = response.data;
+      const { access_token, refresh_token, user: userInfo } = response.data;
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       localStorage.setItem('user', JSON.stringify(userInfo));
       setUser(userInfo);
       return true;
@@ -289,6 +314,7 @@ function AuthProvider({ children }) {
 
   const logout = () => {
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
     setUser(null);
   };
@@ -795,8 +821,9 @@ function OfficerLoginPage() {
 
       const response = await api.post('/api/officer/login', formDataToSend);
 
-      const { access_token, user } = response.data;
+      const { access_token, refresh_token, user } = response.data;
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       localStorage.setItem('user', JSON.stringify(user));
 
       // Update the AuthContext user state
@@ -891,8 +918,9 @@ function AdminLoginPage() {
 
       const response = await api.post('/api/officer/login', formDataToSend);
 
-      const { access_token, user } = response.data;
+      const { access_token, refresh_token, user } = response.data;
       localStorage.setItem('token', access_token);
+      localStorage.setItem('refresh_token', refresh_token);
       localStorage.setItem('user', JSON.stringify(user));
 
       // Update the AuthContext user state
@@ -1313,6 +1341,49 @@ function ComplaintForm({ onSubmit }) {
   );
 }
 
+// Lists return a summary without description or contact details; fetch the full complaint when opened
+function useComplaintDetails(complaintId) {
+  const [showDetails, setShowDetails] = useState(false);
+  const [details, setDetails] = useState(null);
+
+  const toggleDetails = async () => {
+    const opening = !showDetails;
+    setShowDetails(opening);
+    if (opening && details === null) {
+      try {
+        const response = await api.get(`/api/complaints/${complaintId}`);
+        setDetails(response.data);
+      } catch (error) {
+        console.error('Complaint details error:', error);
+        setShowDetails(false);
+      }
+    }
+  };
+
+  return { showDetails, details, toggleDetails };
+}
+
+function DescriptionToggle({ showDetails, details, onToggle, className = 'text-slate-200 leading-relaxed' }) {
+  if (showDetails && details) {
+    return <p className={className}>{details.description}</p>;
+  }
+  return (
+    <button
+      type="button"
+      onClick={onToggle}
+      className="text-sm font-semibold text-purple-300"
+    >
+      {showDetails ? 'Loading...' : 'Show description'}
+    </button>
+  );
+}
+
+// Description of a summary row, fetched on demand
+function ComplaintDescription({ complaintId, className }) {
+  const { showDetails, details, toggleDetails } = useComplaintDetails(complaintId);
+  return <DescriptionToggle showDetails={showDetails} details={details} onToggle={toggleDetails} className={className} />;
+}
+
 // Complaint Card Component
 function ComplaintCard({ complaint, isAdmin = false, onUpdate, officersMap = {} }) {
   const [isUpdating, setIsUpdating] = useState(false);
@@ -1321,6 +1392,24 @@ function ComplaintCard({ complaint, isAdmin = false, onUpdate, officersMap = {}
     assigned_to: complaint.assigned_to || '',
     admin_comments: complaint.admin_comments || ''
   });
+  const [showWorkNotes, setShowWorkNotes] = useState(false);
+  const [workNotes, setWorkNotes] = useState(null);
+  const { showDetails, details, toggleDetails } = useComplaintDetails(complaint.id);
+
+  // Work notes are stored outside the complaint; fetch them the first time they're opened
+  const toggleWorkNotes = async () => {
+    const opening = !showWorkNotes;
+    setShowWorkNotes(opening);
+    if (opening && workNotes === null) {
+      try {
+        const response = await api.get(`/api/complaints/${complaint.id}/notes`, { params: { limit: 200 } });
+        setWorkNotes(response.data.items);
+      } catch (error) {
+        console.error('Work notes error:', error);
+        setWorkNotes([]);
+      }
+    }
+  };
 
   const handleUpdate = async () => {
     setIsUpdating(true);
@@ -1368,8 +1457,12 @@ function ComplaintCard({ complaint, isAdmin = false, onUpdate, officersMap = {}
             <CardDescription className="flex items-center text-slate-300">
               <User className="w-4 h-4 mr-1.5 text-slate-400" />
               <span className="font-medium">{complaint.user_name}</span>
-              <span className="mx-2 text-slate-500">•</span>
-              <span className="text-sm">{complaint.user_email}</span>
+              {showDetails && details && (
+                <>
+                  <span className="mx-2 text-slate-500">•</span>
+                  <span className="text-sm">{details.user_email}</span>
+                </>
+              )}
             </CardDescription>
           </div>
           <div className="text-right flex-shrink-0">
@@ -1387,7 +1480,7 @@ function ComplaintCard({ complaint, isAdmin = false, onUpdate, officersMap = {}
       </CardHeader>
       <CardContent className="bg-slate-800 p-6">
         <div className="space-y-4">
-          <p className="text-slate-200 leading-relaxed">{complaint.description}</p>
+          <DescriptionToggle showDetails={showDetails} details={details} onToggle={toggleDetails} />
 
           <div className="flex flex-wrap gap-2">
             <Badge className="bg-gradient-to-r from-blue-500 to-blue-600 text-white border-0 shadow-sm">
@@ -1433,14 +1526,21 @@ function ComplaintCard({ complaint, isAdmin = false, onUpdate, officersMap = {}
             </div>
           )}
 
-          {complaint.workNotes && complaint.workNotes.length > 0 && (
+          {complaint.work_note_count > 0 && (
             <div className="space-y-3">
-              <h4 className="text-sm font-semibold text-green-300 flex items-center">
+              <button
+                type="button"
+                onClick={toggleWorkNotes}
+                className="text-sm font-semibold text-green-300 flex items-center"
+              >
                 <Activity className="w-4 h-4 mr-2" />
-                Officer Work Updates
-              </h4>
-              {complaint.workNotes.map((note, index) => (
-                <div key={index} className="bg-gradient-to-r from-green-900/30 to-emerald-900/30 p-4 rounded-lg border-l-4 border-green-500">
+                Officer Work Updates ({complaint.work_note_count})
+              </button>
+              {showWorkNotes && workNotes === null && (
+                <p className="text-xs text-green-400">Loading...</p>
+              )}
+              {showWorkNotes && workNotes && workNotes.map((note) => (
+                <div key={note.id} className="bg-gradient-to-r from-green-900/30 to-emerald-900/30 p-4 rounded-lg border-l-4 border-green-500">
                   <div className="flex items-center justify-between mb-2">
                     <span className="text-sm font-medium text-green-300">Officer Update</span>
                     <span className="text-xs text-green-400">
@@ -1858,7 +1958,11 @@ function Dashboard() {
       normalizedRole === 'officer' ? 'officer-complaints' :
         'my-complaints'
   );
-  const [officerData, setOfficerData] = useState({ items: [], total: 0, page: 1, pageSize: 20 });
+  const [officerData, setOfficerData] = useState({ items: [], total: 0, page: 1, pageSize: 20, nextCursor: null });
+  // officerCursors.current[n] is the cursor that fetches officer page n + 1
+  const officerCursors = React.useRef([null]);
+  const [complaintsCursor, setComplaintsCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [officers, setOfficers] = useState([]);
   const [officerLoading, setOfficerLoading] = useState(false);
 
@@ -1878,16 +1982,19 @@ function Dashboard() {
       if (normalizedRole === 'admin' && (activeTab === 'all-complaints' || activeTab === 'no-officer' || activeTab === 'officer-management')) {
         console.log('📋 Loading admin complaints');
         response = await api.get('/api/complaints');
+        setComplaintsCursor(response.headers['x-next-cursor'] || null);
       } else if (normalizedRole === 'officer') {
         // For officers, load their assigned complaints
         console.log('👮 Loading officer complaints for:', user.id);
-        response = await api.get('/api/officer/complaints');
+        response = await api.get('/api/officer/complaints', { params: { include_total: true } });
         console.log('📊 Officer complaints response:', response.data);
+        officerCursors.current = [null, response.data.nextCursor];
         setOfficerData({
           items: response.data.items || [],
           total: response.data.total || 0,
-          page: response.data.page || 1,
-          pageSize: response.data.pageSize || 20
+          page: 1,
+          pageSize: response.data.pageSize || 20,
+          nextCursor: response.data.nextCursor || null
         });
         // Also set complaints for the Dashboard component
         setComplaints(response.data.items || []);
@@ -1902,6 +2009,20 @@ function Dashboard() {
     }
   };
 
+  // Admin listing is paged; append the next page when asked
+  const loadMoreComplaints = async () => {
+    if (!complaintsCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get('/api/complaints', { params: { cursor: complaintsCursor } });
+      setComplaints((prev) => [...prev, ...response.data]);
+      setComplaintsCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('❌ Error loading more complaints:', error);
+    }
+    setLoadingMore(false);
+  };
+
   const loadStats = async () => {
     if (normalizedRole === 'admin') {
       try {
@@ -1920,15 +2041,18 @@ function Dashboard() {
     }
     try {
       console.log('👮 Loading officer complaints for page:', page);
-      const res = await api.get('/api/officer/complaints');
+      const cursor = page > 1 ? officerCursors.current[page - 1] : null;
+      // Only the first page pays for a count; later pages reuse it
+      const res = await api.get('/api/officer/complaints', { params: { cursor, include_total: page === 1 } });
       console.log('📊 Officer complaints response:', res.data);
-      // Convert the response to match the expected format
-      setOfficerData({
+      officerCursors.current[page] = res.data.nextCursor;
+      setOfficerData((prev) => ({
         items: res.data.items || [],
-        page: res.data.page || 1,
+        page,
         pageSize: res.data.pageSize || 20,
-        total: res.data.total || 0
-      });
+        total: page === 1 ? (res.data.total || 0) : prev.total,
+        nextCursor: res.data.nextCursor || null
+      }));
     } catch (e) {
       console.error('❌ Error loading officer complaints', e);
     }
@@ -2052,7 +2176,11 @@ function Dashboard() {
       }
 
       loadComplaints();
-      alert('Complaint submitted successfully! Copy your ID shown below.');
+      if (response.data.duplicate_of) {
+        alert('Complaint submitted! A similar issue was already reported nearby, so your complaint has been linked to it. Copy your ID shown below.');
+      } else {
+        alert('Complaint submitted successfully! Copy your ID shown below.');
+      }
       return response.data;
     } catch (error) {
       console.error('Error submitting complaint:', error);
@@ -2229,6 +2357,13 @@ function Dashboard() {
                   />
                 ))
               )}
+              {complaintsCursor && (
+                <div className="flex justify-center pt-2">
+                  <Button variant="outline" size="sm" disabled={loadingMore} onClick={loadMoreComplaints}>
+                    {loadingMore ? 'Loading...' : 'Load more'}
+                  </Button>
+                </div>
+              )}
             </div>
           </TabsContent>
 
@@ -2264,7 +2399,9 @@ function Dashboard() {
                           <div className="flex justify-between items-start">
                             <div>
                               <h3 className="text-lg font-semibold text-white">{complaint.title}</h3>
-                              <p className="text-slate-300 mt-1">{complaint.description}</p>
+                              <div className="mt-1">
+                                <ComplaintDescription complaintId={complaint.id} className="text-slate-300" />
+                              </div>
                               <div className="mt-2 flex items-center gap-4">
                                 <Badge variant="outline" className="bg-purple-900 text-purple-300 border-purple-700">
                                   Pincode: {complaint.pincode}
@@ -2413,7 +2550,7 @@ function Dashboard() {
                   ))}
                   <div className="flex gap-2">
                     <Button variant="outline" size="sm" disabled={officerData.page <= 1} onClick={() => loadOfficerComplaints(officerData.page - 1)}>Prev</Button>
-                    <Button variant="outline" size="sm" disabled={(officerData.page * officerData.pageSize) >= officerData.total} onClick={() => loadOfficerComplaints(officerData.page + 1)}>Next</Button>
+                    <Button variant="outline" size="sm" disabled={!officerData.nextCursor} onClick={() => loadOfficerComplaints(officerData.page + 1)}>Next</Button>
                   </div>
                 </>
               )}
@@ -1,4 +1,7 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
+
+const POLL_INTERVAL_MS = 15000;
+const PAGE_SIZE = 50;
 
 const ComplaintComments = ({ complaintId, token }) => {
   const [comments, setComments] = useState([]);
@@ -6,24 +9,42 @@ const ComplaintComments = ({ complaintId, token }) => {
   const [type, setType] = useState("public");
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
+  // Cursor of the newest comment we have; the server only returns comments after it
+  const cursorRef = useRef(null);
+  const fetchingRef = useRef(false);
 
   const fetchComments = async () => {
-    setLoading(true);
+    if (fetchingRef.current) return;
+    fetchingRef.current = true;
     setError("");
     try {
-      const res = await fetch(`/api/complaints/${complaintId}/comments`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      if (!res.ok) throw new Error("Failed to fetch comments");
-      setComments(await res.json());
+      let hasMore = true;
+      while (hasMore) {
+        const params = new URLSearchParams({ limit: PAGE_SIZE });
+        if (cursorRef.current) params.set("since", cursorRef.current);
+        const res = await fetch(`/api/complaints/${complaintId}/comments?${params}`, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!res.ok) throw new Error("Failed to fetch comments");
+        const page = await res.json();
+        if (page.items.length > 0) setComments((prev) => [...prev, ...page.items]);
+        hasMore = page.items.length === PAGE_SIZE;
+        cursorRef.current = page.nextCursor;
+      }
     } catch (e) {
       setError(e.message);
     }
-    setLoading(false);
+    fetchingRef.current = false;
   };
 
   useEffect(() => {
-    if (complaintId && token) fetchComments();
+    if (!complaintId || !token) return undefined;
+    cursorRef.current = null;
+    setComments([]);
+    setLoading(true);
+    fetchComments().finally(() => setLoading(false));
+    const timer = setInterval(fetchComments, POLL_INTERVAL_MS);
+    return () => clearInterval(timer);
     // eslint-disable-next-line
   }, [complaintId, token]);
 
@@ -31,13 +52,10 @@ const ComplaintComments = ({ complaintId, token }) => {
     e.preventDefault();
     setError("");
     try {
-      const res = await fetch(`/api/complaints/${complaintId}/comments`, {
+      const params = new URLSearchParams({ message, type });
+      const res = await fetch(`/api/complaints/${complaintId}/comments?${params}`, {
         method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${token}`,
-        },
-        body: JSON.stringify({ message, type }),
+        headers: { Authorization: `Bearer ${token}` },
       });
       if (!res.ok) throw new Error("Failed to add comment");
       setMessage("");
@@ -54,8 +72,8 @@ const ComplaintComments = ({ complaintId, token }) => {
       {loading && <div>Loading...</div>}
       {error && <div style={{ color: "red" }}>{error}</div>}
       <ul style={{ listStyle: "none", padding: 0 }}>
-        {comments.map((c, i) => (
-          <li key={i} style={{ marginBottom: 12, borderLeft: c.type === "internal" ? "4px solid orange" : "4px solid #007bff", paddingLeft: 8 }}>
+        {comments.map((c) => (
+          <li key={c.id} style={{ marginBottom: 12, borderLeft: c.type === "internal" ? "4px solid orange" : "4px solid #007bff", paddingLeft: 8 }}>
             <b>{c.author_name}</b> ({c.author_role}) [{c.type}]<br />
             <span>{c.message}</span>
             <div style={{ fontSize: 12, color: "#888" }}>{new Date(c.timestamp).toLocaleString()}</div>
@@ -1,16 +1,50 @@
-import React, { useEffect, useState } from "react";
-import { MapContainer, TileLayer, Marker, Popup, CircleMarker } from "react-leaflet";
+import React, { useCallback, useEffect, useRef, useState } from "react";
+import { MapContainer, TileLayer, Popup, CircleMarker, useMapEvents } from "react-leaflet";
 import "leaflet/dist/leaflet.css";
 
+// Below this zoom the map shows server-side clusters instead of individual complaints
+const DETAIL_ZOOM = 15;
+
+// Reports the visible area (as a "west,south,east,north" bbox) and zoom on load and after every pan/zoom
+const ViewportWatcher = ({ onChange }) => {
+  const map = useMapEvents({
+    moveend: () => onChange(map.getBounds().toBBoxString(), map.getZoom()),
+  });
+
+  useEffect(() => {
+    map.whenReady(() => onChange(map.getBounds().toBBoxString(), map.getZoom()));
+  }, [map, onChange]);
+
+  return null;
+};
+
+const STATUS_COLORS = { RESOLVED: "green", IN_PROGRESS: "orange" };
+
+// Colour a cluster by its most common status
+const clusterColor = (statuses) => {
+  const [top] = Object.entries(statuses).sort((a, b) => b[1] - a[1]);
+  return (top && STATUS_COLORS[top[0]]) || "red";
+};
+
 const ComplaintMap = () => {
   const [complaints, setComplaints] = useState([]);
+  const [clusters, setClusters] = useState([]);
   const [loading, setLoading] = useState(true);
+  const latestRequest = useRef(0);
 
-  useEffect(() => {
-    fetch("/public/complaints/locations")
+  const loadViewport = useCallback((bbox, zoom) => {
+    // Drop responses for a viewport the user has already moved away from
+    const request = ++latestRequest.current;
+    const detailed = zoom >= DETAIL_ZOOM;
+    const url = detailed
+      ? `/public/complaints/locations?bbox=${encodeURIComponent(bbox)}`
+      : `/public/complaints/clusters?bbox=${encodeURIComponent(bbox)}&zoom=${zoom}`;
+    fetch(url)
       .then((res) => res.json())
       .then((data) => {
-        setComplaints(data);
+        if (request !== latestRequest.current) return;
+        setComplaints(detailed ? data : []);
+        setClusters(detailed ? [] : data.clusters);
         setLoading(false);
       });
   }, []);
@@ -20,33 +54,47 @@ const ComplaintMap = () => {
 
   return (
     <div style={{ height: "500px", width: "100%" }}>
-      {loading ? (
-        <div>Loading map...</div>
-      ) : (
-        <MapContainer center={center} zoom={5} style={{ height: "100%", width: "100%" }}>
-          <TileLayer
-            attribution='&copy; <a href="https://osm.org/copyright">OpenStreetMap</a> contributors'
-            url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
-          />
-          {complaints.map((c) =>
-            c.latitude && c.longitude ? (
-              <CircleMarker
-                key={c.id}
-                center={[c.latitude, c.longitude]}
-                radius={8}
-                color={c.status === "resolved" ? "green" : c.status === "in_progress" ? "orange" : "red"}
-                fillOpacity={0.7}
-              >
-                <Popup>
-                  <b>{c.category}</b> ({c.status})<br />
-                  {c.address || "No address"}<br />
-                  {new Date(c.created_at).toLocaleString()}
-                </Popup>
-              </CircleMarker>
-            ) : null
-          )}
-        </MapContainer>
-      )}
+      {loading && <div>Loading map...</div>}
+      <MapContainer center={center} zoom={5} style={{ height: "100%", width: "100%" }}>
+        <TileLayer
+          attribution='&copy; <a href="https://osm.org/copyright">OpenStreetMap</a> contributors'
+          url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
+        />
+        <ViewportWatcher onChange={loadViewport} />
+        {clusters.map((cluster) => (
+          <CircleMarker
+            key={cluster.id}
+            center={[cluster.latitude, cluster.longitude]}
+            radius={Math.min(8 + 8 * Math.log10(cluster.count), 30)}
+            color={clusterColor(cluster.statuses)}
+            fillOpacity={0.6}
+          >
+            <Popup>
+              <b>{cluster.count} complaint{cluster.count === 1 ? "" : "s"}</b><br />
+              {Object.entries(cluster.statuses).map(([status, count]) => (
+                <div key={status}>{status}: {count}</div>
+              ))}
+            </Popup>
+          </CircleMarker>
+        ))}
+        {complaints.map((c) =>
+          c.latitude && c.longitude ? (
+            <CircleMarker
+              key={c.id}
+              center={[c.latitude, c.longitude]}
+              radius={8}
+              color={c.status === "resolved" ? "green" : c.status === "in_progress" ? "orange" : "red"}
+              fillOpacity={0.7}
+            >
+              <Popup>
+                <b>{c.category}</b> ({c.status})<br />
+                {c.address || "No address"}<br />
+                {new Date(c.created_at).toLocaleString()}
+              </Popup>
+            </CircleMarker>
+          ) : null
+        )}
+      </MapContainer>
     </div>
   );
 };
@@ -0,0 +1,81 @@
+"""
+Shared fixtures: the API wired to the in-memory storage backend.
+
+The app is started once per session. Each test gets a fresh MemoryStorage,
+token version table and public response cache, so tests never see each
+other's data.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+os.environ["STORAGE_BACKEND"] = "memory"
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    # server.py creates uploads/ relative to the working directory on import
+    os.chdir(tmp_path_factory.mktemp("api"))
+    import server
+    from fastapi.testclient import TestClient
+
+    with TestClient(server.app) as client:
+        yield server, client
+
+
+@pytest.fixture
+def server(api):
+    from storage import create_storage
+    from token_versions import TokenVersionTable
+
+    module, _ = api
+    module.storage = create_storage("memory")
+    module.token_versions = TokenVersionTable(recheck_seconds=module.token_versions.recheck_seconds)
+    module.public_cache.clear()
+    return module
+
+
+@pytest.fixture
+def client(api, server):
+    return api[1]
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin(client):
+    response = client.post("/api/officer/login", data={"username": "admin", "password": "admin"})
+    assert response.status_code == 200
+    return bearer(response.json()["access_token"])
+
+
+@pytest.fixture
+def register(client):
+    """Register a citizen and return their token response"""
+    def register(email: str, password: str = "secret"):
+        response = client.post("/api/auth/register", json={"email": email, "password": password, "full_name": email})
+        assert response.status_code == 200
+        return response.json()
+    return register
+
+
+@pytest.fixture
+def create_officer(client, admin):
+    """Create an officer through the admin API and return (officer, auth headers)"""
+    def create_officer(username: str, pincodes=("534201",), password: str = "secret"):
+        response = client.post(
+            "/api/admin/officers",
+            json={"username": username, "password": password, "full_name": username, "pincodes": list(pincodes)},
+            headers=admin,
+        )
+        assert response.status_code == 200
+        login = client.post("/api/officer/login", data={"username": username, "password": password})
+        assert login.status_code == 200
+        return response.json(), bearer(login.json()["access_token"])
+    return create_officer
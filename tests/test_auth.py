@@ -0,0 +1,68 @@
+from tests.conftest import bearer
+
+
+def test_approved_citizen_officer_passes_version_recheck(server, client, admin, register):
+    citizen = register("citizen@example.com")
+    response = client.post(
+        "/api/users/request-officer",
+        data={"full_name": "Citizen", "phone": "1234567890", "locations": "534201"},
+        headers=bearer(citizen["access_token"]),
+    )
+    assert response.status_code == 200
+    assert client.post(f"/api/admin/approve-officer/{citizen['user']['id']}", headers=admin).status_code == 200
+
+    login = client.post("/api/auth/login", json={"email": "citizen@example.com", "password": "secret"})
+    assert login.status_code == 200
+    assert login.json()["user"]["role"] == "OFFICER"
+    headers = bearer(login.json()["access_token"])
+
+    # Every request re-reads the stored version; the officer lives in users, not officers
+    server.token_versions.recheck_seconds = 0
+    assert client.get("/api/complaints/my", headers=headers).status_code == 200
+    assert client.get("/api/officer/complaints", headers=headers).status_code == 200
+
+
+def test_deactivating_an_officer_revokes_access_and_refresh(client, admin, create_officer):
+    officer, headers = create_officer("ward1")
+    login = client.post("/api/officer/login", data={"username": "ward1", "password": "secret"}).json()
+    assert client.get("/api/officer/complaints", headers=headers).status_code == 200
+
+    assert client.delete(f"/api/admin/officers/{officer['id']}", headers=admin).status_code == 200
+
+    assert client.get("/api/officer/complaints", headers=headers).status_code == 401
+    refresh = client.post("/api/auth/refresh", json={"refresh_token": login["refresh_token"]})
+    assert refresh.status_code == 401
+    assert client.post("/api/officer/login", data={"username": "ward1", "password": "secret"}).status_code == 401
+
+
+def test_editing_an_officer_revokes_old_tokens_but_not_new_ones(client, admin, create_officer):
+    officer, headers = create_officer("ward2")
+    login = client.post("/api/officer/login", data={"username": "ward2", "password": "secret"}).json()
+
+    edit = client.put(f"/api/admin/officers/{officer['id']}", json={"pincodes": ["534202"]}, headers=admin)
+    assert edit.status_code == 200
+
+    assert client.get("/api/officer/complaints", headers=headers).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": login["refresh_token"]}).status_code == 401
+    fresh = client.post("/api/officer/login", data={"username": "ward2", "password": "secret"}).json()
+    assert fresh["user"]["locationsAssigned"] == ["534202"]
+    assert client.get("/api/officer/complaints", headers=bearer(fresh["access_token"])).status_code == 200
+
+
+def test_revocation_by_another_worker_applies_after_recheck(server, client, create_officer):
+    officer, headers = create_officer("ward3")
+    assert client.get("/api/officer/complaints", headers=headers).status_code == 200
+
+    # As if another worker deactivated the officer: only the database knows
+    client.portal.call(server.storage.officers.update, officer["id"], {"is_active": False}, True)
+    server.token_versions.recheck_seconds = 0
+    assert client.get("/api/officer/complaints", headers=headers).status_code == 401
+
+
+def test_refresh_issues_a_working_token_pair(client, register):
+    tokens = register("refresh@example.com")
+    refreshed = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert refreshed.status_code == 200
+    assert client.get("/api/complaints/my", headers=bearer(refreshed.json()["access_token"])).status_code == 200
+    # Access tokens are not accepted as refresh tokens
+    assert client.post("/api/auth/refresh", json={"refresh_token": tokens["access_token"]}).status_code == 401
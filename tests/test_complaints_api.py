@@ -0,0 +1,76 @@
+import pytest
+
+from tests.conftest import bearer
+
+COMPLAINT = {
+    "title": "Streetlight not working",
+    "description": "The light at temple street has been off for a week",
+    "category": "Power",
+    "address": "Temple St, North Zone",
+    "pincode": "534201",
+}
+
+
+@pytest.fixture
+def citizen(client, register):
+    headers = bearer(register("owner@example.com")["access_token"])
+    response = client.post("/api/complaints", json=COMPLAINT, headers=headers)
+    assert response.status_code == 200
+    return headers, response.json()
+
+
+def test_my_complaints_answers_304_to_a_matching_etag(client, admin, citizen):
+    headers, created = citizen
+    first = client.get("/api/complaints/my", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert "last-modified" not in first.headers
+
+    again = client.get("/api/complaints/my", headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert client.get("/api/complaints/my", headers={**headers, "If-None-Match": f"W/{etag}"}).status_code == 304
+
+    # A change to the listing yields a new ETag
+    client.put(f"/api/complaints/{created['id']}", json={"status": "IN_PROGRESS"}, headers=admin)
+    changed = client.get("/api/complaints/my", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_listings_ignore_if_modified_since(client, citizen):
+    headers, _ = citizen
+    response = client.get("/api/complaints/my", headers={**headers, "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert response.status_code == 200
+
+
+def test_list_fields_default_to_the_summary(client, citizen):
+    headers, _ = citizen
+    [row] = client.get("/api/complaints/my", headers=headers).json()
+    assert row["title"] == COMPLAINT["title"]
+    assert "description" not in row
+
+
+def test_list_fields_select_columns(client, citizen):
+    headers, created = citizen
+    rows = client.get("/api/complaints/my", params={"fields": "title, description"}, headers=headers).json()
+    assert rows == [{"id": created["id"], "title": COMPLAINT["title"], "description": COMPLAINT["description"]}]
+
+    [full] = client.get("/api/complaints/my", params={"fields": "*"}, headers=headers).json()
+    assert full["description"] == COMPLAINT["description"]
+    assert full["user_email"] == "owner@example.com"
+
+
+@pytest.mark.parametrize("fields", ["password", "title,nope", "dup_bands"])
+def test_list_fields_reject_unknown_names(client, admin, citizen, fields):
+    headers, _ = citizen
+    response = client.get("/api/complaints/my", params={"fields": fields}, headers=headers)
+    assert response.status_code == 400
+    assert client.get("/api/complaints", params={"fields": fields}, headers=admin).status_code == 400
+
+
+def test_zone_filter_is_normalized(client, admin, citizen):
+    for zone in ("north zone", "NORTH-ZONE", "534201"):
+        rows = client.get("/api/complaints", params={"zone": zone}, headers=admin).json()
+        assert len(rows) == 1, zone
+    assert client.get("/api/complaints", params={"zone": "south zone"}, headers=admin).json() == []
@@ -0,0 +1,115 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from storage import ComplaintQuery, create_storage
+
+pytestmark = pytest.mark.anyio
+
+STATUSES = ("PENDING", "IN_PROGRESS", "RESOLVED", "NO_OFFICER")
+CATEGORIES = ("Roads", "Water", "Power.Grid")
+PINCODES = ("534201", "534202", None)
+OFFICERS = ("o1", "o2", None)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def complaints():
+    return create_storage("memory").complaints
+
+
+def complaint(index: int, created_at: datetime, **fields) -> dict:
+    doc = {
+        "id": f"c{index:03d}",
+        "public_id": f"P{index:03d}",
+        "title": f"Complaint {index}",
+        "description": "Streetlight not working",
+        "category": "Roads",
+        "status": "PENDING",
+        "pincode": "534201",
+        "address": "12 Market Rd, North Zone, Bhimavaram",
+        "user_id": "u1",
+        "assigned_to": None,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+    doc.update(fields)
+    return doc
+
+
+async def test_keyset_paging_with_tied_created_at(complaints):
+    base = datetime(2026, 1, 1)
+    # Five distinct timestamps shared by 57 complaints, inserted out of order
+    indexes = list(range(57))
+    random.Random(7).shuffle(indexes)
+    for index in indexes:
+        await complaints.insert(complaint(index, base + timedelta(minutes=index % 5)))
+
+    seen, cursor = [], None
+    while True:
+        items, cursor = await complaints.page(ComplaintQuery(), limit=7, cursor=cursor)
+        seen.extend(items)
+        if cursor is None:
+            break
+
+    ids = [item["id"] for item in seen]
+    assert len(ids) == 57
+    assert len(set(ids)) == 57
+    keys = [(item["created_at"], item["id"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+async def test_paging_rejects_a_malformed_cursor(complaints):
+    await complaints.insert(complaint(1, datetime(2026, 1, 1)))
+    with pytest.raises(ValueError):
+        await complaints.page(ComplaintQuery(), limit=5, cursor="not-a-cursor")
+
+
+async def test_counters_match_reconcile_after_inserts_and_updates(complaints):
+    rng = random.Random(11)
+    now = datetime.utcnow()
+    for index in range(60):
+        await complaints.insert(complaint(
+            index,
+            now - timedelta(hours=rng.randrange(24 * 20)),
+            status=rng.choice(STATUSES),
+            category=rng.choice(CATEGORIES),
+            pincode=rng.choice(PINCODES),
+            assigned_to=rng.choice(OFFICERS),
+        ))
+    report = await complaints.reconcile_stats()
+    assert report["repaired"] == 0 and report["removed"] == 0
+
+    for _ in range(300):
+        complaint_id = f"c{rng.randrange(60):03d}"
+        change = rng.randrange(4)
+        if change == 0:
+            await complaints.update(complaint_id, {"status": rng.choice(STATUSES), "updated_at": datetime.utcnow()})
+        elif change == 1:
+            await complaints.update(complaint_id, {"category": rng.choice(CATEGORIES), "pincode": rng.choice(PINCODES)})
+        elif change == 2:
+            await complaints.set_assignment(complaint_id, rng.choice(OFFICERS), rng.choice(STATUSES))
+        else:
+            await complaints.update(complaint_id, {"title": "Edited", "updated_at": datetime.utcnow()})
+    await complaints.assign_unassigned("534202", "o3")
+
+    report = await complaints.reconcile_stats()
+    assert report["repaired"] == 0, report["drifted"]
+    assert report["removed"] == 0, report["drifted"]
+
+
+async def test_zone_filter_matches_normalized_address_parts(complaints):
+    await complaints.insert(complaint(1, datetime(2026, 1, 1)))
+    await complaints.insert(complaint(2, datetime(2026, 1, 2), address="4 Beach Rd, South Zone", pincode="534260"))
+
+    for zone in ("North Zone", "north  zone", "NORTH-ZONE", " north zone, ", "534201"):
+        assert await complaints.count(ComplaintQuery(zone=zone)) == 1, zone
+    assert await complaints.count(ComplaintQuery(zone="south zone")) == 1
+    assert await complaints.count(ComplaintQuery(zone="east zone")) == 0
+    # Whole address components only, not substrings of them
+    assert await complaints.count(ComplaintQuery(zone="north")) == 0
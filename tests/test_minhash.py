@@ -0,0 +1,49 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from storage.minhash import BANDS, ROWS, band_keys, shingles, similarity  # noqa: E402
+
+WORDS = [f"word{i}" for i in range(5000)]
+PAIRS = 200
+
+
+def text_pair(rng: random.Random, keep: float):
+    """Two 40-word texts sharing about ``keep`` of their words"""
+    first = rng.sample(WORDS, 40)
+    second = [word if rng.random() < keep else rng.choice(WORDS) for word in first]
+    return " ".join(first), " ".join(second)
+
+
+def candidate_rate(keep: float, seed: int):
+    rng = random.Random(seed)
+    hits, jaccard = 0, 0.0
+    for _ in range(PAIRS):
+        first, second = (shingles(text, None) for text in text_pair(rng, keep))
+        jaccard += similarity(first, second)
+        hits += bool(set(band_keys(first)) & set(band_keys(second)))
+    return hits / PAIRS, jaccard / PAIRS
+
+
+def test_similar_texts_usually_share_a_band():
+    rate, jaccard = candidate_rate(0.75, seed=1)
+    assert 0.55 <= jaccard <= 0.7
+    expected = 1 - (1 - jaccard ** ROWS) ** BANDS
+    assert rate >= 0.85
+    # The S-curve, not a rate that grows linearly with similarity
+    assert abs(rate - expected) < 0.1
+
+
+def test_unrelated_texts_rarely_share_a_band():
+    rate, jaccard = candidate_rate(0.0, seed=2)
+    assert jaccard < 0.2
+    assert rate < 0.05
+
+
+def test_band_keys_are_stable():
+    text = shingles("Pothole near the bus stand", "Large pothole causing accidents")
+    assert band_keys(text) == band_keys(set(text))
+    assert len(band_keys(text)) == BANDS
+    assert band_keys(set()) == []
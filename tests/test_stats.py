@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+from storage import stats
+
+NOW = datetime(2026, 3, 10, 12, 30)
+CREATED = datetime(2026, 3, 9, 8, 15)
+DAY = ("day", "2026-03-09")
+HOUR = ("hour", "2026-03-09T08")
+
+
+def complaint(**fields) -> dict:
+    doc = {
+        "status": "PENDING",
+        "category": "Roads",
+        "pincode": "534201",
+        "locality": "534201",
+        "assigned_to": None,
+        "created_at": CREATED,
+    }
+    doc.update(fields)
+    return doc
+
+
+def test_insert_counts_every_counter_once():
+    increments = stats.increments(None, complaint(), NOW)
+    assert set(increments) == {
+        (stats.TOTAL_ID, None), ("category", "Roads"), ("pincode", "534201"), ("locality", "534201"), DAY, HOUR,
+    }
+    for increment in increments.values():
+        assert increment["count"] == 1
+        assert increment["statuses.PENDING"] == 1
+    assert increments[DAY]["categories.Roads"] == 1
+    assert "categories.Roads" not in increments[(stats.TOTAL_ID, None)]
+
+
+def test_status_move_shifts_one_between_statuses():
+    increments = stats.increments(complaint(), complaint(status="RESOLVED"), NOW)
+    # Counts are unchanged, so only the status keys move, in every counter the complaint is in
+    assert set(increments) == {
+        (stats.TOTAL_ID, None), ("category", "Roads"), ("pincode", "534201"), ("locality", "534201"), DAY, HOUR,
+    }
+    for increment in increments.values():
+        assert increment == {"statuses.PENDING": -1, "statuses.RESOLVED": 1}
+
+
+def test_rewriting_the_same_state_changes_nothing():
+    assert stats.increments(complaint(), complaint(), NOW) == {}
+
+
+def test_assignment_from_none_adds_an_officer_counter():
+    increments = stats.increments(complaint(), complaint(assigned_to="o1"), NOW)
+    assert increments == {("officer", "o1"): {"count": 1, "statuses.PENDING": 1}}
+
+
+def test_unassignment_removes_the_officer_counter():
+    increments = stats.increments(complaint(assigned_to="o1", status="IN_PROGRESS"), complaint(status="PENDING"), NOW)
+    assert increments[("officer", "o1")] == {"count": -1, "statuses.IN_PROGRESS": -1}
+    assert ("officer", None) not in increments
+    assert increments[(stats.TOTAL_ID, None)] == {"statuses.IN_PROGRESS": -1, "statuses.PENDING": 1}
+
+
+def test_reassignment_moves_between_officers():
+    increments = stats.increments(complaint(assigned_to="o1"), complaint(assigned_to="o2"), NOW)
+    assert increments == {
+        ("officer", "o1"): {"count": -1, "statuses.PENDING": -1},
+        ("officer", "o2"): {"count": 1, "statuses.PENDING": 1},
+    }
+
+
+def test_category_change_moves_bucket_breakdowns():
+    increments = stats.increments(complaint(), complaint(category="Water"), NOW)
+    assert increments[("category", "Roads")] == {"count": -1, "statuses.PENDING": -1}
+    assert increments[("category", "Water")] == {"count": 1, "statuses.PENDING": 1}
+    for bucket in (DAY, HOUR):
+        assert increments[bucket] == {"categories.Roads": -1, "categories.Water": 1}
+
+
+def test_hour_buckets_stop_at_retention():
+    old = complaint(created_at=NOW - timedelta(days=stats.HOUR_RETENTION_DAYS, hours=1))
+    kinds = {kind for kind, _ in stats.increments(None, old, NOW)}
+    assert "day" in kinds
+    assert "hour" not in kinds
+    # A status change on an old complaint leaves its compacted hour bucket alone
+    moved = stats.increments(old, {**old, "status": "RESOLVED"}, NOW)
+    assert "hour" not in {kind for kind, _ in moved}
+
+    recent = complaint(created_at=NOW - timedelta(days=stats.HOUR_RETENTION_DAYS - 1))
+    assert "hour" in {kind for kind, _ in stats.increments(None, recent, NOW)}
+
+
+def test_category_keys_are_safe_field_names():
+    for category, key in (("Power.Grid", "Power_Grid"), ("$where", "where"), ("$a.b", "a_b"), ("", "Unknown"), (None, "Unknown")):
+        assert stats.category_key(category) == key
+        increment = stats.increments(None, complaint(category=category), NOW)[DAY]
+        assert increment[f"categories.{key}"] == 1
+    # The category counter itself keeps the raw name; it is a value, not a field name
+    assert ("category", "Power.Grid") in stats.increments(None, complaint(category="Power.Grid"), NOW)
+
+
+def counted(*docs) -> dict:
+    truth = {}
+    for doc in docs:
+        stats.count(truth, doc, NOW)
+    return truth
+
+
+def test_drift_is_empty_when_counters_match():
+    truth = counted(complaint(), complaint(status="RESOLVED", assigned_to="o1"))
+    actual = [dict(doc, statuses=dict(doc["statuses"], IN_PROGRESS=0)) for doc in truth.values()]
+    assert stats.drift(truth, actual) == ([], [])
+
+
+def test_drift_repairs_wrong_and_missing_counters():
+    truth = counted(complaint(), complaint(category="Water"))
+    actual = [dict(doc) for doc_id, doc in truth.items() if doc_id != "category:Water"]
+    wrong = next(doc for doc in actual if doc["_id"] == stats.TOTAL_ID)
+    wrong["count"] += 3
+    bucket = next(doc for doc in actual if doc["_id"] == stats.counter_id(DAY))
+    bucket["categories"] = {"Roads": 2}
+
+    repaired, removed = stats.drift(truth, actual)
+    assert {doc["_id"] for doc in repaired} == {stats.TOTAL_ID, stats.counter_id(DAY), "category:Water"}
+    assert removed == []
+
+
+def test_drift_removes_counters_with_nothing_left_to_count():
+    truth = counted(complaint())
+    stale = {"_id": "officer:ghost", "kind": "officer", "key": "ghost", "count": 2, "statuses": {"PENDING": 2}}
+    empty = {"_id": "officer:gone", "kind": "officer", "key": "gone", "count": 0, "statuses": {"PENDING": 0}}
+    repaired, removed = stats.drift(truth, list(truth.values()) + [stale, empty])
+    assert repaired == []
+    # Zeroed counters are harmless and left for reads to skip
+    assert removed == ["officer:ghost"]